@@ -0,0 +1,129 @@
+"""Description throughput per backend: the same prompts through Ollama and an OpenAI-compatible server.
+
+    python -m bench.backend_throughput --requests 48 --concurrency 1 4 8 16
+
+Both servers are local stand-ins (bench.fake_ollama) with the same per-token cost; what differs is how
+many generations they run at once: --ollama-parallel (OLLAMA_NUM_PARALLEL, 1 on a typical CPU host) and
+--openai-parallel (llama-server --parallel slots, served by continuous batching). Prompts come from real
+seeded encounters. Point --ollama-url / --openai-url at real servers to compare those instead.
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+
+from bench.fake_ollama import FakeOllama
+from src.ai_description import GENERATION_DEFAULTS, AIDescription
+from src.description_backends import DescriptionBackend, make_backend
+from src.encounter_generator import EncounterGenerator
+from src.tile_manager import TileManager
+
+MODEL = "gemma2:2b"
+
+
+def workload(count, seed=1234):
+    tiles = TileManager(setting="ravenloft")
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, seed=seed)
+    prompts = []
+    while len(prompts) < count:
+        for encounter in generator.stream(tiles.get_available_tiles(), players=4, level=5):
+            if not encounter.empty and len(prompts) < count:
+                prompts.append(AIDescription.build_prompt(encounter.tile, list(encounter.themes),
+                                                          encounter.creature_names))
+    return prompts, dict(GENERATION_DEFAULTS)
+
+
+class _Timed(DescriptionBackend):
+    """Wraps a backend and records how long each generate() takes; batch() calls it once per prompt."""
+
+    def __init__(self, backend):
+        super().__init__(backend.model, backend.host, backend.timeout)
+        self.backend = backend
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def connect(self):
+        self.backend.connect()
+
+    def health(self):
+        return self.backend.health()
+
+    def models(self):
+        return self.backend.models()
+
+    def generate(self, prompt, options=None):
+        start = time.perf_counter()
+        text = self.backend.generate(prompt, options)
+        with self._lock:
+            self.latencies.append(time.perf_counter() - start)
+        return text
+
+    def stream(self, prompt, options=None):
+        return self.backend.stream(prompt, options)
+
+
+def run(backend, prompts, options, concurrency):
+    timed = _Timed(backend)
+    start = time.perf_counter()
+    texts = timed.batch(prompts, options, max_workers=concurrency)
+    wall = time.perf_counter() - start
+    latencies = timed.latencies
+    words = sum(len(text.split()) for text in texts)
+    latencies.sort()
+    return {"backend": backend.name, "concurrency": concurrency, "requests": len(prompts),
+            "wall_s": round(wall, 3), "req_per_s": round(len(prompts) / wall, 2),
+            "tokens_per_s": round(words / wall, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 1),
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare description backends on the same workload")
+    parser.add_argument("--requests", type=int, default=48)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--backends", nargs="+", choices=["ollama", "ollama-http", "openai"],
+                        default=["ollama", "openai"])
+    parser.add_argument("--tokens", type=int, default=60, help="Tokens per stand-in completion")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="Stand-in seconds per token")
+    parser.add_argument("--first-token-delay", type=float, default=0.05, help="Stand-in prompt processing time")
+    parser.add_argument("--ollama-parallel", type=int, default=1)
+    parser.add_argument("--openai-parallel", type=int, default=8)
+    parser.add_argument("--ollama-url", help="Use this Ollama server instead of a stand-in")
+    parser.add_argument("--openai-url", help="Use this OpenAI-compatible server instead of a stand-in")
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--json", dest="json_path", help="Also write the results here")
+    args = parser.parse_args()
+
+    prompts, options = workload(args.requests)
+    rows = []
+    for kind in args.backends:
+        url = args.openai_url if kind == "openai" else args.ollama_url
+        server = None
+        if url is None:
+            server = FakeOllama(models=(args.model,), tokens=args.tokens, token_delay=args.token_delay,
+                                first_token_delay=args.first_token_delay,
+                                parallel=args.openai_parallel if kind == "openai" else args.ollama_parallel).start()
+            url = server.url
+        backend = make_backend(kind, args.model, url)
+        try:
+            backend.connect()
+            for concurrency in args.concurrency:
+                row = run(backend, prompts, options, concurrency)
+                rows.append(row)
+                print(f"{row['backend']:<7} x{concurrency:<3} {row['wall_s']:7.2f} s  {row['req_per_s']:7.2f} req/s  "
+                      f"{row['tokens_per_s']:8.1f} tok/s  p50 {row['p50_ms']:8.1f} ms  p95 {row['p95_ms']:8.1f} ms",
+                      file=sys.stderr)
+        finally:
+            backend.close()
+            if server is not None:
+                server.stop()
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"requests": args.requests, "rows": rows}, f, indent=1)
+    print(json.dumps(rows, indent=1))
+
+
+if __name__ == "__main__":
+    main()
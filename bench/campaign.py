@@ -0,0 +1,78 @@
+"""Wall-clock for a whole route: the REPL's one-tile-at-a-time loop vs src.campaign's pipeline.
+
+    python -m bench.campaign --tiles 20 --concurrency 1 2 4 8 --server-parallel 4
+
+The server is a local stand-in (bench.fake_ollama) with a fixed prompt and per-token cost and
+--server-parallel generation slots (OLLAMA_NUM_PARALLEL); point --url at a real Ollama to use it
+instead. Both sides run the same seeded route, so they describe the same encounters. "first" is how long
+until the first encounter is ready to print.
+"""
+import argparse
+import json
+import sys
+import time
+
+from bench.fake_ollama import FakeOllama
+from src.campaign import Campaign, sequential
+from src.encounter_generator import EncounterGenerator
+from src.tile_manager import TileManager
+
+MODEL = "gemma2:2b"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare campaign mode with the sequential REPL")
+    parser.add_argument("--tiles", type=int, default=20, help="Route length (cycles through the setting's tiles)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--server-parallel", type=int, default=4, help="Stand-in generation slots")
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--first-token-delay", type=float, default=0.05)
+    parser.add_argument("--backend", choices=["ollama", "ollama-http", "openai"], default="ollama-http")
+    parser.add_argument("--url", help="Use this server instead of a stand-in")
+    parser.add_argument("--setting", default="ravenloft")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", dest="json_path", help="Also write the results here")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = FakeOllama(models=(MODEL,), tokens=args.tokens, token_delay=args.token_delay,
+                            first_token_delay=args.first_token_delay, parallel=args.server_parallel).start()
+        url = server.url
+    rows = []
+    try:
+        tiles = TileManager(setting=args.setting)
+        names = tiles.get_available_tiles()
+        route = [(names[i % len(names)], False) for i in range(args.tiles)]
+        generator = EncounterGenerator(tile_manager=tiles, local_ai=True, model=MODEL, setting=tiles.setting,
+                                       ai_backend=args.backend, ai_host=url)
+        generator._get_ai()  # connect outside the timings
+
+        wall = sequential(generator, route, 4, 5, args.seed)
+        rows.append({"mode": "sequential", "concurrency": 1, "wall_s": round(wall, 3)})
+        for concurrency in args.concurrency:
+            campaign = Campaign(generator, route, 4, 5, concurrency=concurrency, seed=args.seed)
+            start = time.perf_counter()
+            first = None
+            for _ in campaign:
+                first = first if first is not None else time.perf_counter() - start
+            rows.append({"mode": "campaign", "concurrency": concurrency, "wall_s": round(campaign.wall_s, 3),
+                         "first_s": round(first, 3), "select_ms": round(campaign.select_ms, 2),
+                         "speedup": round(wall / campaign.wall_s, 2)})
+        for row in rows:
+            print(f"{row['mode']:<10} x{row['concurrency']:<3} {row['wall_s']:7.2f} s"
+                  + (f"  first {row['first_s']:5.2f} s  {row['speedup']:4.1f}x" if "speedup" in row else ""),
+                  file=sys.stderr)
+    finally:
+        if server is not None:
+            server.stop()
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"tiles": args.tiles, "rows": rows}, f, indent=1)
+    print(json.dumps(rows, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Startup time and memory for a very large creatures.json: json.load vs. the streaming loader.
+
+    python -m bench.catalog_load --entries 300000
+
+Writes a synthetic catalog (SRD entries repeated under new names, notes included) to a temp file, then
+loads it in a fresh interpreter per mode so peak RSS isn't shared between them.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from src import settings
+
+_CHILD = """
+import json, resource, sys, time
+path, mode = sys.argv[1], sys.argv[2]
+from src.creature_loader import load_creatures
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if mode == "json.load":
+    with open(path) as f:
+        creatures = json.load(f)
+else:
+    creatures = load_creatures(path)
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"mode": mode, "entries": len(creatures), "ms": round(elapsed * 1000, 1),
+                  "peak_rss_delta_mb": round((peak - before) / 1024, 1)}))
+"""
+
+
+def write_catalog(path, entries):
+    base = settings.load_setting("generic").creatures
+    with open(os.path.join(settings.CATALOGS_DIR, "srd5e", "creatures.json")) as f:
+        full = {c["name"]: c for c in json.load(f)}
+    with open(path, "w") as f:
+        f.write("[\n")
+        for i in range(entries):
+            entry = dict(full.get(base[i % len(base)]["name"], base[i % len(base)]))
+            entry["name"] = f"{entry['name']} #{i}"
+            f.write("    " + json.dumps(entry) + (",\n" if i < entries - 1 else "\n"))
+        f.write("]\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare json.load with the streaming creature loader")
+    parser.add_argument("--entries", type=int, default=300000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "creatures.json")
+        write_catalog(path, args.entries)
+        print(f"{args.entries} entries, {os.path.getsize(path) / 1e6:.1f} MB on disk")
+        for mode in ("json.load", "streaming"):
+            out = subprocess.run([sys.executable, "-c", _CHILD, path, mode], capture_output=True, text=True,
+                                 check=True).stdout
+            result = json.loads(out)
+            print(f"{result['mode']:<10} {result['ms']:9.1f} ms  peak RSS +{result['peak_rss_delta_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
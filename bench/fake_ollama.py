@@ -0,0 +1,238 @@
+"""A local stand-in for an Ollama server, for benchmarks that must not depend on a real model.
+
+Implements GET /api/tags, GET /api/ps, POST /api/generate (streaming NDJSON or a single JSON body) and
+POST /api/embed with configurable latency, so the AI path can be timed end to end on any machine.
+It also speaks enough of the OpenAI API that llama.cpp's llama-server offers (GET /health, GET /v1/models,
+POST /v1/chat/completions with SSE streaming) to stand in for that server. `parallel` caps how many
+generations run at once (Ollama's OLLAMA_NUM_PARALLEL, llama-server's --parallel slots); requests beyond
+it queue.
+Embeddings are hashed bags of words: texts sharing words come out similar, which is enough to exercise
+src/theme_index.py.
+
+    python -m bench.fake_ollama --port 11500 --token-delay 0.005
+"""
+import argparse
+import contextlib
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EMBED_DIMS = 256
+WORDS = ("Cold mist curls along the flagstones as hollow shapes shuffle from the dark, "
+         "bones clicking, eyes burning with a pale and hungry light while dust drifts from the vaulted ceiling").split()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+    # Go's net/http sets TCP_NODELAY; without it headers and body go out as separate small segments and
+    # every response waits ~40 ms on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, body, status=200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        server = self.server.fake
+        if self.path == "/api/tags":
+            self._json({"models": [server.model_entry(name) for name in server.models]})
+        elif self.path == "/api/ps":
+            self._json({"models": [server.model_entry(name) for name in sorted(server.loaded)]})
+        elif self.path == "/v1/models":
+            self._json({"object": "list", "data": [{"id": name, "object": "model"} for name in server.models]})
+        elif self.path in ("/", "/health"):
+            self._json({"status": "ok"})
+        else:
+            self._json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        server = self.server.fake
+        if self.path not in ("/api/generate", "/api/embed", "/v1/chat/completions"):
+            self._json({"error": "not found"}, 404)
+            return
+        request = self._body()
+        model = request.get("model")
+        openai = self.path.startswith("/v1/")
+        if model not in server.models and not openai:  # llama-server answers under any model name
+            self._json({"error": f"model '{model}' not found"}, 404)
+            return
+        with server.slots:
+            with server.lock:
+                server.requests += 1
+                server.active += 1
+                server.peak_active = max(server.peak_active, server.active)
+                server.loaded.add(model)
+            try:
+                if self.path == "/api/embed":
+                    self._embed(server, request)
+                elif openai:
+                    self._chat(server, request)
+                else:
+                    self._generate(server, request)
+            finally:
+                with server.lock:
+                    server.active -= 1
+
+    def _generate(self, server, request):
+        prompt = request.get("prompt", "")
+        limit = (request.get("options") or {}).get("num_predict") or server.tokens
+        tokens = [WORDS[i % len(WORDS)] + " " for i in range(min(limit, server.tokens))]
+        start = time.perf_counter_ns()
+        time.sleep(server.first_token_delay)
+        stats = {
+            "model": request["model"], "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "prompt_eval_count": max(1, len(prompt) // 4), "eval_count": len(tokens),
+        }
+
+        if request.get("stream", True):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for token in tokens:
+                time.sleep(server.token_delay)
+                self._chunk({"model": request["model"], "created_at": stats["created_at"],
+                             "response": token, "done": False})
+            stats.update(response="", done=True, done_reason="stop", total_duration=time.perf_counter_ns() - start)
+            self._chunk(stats)
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        time.sleep(server.token_delay * len(tokens))
+        stats.update(response="".join(tokens), done=True, done_reason="stop",
+                     total_duration=time.perf_counter_ns() - start)
+        self._json(stats)
+
+    def _chat(self, server, request):
+        limit = request.get("max_tokens") or server.tokens
+        tokens = [WORDS[i % len(WORDS)] + " " for i in range(min(limit, server.tokens))]
+        created = int(time.time())
+        time.sleep(server.first_token_delay)
+        base = {"id": f"chatcmpl-{server.requests}", "created": created, "model": request.get("model")}
+        if request.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for token in tokens:
+                time.sleep(server.token_delay)
+                self._event({**base, "object": "chat.completion.chunk",
+                             "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]})
+            self._event({**base, "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            self._event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        time.sleep(server.token_delay * len(tokens))
+        prompt = "".join(m.get("content", "") for m in request.get("messages", []))
+        self._json({**base, "object": "chat.completion",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": "".join(tokens)}}],
+                    "usage": {"prompt_tokens": max(1, len(prompt) // 4), "completion_tokens": len(tokens),
+                              "total_tokens": max(1, len(prompt) // 4) + len(tokens)}})
+
+    def _event(self, body):
+        data = f"data: {body if isinstance(body, str) else json.dumps(body)}\n\n".encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _embed(self, server, request):
+        texts = request.get("input", "")
+        texts = [texts] if isinstance(texts, str) else texts
+        time.sleep(server.token_delay * len(texts))
+        self._json({"model": request["model"], "embeddings": [_bag_of_words(text) for text in texts],
+                    "prompt_eval_count": sum(len(text) // 4 for text in texts)})
+
+    def _chunk(self, body):
+        data = json.dumps(body).encode() + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def _bag_of_words(text, dims=EMBED_DIMS):
+    vector = [0.0] * dims
+    for word in text.lower().replace("-", " ").split():
+        word = word.strip(".,;:()'\"")
+        if word:
+            vector[zlib.crc32(word.encode()) % dims] += 1.0
+    return vector
+
+
+class FakeOllama:
+    def __init__(self, host="127.0.0.1", port=0, models=("gemma2:2b",), tokens=60, token_delay=0.0,
+                 first_token_delay=0.0, parallel=None):
+        self.models = list(models)
+        # Generation slots; None = unlimited
+        self.slots = threading.BoundedSemaphore(parallel) if parallel else contextlib.nullcontext()
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+        self.loaded = set()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.active = 0
+        self.peak_active = 0
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def model_entry(self, name):
+        return {"name": name, "model": name, "modified_at": "2025-01-01T00:00:00Z", "size": 1600000000,
+                "digest": "0" * 64, "details": {"format": "gguf", "family": name.split(":")[0],
+                                                "parameter_size": "2B", "quantization_level": "Q4_0"}}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--models", nargs="+", default=["gemma2:2b"])
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds per generated token")
+    parser.add_argument("--first-token-delay", type=float, default=0.0, help="Seconds before the first token")
+    parser.add_argument("--parallel", type=int, default=None, help="Concurrent generations (default: unlimited)")
+    args = parser.parse_args()
+    server = FakeOllama(args.host, args.port, args.models, args.tokens, args.token_delay, args.first_token_delay,
+                        args.parallel)
+    print(f"Fake Ollama listening on {server.url} (models: {', '.join(server.models)})")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
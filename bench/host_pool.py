@@ -0,0 +1,68 @@
+"""Description throughput with 1, 2 and 4 Ollama hosts behind a BackendPool.
+
+    python -m bench.host_pool --hosts 1 2 4 --requests 48
+
+Each host is a local stand-in (bench.fake_ollama) with --parallel generation slots, like one Ollama
+instance per port with OLLAMA_NUM_PARALLEL=1. Prompts come from real seeded encounters, and
+--concurrency requests stay in flight (default: 4 per host). --dead adds that many unreachable hosts to
+every pool to show failover cost.
+"""
+import argparse
+import json
+import sys
+import time
+
+from bench.backend_throughput import MODEL, workload
+from bench.fake_ollama import FakeOllama
+from src.backend_pool import BackendPool
+
+
+def run(count, prompts, options, args):
+    servers = [FakeOllama(models=(MODEL,), tokens=args.tokens, token_delay=args.token_delay,
+                          first_token_delay=args.first_token_delay, parallel=args.parallel).start()
+               for _ in range(count)]
+    hosts = [server.url for server in servers] + [f"http://127.0.0.1:{9 + i}" for i in range(args.dead)]
+    backend = BackendPool(args.backend, MODEL, hosts)
+    try:
+        backend.connect()
+        start = time.perf_counter()
+        backend.batch(prompts, options, max_workers=args.concurrency or 4 * count)
+        wall = time.perf_counter() - start
+        return {"hosts": count, "dead": args.dead, "requests": len(prompts), "wall_s": round(wall, 3),
+                "req_per_s": round(len(prompts) / wall, 2),
+                "per_host": [s["requests"] for s in backend.stats()]}
+    finally:
+        backend.close()
+        for server in servers:
+            server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scale descriptions over several stand-in Ollama hosts")
+    parser.add_argument("--hosts", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=48)
+    parser.add_argument("--concurrency", type=int, help="Requests in flight (default: 4 per host)")
+    parser.add_argument("--parallel", type=int, default=1, help="Generation slots per stand-in host")
+    parser.add_argument("--dead", type=int, default=0, help="Unreachable hosts added to each pool")
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--first-token-delay", type=float, default=0.05)
+    parser.add_argument("--backend", choices=["ollama", "ollama-http"], default="ollama-http")
+    parser.add_argument("--json", dest="json_path", help="Also write the results here")
+    args = parser.parse_args()
+
+    prompts, options = workload(args.requests)
+    rows = []
+    for count in args.hosts:
+        row = run(count, prompts, options, args)
+        rows.append(row)
+        print(f"{count} host(s){f' + {args.dead} dead' if args.dead else ''}: {row['wall_s']:6.2f} s  "
+              f"{row['req_per_s']:6.2f} req/s  per host {row['per_host']}", file=sys.stderr)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"requests": args.requests, "rows": rows}, f, indent=1)
+    print(json.dumps(rows, indent=1))
+
+
+if __name__ == "__main__":
+    main()
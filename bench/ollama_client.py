@@ -0,0 +1,101 @@
+"""Import time and per-call overhead: the ollama package vs the slim client in src/ollama_http.py.
+
+    python -m bench.ollama_client --calls 300
+
+Import time is measured in fresh interpreters (best of --imports runs) so nothing is cached. Per-call
+overhead runs against a zero-latency local stand-in (bench.fake_ollama), so what's left is client-side
+work: building the request, the HTTP round trip over a kept-alive connection and turning the response
+(or each streamed chunk) into something the caller can use. Point --url at a real server to include it.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from bench.fake_ollama import FakeOllama
+
+MODEL = "gemma2:2b"
+PROMPT = ("Describe a D&D 5e encounter in the Crypt with undead, dark themes. "
+          "Include these monsters: Skeleton, Skeleton, Zombie, Ghoul.")
+CLIENTS = {
+    "ollama": "import httpx, ollama; ollama.Client",
+    "ollama-http": "import src.ollama_http",
+}
+
+
+def import_ms(statement, runs):
+    code = f"import time; t = time.perf_counter(); {statement}; print((time.perf_counter() - t) * 1000)"
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        times.append(float(out.stdout))
+    return min(times)
+
+
+def make_client(kind, url):
+    if kind == "ollama":
+        from ollama import Client
+        return Client(host=url)
+    from src.ollama_http import OllamaHTTPClient
+    return OllamaHTTPClient(url)
+
+
+def per_call_us(fn, calls):
+    fn()  # connect and warm up
+    times = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return round(statistics.median(times) * 1e6, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the ollama package with the slim HTTP client")
+    parser.add_argument("--calls", type=int, default=300, help="Timed calls per operation")
+    parser.add_argument("--imports", type=int, default=5, help="Fresh interpreters per import timing")
+    parser.add_argument("--tokens", type=int, default=60, help="Chunks per streamed stand-in response")
+    parser.add_argument("--url", help="Use this Ollama server instead of a stand-in")
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--json", dest="json_path", help="Also write the results here")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = FakeOllama(models=(args.model,), tokens=args.tokens).start()
+        url = server.url
+    options = {"num_predict": args.tokens}
+    rows = []
+    try:
+        for kind, statement in CLIENTS.items():
+            client = make_client(kind, url)
+            row = {
+                "client": kind,
+                "import_ms": round(import_ms(statement, args.imports), 1),
+                "list_us": per_call_us(lambda: client.list()["models"], args.calls),
+                "generate_us": per_call_us(
+                    lambda: client.generate(model=args.model, prompt=PROMPT, options=options)["response"],
+                    args.calls),
+                "stream_us": per_call_us(
+                    lambda: "".join(c["response"] for c in client.generate(model=args.model, prompt=PROMPT,
+                                                                             stream=True, options=options)),
+                    args.calls),
+            }
+            rows.append(row)
+            print(f"{kind:<12} import {row['import_ms']:7.1f} ms  list {row['list_us']:8.1f} us  "
+                  f"generate {row['generate_us']:8.1f} us  stream ({args.tokens} chunks) {row['stream_us']:9.1f} us",
+                  file=sys.stderr)
+    finally:
+        if server is not None:
+            server.stop()
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"calls": args.calls, "tokens": args.tokens, "rows": rows}, f, indent=1)
+    print(json.dumps(rows, indent=1))
+
+
+if __name__ == "__main__":
+    main()
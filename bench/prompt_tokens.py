@@ -0,0 +1,102 @@
+"""Prompt size before and after compilation: every creature listed vs counted groups (and notes).
+
+    python -m bench.prompt_tokens --encounters 200
+    python -m bench.prompt_tokens --url http://localhost:11434 --model gemma2:2b
+
+Prompts come from real seeded encounters. Each one is sent as the legacy prompt, the compiled prompt and
+the compiled prompt with creature notes, with num_predict=1 so the server only evaluates the prompt, and
+the prompt_eval_count / prompt_eval_duration it reports are compared with estimate_tokens(). The local
+stand-in (bench.fake_ollama) counts len(prompt) // 4, so its numbers only show the relative drop; point
+--url at a real Ollama server for the model's own tokenizer and prompt-eval time.
+"""
+import argparse
+import json
+import statistics
+import sys
+
+from bench.fake_ollama import FakeOllama
+from src.encounter_generator import EncounterGenerator
+from src.ollama_http import OllamaHTTPClient
+from src.prompt_compiler import PromptCompiler, estimate_tokens, legacy_prompt
+from src.settings import creature_notes, load_setting
+from src.tile_manager import TileManager
+
+MODEL = "gemma2:2b"
+
+
+def encounters(count, setting, seed):
+    tiles = TileManager(setting=setting)
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, seed=seed)
+    found = []
+    while len(found) < count:
+        for encounter in generator.stream(tiles.get_available_tiles(), players=4, level=5):
+            if not encounter.empty and len(found) < count:
+                found.append(encounter)
+    return found
+
+
+def measure(client, model, prompts):
+    counts, durations = [], []
+    for prompt in prompts:
+        response = client.generate(model, prompt, options={"num_predict": 1, "temperature": 0})
+        counts.append(response.get("prompt_eval_count", 0))
+        durations.append(response.get("prompt_eval_duration", 0) / 1e6)
+    return counts, durations
+
+
+def summarize(name, prompts, counts, durations):
+    estimates = [estimate_tokens(prompt) for prompt in prompts]
+    errors = [abs(e - c) / c for e, c in zip(estimates, counts) if c]
+    return {"prompt": name, "chars": round(statistics.mean(map(len, prompts)), 1),
+            "estimated": round(statistics.mean(estimates), 1), "evaluated": round(statistics.mean(counts), 1),
+            "max_evaluated": max(counts), "estimate_error": round(statistics.mean(errors), 3) if errors else None,
+            "eval_ms": round(statistics.mean(durations), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare legacy and compiled description prompt sizes")
+    parser.add_argument("--encounters", type=int, default=200)
+    parser.add_argument("--setting", default="ravenloft")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--budget", type=int, default=None, help="Token budget for the compiled prompts")
+    parser.add_argument("--url", help="A real Ollama server (default: a local stand-in)")
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--json", dest="json_path", help="Also write the results here")
+    args = parser.parse_args()
+
+    found = encounters(args.encounters, args.setting, args.seed)
+    compiler = PromptCompiler(args.budget) if args.budget else PromptCompiler()
+    notes = creature_notes(load_setting(args.setting))
+    variants = {
+        "legacy": [legacy_prompt(e.tile, list(e.themes), e.creature_names) for e in found],
+        "compiled": [compiler.compile(e.tile, list(e.themes), e.creature_names).text for e in found],
+        "compiled+notes": [compiler.compile(e.tile, list(e.themes), e.creature_names, notes).text for e in found],
+    }
+
+    server = None if args.url else FakeOllama(models=(args.model,), tokens=1).start()
+    client = OllamaHTTPClient(args.url or server.url)
+    rows = []
+    try:
+        for name, prompts in variants.items():
+            counts, durations = measure(client, args.model, prompts)
+            row = summarize(name, prompts, counts, durations)
+            rows.append(row)
+            print(f"{name:15} {row['chars']:7.1f} chars  ~{row['estimated']:6.1f} est  {row['evaluated']:6.1f} "
+                  f"evaluated (max {row['max_evaluated']})  {row['eval_ms']:6.2f} ms", file=sys.stderr)
+    finally:
+        client.close()
+        if server:
+            server.stop()
+    legacy = rows[0]["evaluated"]
+    for row in rows[1:]:
+        row["saved"] = round(1 - row["evaluated"] / legacy, 3) if legacy else None
+    print(f"Compiled prompts evaluate {rows[1]['saved']:.1%} fewer tokens; compile cache {compiler.stats()}",
+          file=sys.stderr)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"url": args.url, "model": args.model, "encounters": len(found), "rows": rows}, f, indent=1)
+    print(json.dumps(rows, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Repeatable --local-ai timings: record descriptions once, then time the REPL and batch paths on replay.
+
+    python -m bench.replay --route-length 24 --runs 5
+    python -m bench.replay --url http://localhost:11434 --cassette night.cassette   # record a real model once
+    python -m bench.replay --cassette night.cassette --speed 0                        # code-only overhead
+
+The first run (or --rerecord) generates a seeded route with descriptions from --url, or from a local
+stand-in (bench.fake_ollama), one request at a time, and records every response on the cassette
+(src/cassette.py), so the recorded times are the server's uncontended latencies; the batch path's replay
+assumes a server that can serve --concurrency requests at that speed. Each timed run then replays it: the
+same prompts, the same text and the recorded timing scaled by --speed. Model state and host load drop out,
+so a difference between two builds is the code's.
+"""
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import time
+
+from bench.fake_ollama import FakeOllama
+from src.campaign import Campaign, sequential
+from src.cassette import Cassette
+from src.encounter_generator import EncounterGenerator
+from src.tile_manager import TileManager
+
+MODEL = "gemma2:2b"
+
+
+def make_generator(args, cassette, host=None):
+    tiles = TileManager(setting=args.setting)
+    with contextlib.redirect_stdout(sys.stderr):  # the "connected" banner
+        generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, local_ai=True, model=args.model,
+                                       ai_backend="ollama-http", ai_host=host, ai_cassette=cassette)
+        generator._get_ai()
+    return generator
+
+
+def route_for(generator, length):
+    names = generator.tiles.get_available_tiles()
+    return [(names[i % len(names)], False) for i in range(length)]
+
+
+def record(args):
+    server = None if args.url else FakeOllama(models=(args.model,), tokens=args.tokens, token_delay=args.token_delay,
+                                              first_token_delay=args.first_token_delay, parallel=1).start()
+    if os.path.exists(args.cassette):
+        os.remove(args.cassette)
+    cassette = Cassette(args.cassette, "record")
+    try:
+        generator = make_generator(args, cassette, args.url or server.url)
+        route = route_for(generator, args.route_length)
+        start = time.perf_counter()
+        sequential(generator, route, 4, 5, args.seed)
+        print(f"Recorded {cassette.recorded} responses in {time.perf_counter() - start:.2f} s -> {args.cassette}",
+              file=sys.stderr)
+    finally:
+        cassette.close()
+        if server:
+            server.stop()
+
+
+def timed_runs(args, path):
+    cassette = Cassette(args.cassette, "replay", speed=args.speed)
+    generator = make_generator(args, cassette)
+    route = route_for(generator, args.route_length)
+    times = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        if path == "repl":
+            sequential(generator, route, 4, 5, args.seed)
+        else:
+            Campaign(generator, route, concurrency=args.concurrency, seed=args.seed).run()
+        times.append(time.perf_counter() - start)
+    stats = cassette.stats()
+    return {"path": path, "runs": args.runs, "speed": args.speed, "median_s": round(statistics.median(times), 4),
+            "min_s": round(min(times), 4), "max_s": round(max(times), 4),
+            "spread": round((max(times) - min(times)) / statistics.median(times), 4),
+            "replayed": stats["hits"], "missed": stats["misses"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the --local-ai paths against a recorded cassette")
+    parser.add_argument("--cassette", default="bench/replay.cassette")
+    parser.add_argument("--rerecord", action="store_true", help="Record the cassette again even if it exists")
+    parser.add_argument("--url", help="Record from a real Ollama server (default: a local stand-in)")
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--setting", default="ravenloft")
+    parser.add_argument("--route-length", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--concurrency", type=int, default=4, help="Descriptions in flight on the batch path")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay timing: 1 as recorded, 0 no waiting")
+    parser.add_argument("--paths", nargs="+", choices=["repl", "batch"], default=["repl", "batch"])
+    parser.add_argument("--tokens", type=int, default=60, help="Stand-in tokens per response")
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--first-token-delay", type=float, default=0.02)
+    parser.add_argument("--json", dest="json_path", help="Also write the results here")
+    args = parser.parse_args()
+
+    if args.rerecord or not os.path.exists(args.cassette):
+        record(args)
+    rows = []
+    for path in args.paths:
+        row = timed_runs(args, path)
+        rows.append(row)
+        print(f"{path:5} median {row['median_s']:7.3f} s  min {row['min_s']:7.3f}  max {row['max_s']:7.3f}  "
+              f"spread {row['spread']:.1%}  ({row['replayed']} replayed, {row['missed']} missed)", file=sys.stderr)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"cassette": args.cassette, "rows": rows}, f, indent=1)
+    print(json.dumps(rows, indent=1))
+
+
+if __name__ == "__main__":
+    main()
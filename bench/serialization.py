@@ -0,0 +1,60 @@
+"""Bulk export benchmark: text rendering vs. JSON lines vs. the RVE1 binary format.
+
+    python -m bench.serialization --count 100000
+"""
+import argparse
+import io
+import time
+
+from src.encounter_codec import dump_binary, dump_jsonl, load_binary, load_jsonl
+from src.encounter_generator import EncounterGenerator
+from src.encounter_stream import tile_cycle
+from src.tile_manager import TileManager
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark encounter serializers")
+    parser.add_argument("--setting", default="generic")
+    parser.add_argument("--count", type=int, default=50000)
+    parser.add_argument("--level", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    tiles = TileManager(setting=args.setting)
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting)
+    encounters = list(generator.stream(tile_cycle(tiles.get_available_tiles(), args.count),
+                                       level=args.level, seed=args.seed))
+
+    rows = []
+    text, seconds = timed(lambda: "\n\n".join(e.render_text() for e in encounters))
+    rows.append(("text", seconds, None, len(text.encode("utf-8"))))
+
+    buffer = io.StringIO()
+    _, write_s = timed(lambda: dump_jsonl(encounters, buffer))
+    buffer.seek(0)
+    decoded, read_s = timed(lambda: list(load_jsonl(buffer)))
+    assert decoded == encounters
+    rows.append(("jsonl", write_s, read_s, len(buffer.getvalue().encode("utf-8"))))
+
+    buffer = io.BytesIO()
+    _, write_s = timed(lambda: dump_binary(encounters, buffer))
+    buffer.seek(0)
+    decoded, read_s = timed(lambda: list(load_binary(buffer)))
+    assert decoded == encounters
+    rows.append(("binary", write_s, read_s, len(buffer.getvalue())))
+
+    print(f"{args.count} encounters ({args.setting}, level {args.level})")
+    print(f"{'format':<8} {'write s':>8} {'read s':>8} {'bytes/enc':>10} {'enc/s write':>12}")
+    for name, write_s, read_s, size in rows:
+        read = f"{read_s:8.3f}" if read_s is not None else f"{'-':>8}"
+        print(f"{name:<8} {write_s:8.3f} {read} {size / args.count:10.1f} {args.count / write_s:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
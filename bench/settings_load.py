@@ -0,0 +1,73 @@
+"""Load time and memory with several settings resident at once: layered loader vs. one copy per setting.
+
+    python -m bench.settings_load --settings ravenloft generic all
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from src import settings
+
+
+def _legacy(names):
+    # What the loader did before settings were layered: every setting parsed its own copy of each file
+    loaded = []
+    for name in names:
+        setting = settings.load_setting(name)
+        parts = {}
+        for path in setting.files:
+            kind = os.path.basename(path).split(".")[0]
+            with open(path) as f:
+                parts.setdefault(kind, []).append(json.load(f))
+        creatures = list({c["name"]: c for part in parts.get("creatures", []) for c in part}.values())
+        loaded.append((creatures, {c["name"]: i for i, c in enumerate(creatures)}, parts.get("themes"),
+                       parts.get("tiles")))
+    return loaded
+
+
+def _layered(names):
+    return [settings.load_setting(name) for name in names]
+
+
+def measure(mode, names):
+    if mode == "legacy":
+        settings.load_setting("ravenloft")  # resolve file lists up front, outside the measurement
+        [settings.load_setting(n) for n in names]
+        settings._files.clear()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = _legacy(names) if mode == "legacy" else _layered(names)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    unique_lists = len({id(r.creatures) for r in result}) if mode == "layered" else len(result)
+    return {"mode": mode, "ms": round(elapsed * 1000, 2), "retained_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1), "creature_lists": unique_lists}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure settings load time and memory")
+    parser.add_argument("--settings", nargs="+", default=["ravenloft", "generic", "all"])
+    parser.add_argument("--mode", choices=["legacy", "layered"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure(args.mode, args.settings)))
+        return
+    # Each mode runs in a fresh interpreter so neither benefits from the other's caches
+    print(f"Settings loaded together: {', '.join(args.settings)}")
+    print(f"{'mode':<8} {'ms':>8} {'retained KB':>12} {'peak KB':>9} {'creature lists':>15}")
+    for mode in ("legacy", "layered"):
+        out = subprocess.run([sys.executable, "-m", "bench.settings_load", "--mode", mode, "--settings",
+                              *args.settings], capture_output=True, text=True, check=True).stdout
+        row = json.loads(out.strip().splitlines()[-1])
+        print(f"{row['mode']:<8} {row['ms']:8.2f} {row['retained_kb']:12.1f} {row['peak_kb']:9.1f} "
+              f"{row['creature_lists']:>15}")
+
+
+if __name__ == "__main__":
+    main()
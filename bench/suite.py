@@ -0,0 +1,262 @@
+"""Seeded microbenchmarks for the hot paths, with JSON output and regression checks.
+
+    python -m bench run --out bench/results.json
+    python -m bench run --save-baseline                   # store bench/baseline.json for this host
+    python -m bench compare bench/baseline.json bench/results.json --threshold 10
+    python -m bench run --compare bench/baseline.json      # run, then compare in one step
+
+Each benchmark is timed as `repeat` rounds of an auto-sized inner loop; compare looks at the best round
+(or the median with --stat median_us). Baselines only make sense on the host that produced them.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from fnmatch import fnmatch
+
+from src import settings
+from src.encounter_generator import EncounterGenerator
+from src.tile_manager import TileManager
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SETTINGS = ("ravenloft", "generic")
+SEED = 1234
+SELECT_BATCH = 20  # selections per timed call; results are reported per selection
+
+
+def measure(fn, repeat=7, target=0.05, ops=1):
+    """Median/min time per operation of fn() (which performs `ops` operations per call).
+
+    The inner loop is sized so one round takes about `target` seconds.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= target or number >= 1 << 20:
+            break
+        number = max(number * 2, int(number * target / max(elapsed, 1e-9)))
+    samples = [elapsed / number / ops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number / ops)
+    return {"median_us": statistics.median(samples) * 1e6, "min_us": min(samples) * 1e6,
+            "number": number, "repeat": repeat}
+
+
+def _setting_benchmarks(setting):
+    tiles = TileManager(setting=setting)
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, seed=SEED)
+    names = tiles.get_available_tiles()
+    middle = names[len(names) // 2]
+    partial = middle.lower()[:4]
+    def load(cached):
+        if not cached:
+            settings.clear_cache()
+        EncounterGenerator(tile_manager=TileManager(setting=setting), setting=setting)
+    yield f"settings_load[{setting}]", lambda: load(False)
+    yield f"settings_load_cached[{setting}]", lambda: load(True)
+    yield f"get_tile[{setting}]", lambda: tiles.get_tile(middle)
+    yield f"resolve_tile_name[{setting}]", lambda: tiles.resolve_tile_name(partial)
+    yield f"xp_budget[{setting}]", lambda: generator._get_xp_budget(4, 5, False)
+    budget = generator._get_xp_budget(4, 5, False)
+    for name in names:
+        tile = tiles.get_tile(name)
+
+        def select(tile=tile):
+            # A fresh seeded RNG per call, so every call does exactly the same work
+            rng = random.Random(SEED)
+            for _ in range(SELECT_BATCH):
+                generator._select_monsters(generator.creatures, budget, tile.get("themes", ["dark"]),
+                                           generator.theme_map, False, tile["type"], rng=rng)
+        yield f"select_monsters[{setting}/{name}]", select, SELECT_BATCH
+    encounters = list(generator.stream(names, players=4, level=5, seed=SEED))
+    busy = [e for e in encounters if not e.empty] or encounters
+    yield f"render_text[{setting}]", lambda: [e.render_text() for e in busy]
+
+
+def _switch_benchmarks():
+    tiles = TileManager(setting=SETTINGS[0])
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting)
+    generator.switch_setting(SETTINGS[1])  # both settings are in the LRU from here on
+
+    def switch():
+        generator.switch_setting(SETTINGS[0])
+        generator.switch_setting(SETTINGS[1])
+    yield "switch_setting[warm]", switch, 2
+
+
+def _description_benchmarks():
+    from src.ai_description import AIDescription
+    text = " ".join(["Shadows pool beneath the broken altar while skeletal hands scrape the stone"] * 5)
+    yield "format_description", lambda: AIDescription._format_description(text, line_length=80)
+    yield "fallback_description", lambda: AIDescription._fallback_description(
+        "Crypt", ["undead"], ["Skeleton"] * 4 + ["Zombie"] * 2)
+
+
+def _ai_benchmarks():
+    try:
+        import ollama  # noqa: F401
+    except ImportError:
+        print("ollama package not installed; skipping ai_description benchmarks", file=sys.stderr)
+        return
+    from bench.fake_ollama import FakeOllama
+    from src.ai_description import AIDescription
+    server = FakeOllama(models=("gemma2:2b",)).start()
+    try:
+        with contextlib.redirect_stdout(sys.stderr):  # keep the "connected" banner out of JSON on stdout
+            ai = AIDescription(model="gemma2:2b", host=server.url)
+        names = ["Skeleton"] * 4 + ["Zombie"] * 2
+        yield "ai_description[fake-server]", lambda: ai.generate_description("Crypt", ["undead"], names, quiet=True)
+    finally:
+        # The generator is consumed before we get here, so shutting down after the last yield is safe
+        server.stop()
+
+
+def _cold_start(repeat, wanted):
+    """Wall time of `python -m src.main` answering 'quit', and of importing the modules only."""
+    results = {}
+    for name, command, stdin in (
+        ("cold_start[python -m src.main]", [sys.executable, "-m", "src.main"], b"quit\n"),
+        ("cold_start[import]", [sys.executable, "-c", "import src.main, src.encounter_generator"], b""),
+    ):
+        if not wanted(name):
+            continue
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(command, input=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           check=False)
+            samples.append(time.perf_counter() - start)
+        results[name] = {"median_us": statistics.median(samples) * 1e6, "min_us": min(samples) * 1e6,
+                         "number": 1, "repeat": repeat}
+    return results
+
+
+def run(only=None, repeat=7, cold_repeat=5, quiet=False):
+    def wanted(name):
+        return not only or any(fnmatch(name, pattern) for pattern in only)
+
+    groups = [_setting_benchmarks(s) for s in SETTINGS] + [_switch_benchmarks(), _description_benchmarks()]
+    if wanted("ai_description[fake-server]"):
+        groups.append(_ai_benchmarks())
+    results = {}
+    for group in groups:
+        for name, fn, *ops in group:
+            if not wanted(name):
+                continue
+            random.seed(SEED)
+            results[name] = measure(fn, repeat=repeat, ops=ops[0] if ops else 1)
+            if not quiet:
+                print(f"{name:<50} {results[name]['median_us']:12.2f} us", file=sys.stderr)
+    for name, result in _cold_start(cold_repeat, wanted).items():
+        results[name] = result
+        if not quiet:
+            print(f"{name:<50} {result['median_us']:12.2f} us", file=sys.stderr)
+    return {
+        "meta": {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                 "implementation": platform.python_implementation(), "host": platform.node(),
+                 "machine": platform.machine(), "cpus": os.cpu_count(), "seed": SEED},
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=10.0, thresholds=None, stat="min_us"):
+    """Rows of (name, old_us, new_us, change_pct, status); status is 'REGRESSION' past the threshold.
+
+    Compares the best round (min_us) by default: on a shared host it is far less noisy than the median.
+    """
+    thresholds = thresholds or {}
+    rows = []
+    for name, new in sorted(current["results"].items()):
+        old = baseline["results"].get(name)
+        if old is None:
+            rows.append((name, None, new[stat], None, "new"))
+            continue
+        change = (new[stat] - old[stat]) / old[stat] * 100 if old[stat] else 0.0
+        limit = next((t for pattern, t in thresholds.items() if fnmatch(name, pattern)), threshold)
+        status = "REGRESSION" if change > limit else ("faster" if change < -limit else "ok")
+        rows.append((name, old[stat], new[stat], change, status))
+    for name in sorted(set(baseline["results"]) - set(current["results"])):
+        rows.append((name, baseline["results"][name][stat], None, None, "missing"))
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print(f"{'benchmark':<50} {'baseline us':>12} {'current us':>12} {'change':>8}  status")
+    for name, old, new, change, status in rows:
+        old_s = f"{old:12.2f}" if old is not None else f"{'-':>12}"
+        new_s = f"{new:12.2f}" if new is not None else f"{'-':>12}"
+        change_s = f"{change:+7.1f}%" if change is not None else f"{'-':>8}"
+        print(f"{name:<50} {old_s} {new_s} {change_s}  {status}")
+    regressions = [r for r in rows if r[4] == "REGRESSION"]
+    print(f"{len(regressions)} regression(s) beyond {threshold:g}%")
+    return regressions
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _parse_thresholds(values):
+    # --threshold-for 'cold_start*=25' 'ai_description*=30'
+    thresholds = {}
+    for value in values or []:
+        pattern, _, limit = value.rpartition("=")
+        thresholds[pattern] = float(limit)
+    return thresholds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Encounter generator benchmark suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--out", help="Write results JSON here (default: stdout)")
+    run_parser.add_argument("--only", nargs="+", help="Glob patterns of benchmark names to run")
+    run_parser.add_argument("--repeat", type=int, default=7)
+    run_parser.add_argument("--cold-repeat", type=int, default=5)
+    run_parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help="Also store as baseline")
+    run_parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="Compare against a baseline")
+
+    compare_parser = sub.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+
+    for p in (run_parser, compare_parser):
+        p.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent")
+        p.add_argument("--threshold-for", nargs="+", metavar="GLOB=PCT", help="Per-benchmark thresholds")
+        p.add_argument("--stat", choices=["min_us", "median_us"], default="min_us", help="Statistic to compare")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        rows = compare(_load(args.baseline), _load(args.current), args.threshold,
+                       _parse_thresholds(args.threshold_for), args.stat)
+        sys.exit(1 if print_comparison(rows, args.threshold) else 0)
+
+    report = run(args.only, args.repeat, args.cold_repeat)
+    text = json.dumps(report, indent=1)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    elif not args.compare and not args.save_baseline:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(text)
+        print(f"Saved baseline to {args.save_baseline}", file=sys.stderr)
+    if args.compare:
+        rows = compare(_load(args.compare), report, args.threshold, _parse_thresholds(args.threshold_for),
+                       args.stat)
+        sys.exit(1 if print_comparison(rows, args.threshold) else 0)
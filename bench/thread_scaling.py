@@ -0,0 +1,69 @@
+"""Thread-pool scaling of EncounterGenerator.generate_many.
+
+Run from the repo root on each interpreter you want to compare, e.g.
+
+    python3.13 -m bench.thread_scaling
+    python3.13t -m bench.thread_scaling     # free-threaded build
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from src.encounter_generator import EncounterGenerator
+from src.tile_manager import TileManager
+
+
+def gil_enabled():
+    check = getattr(sys, "_is_gil_enabled", None)
+    return True if check is None else check()
+
+
+def run(setting, jobs, workers, players, level, seed):
+    tiles = TileManager(setting=setting)
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting)
+    tile_names = tiles.get_available_tiles()
+    work = [(tile_names[i % len(tile_names)], players, level) for i in range(jobs)]
+
+    # Same seed on every worker count: the output must not depend on scheduling
+    reference = generator.generate_many(work[:200], max_workers=1, seed=seed)
+    rows = []
+    baseline = None
+    for count in workers:
+        assert generator.generate_many(work[:200], max_workers=count, seed=seed) == reference
+        start = time.perf_counter()
+        generator.generate_many(work, max_workers=count, seed=seed)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        rows.append({"workers": count, "seconds": round(elapsed, 4),
+                     "encounters_per_sec": round(jobs / elapsed, 1), "speedup": round(baseline / elapsed, 2)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generate_many across thread counts")
+    parser.add_argument("--setting", default="ravenloft")
+    parser.add_argument("--jobs", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--numplayers", type=int, default=4)
+    parser.add_argument("--level", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    rows = run(args.setting, args.jobs, args.workers, args.numplayers, args.level, args.seed)
+    info = {"python": platform.python_version(), "gil_enabled": gil_enabled(), "cpus": os.cpu_count()}
+    if args.json:
+        print(json.dumps({"build": info, "results": rows}, indent=2))
+        return
+    build = "standard" if info["gil_enabled"] else "free-threaded"
+    print(f"Python {info['python']} ({build} build), {info['cpus']} CPUs, {args.jobs} encounters")
+    print(f"{'workers':>7}  {'seconds':>8}  {'enc/s':>10}  {'speedup':>7}")
+    for row in rows:
+        print(f"{row['workers']:>7}  {row['seconds']:>8.3f}  {row['encounters_per_sec']:>10.1f}  {row['speedup']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
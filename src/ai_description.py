@@ -1,47 +1,51 @@
-import socket
-import httpx
-from ollama import Client
-from collections import Counter
+import threading
+from collections import Counter, OrderedDict
+from src.description_backends import DEFAULT_MODEL, make_backend
+from src.prompt_compiler import PromptCompiler
+from src.singleflight import SingleFlight
+
+# Shared across AIDescription instances so concurrent tables/batch jobs coalesce identical requests
+_inflight = SingleFlight()
+# Finished descriptions by the same key. Only rerolls read them (cached_description), so a reroll that
+# lands on a creature mix described before skips the LLM call; normal play always gets a new description.
+DESCRIPTION_CACHE_SIZE = 256
+_descriptions = OrderedDict()
+_descriptions_lock = threading.Lock()
+# Compiled prompts by tile, themes and creature multiset (see src/prompt_compiler.py)
+_compiler = PromptCompiler()
+# Generation options every request starts from; an instance's options override them
+GENERATION_DEFAULTS = {'num_predict': 70}
+
+
+class DescriptionCancelled(Exception):
+    """Raised by generate_description() when its cancel() callback asked it to stop."""
+
 
 class AIDescription:
-    def __init__(self, model="gemma2"):
-        self.client = None
+    def __init__(self, model=DEFAULT_MODEL, host=None, options=None, backend="ollama", cassette=None, quiet=False):
+        self.client = None  # the connected backend, or None to use fallback descriptions
+        self.status = None  # the connection message, printed unless quiet
         self.model = model
-        self._connect()
+        # A Cassette records the backend's responses, or replays them in its place (src/cassette.py)
+        self.backend = make_backend(backend, model, host, cassette=cassette)
+        self.host = self.backend.host
+        # Extra Ollama generation options (num_ctx, num_thread, ...), e.g. from an autotune profile
+        self.options = dict(options or {})
+        self._connect(quiet)
 
-    def _connect(self):
+    def _connect(self, quiet=False):
         try:
-            # Check if server is reachable
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(2)
-            result = sock.connect_ex(('localhost', 11434))
-            sock.close()
-            if result != 0:
-                raise ConnectionError("Ollama server not running on localhost:11434")
-
-            # Initialize client with increased timeout
-            self.client = Client(host='http://localhost:11434', timeout=httpx.Timeout(60.0))
-
-            # Verify model exists
-            response = self.client.list()
-            available_models = []
-            for model in response.get('models', []):
-                name = getattr(model, 'model', '')
-                if name and name not in available_models:
-                    available_models.append(name)  # Use full model name, e.g., gemma3:1b
-            if not available_models:
-                raise ValueError("No models found in Ollama")
-            if self.model not in available_models:
-                raise ValueError(f"Model '{self.model}' not found. Available models: {', '.join(available_models)}")
-
-            # Test connection
-            self.client.generate(model=self.model, prompt='Ping', stream=False, options={'num_predict': 1})
-            print(f"Ollama connected (using {self.model} model).")
+            self.backend.connect()
+            self.client = self.backend
+            self.status = f"{self.backend.label} connected (using {self.model} model)."
         except Exception as e:
-            print(f"Failed to connect to Ollama: {str(e)}")
+            self.status = f"Failed to connect to {self.backend.label}: {str(e)}"
             self.client = None
+        if not quiet:
+            print(self.status)
 
-    def _format_description(self, text, line_length=80):
+    @staticmethod
+    def _format_description(text, line_length=80):
         """Insert newlines at the first space after line_length characters."""
         if not text:
             return text
@@ -57,7 +61,8 @@ class AIDescription:
             lines.append(current_line.strip())
         return "\n".join(lines)
 
-    def _fallback_description(self, tile_name, themes, creature_names):
+    @staticmethod
+    def _fallback_description(tile_name, themes, creature_names):
         """Generate a fallback description if AI fails."""
         # Count unique creatures for natural phrasing
         creature_counts = Counter(creature_names)
@@ -77,30 +82,111 @@ class AIDescription:
         )
         # Ensure description is within 50 words
         description = " ".join(description.split()[:50])
-        return self._format_description(description, line_length=80)
+        return AIDescription._format_description(description, line_length=80)
+
+    def _description_key(self, tile_name, themes, creature_names, extra_instructions, notes=None):
+        creatures = tuple(sorted(Counter(creature_names).items()))
+        # The notes as they reach the prompt (trimmed, within the token budget), so different notes don't share
+        notes_text = _compiler.compile(tile_name, themes, creature_names, notes).notes_text if notes else ""
+        return (tile_name, tuple(themes), creatures, self.backend.name, self.host, self.model,
+                tuple(sorted(self.options.items())), extra_instructions, notes_text)
+
+    def cached_description(self, tile_name, themes, creature_names, extra_instructions=None, notes=None):
+        """The description already generated for this tile and creature mix, or None (for rerolls)."""
+        if not self.client:
+            return None
+        key = self._description_key(tile_name, themes, creature_names, extra_instructions, notes)
+        with _descriptions_lock:
+            text = _descriptions.get(key)
+            if text is not None:
+                _descriptions.move_to_end(key)
+            return text
+
+    def _remember(self, key, text):
+        with _descriptions_lock:
+            _descriptions[key] = text
+            _descriptions.move_to_end(key)
+            while len(_descriptions) > DESCRIPTION_CACHE_SIZE:
+                _descriptions.popitem(last=False)
+
+    def generate_description(self, tile_name, themes, creature_names, extra_instructions=None, quiet=False,
+                             fresh=False, notes=None, cancel=None):
+        """A new description for the encounter, remembered for cached_description().
 
-    def generate_description(self, tile_name, themes, creature_names, extra_instructions=None):
+        Identical requests already in flight are shared; fresh=True (a description reroll) always makes its
+        own call. notes ({name: (type, notes)}, see settings.creature_notes) adds short creature notes to the
+        prompt. With cancel (a callable), the completion is streamed and cancel() is checked after every
+        chunk; once it returns True the request is dropped and DescriptionCancelled raised. Such calls are
+        never shared, so a caller that joined one can't be handed a cancellation.
+        """
         if not self.client:
             return self._fallback_description(tile_name, themes, creature_names)
+        if fresh or cancel is not None:
+            return self._generate_description(tile_name, themes, creature_names, extra_instructions, quiet,
+                                              notes, cancel)
+        key = self._description_key(tile_name, themes, creature_names, extra_instructions, notes)
+        return _inflight.do(key, self._generate_description, tile_name, themes, creature_names,
+                            extra_instructions, quiet, notes)
 
-        prompt = (
-            f"Describe a D&D 5e encounter in the {tile_name} with {', '.join(themes)} themes. "
-            f"Include these monsters: {', '.join(creature_names)}. "
-            f"Write one vivid paragraph of no more than 50 words describing the room and creatures as they appear. "
-            f"Focus on atmosphere, senses, and monster behavior. Use present tense for an active, immersive narrative. "
-            f"Do not list CR, XP, or select monsters. No external locations or narrative beyond the room. "
-            f"Use 2014 D&D tone."
-        )
+    async def agenerate_description(self, tile_name, themes, creature_names, extra_instructions=None, quiet=True,
+                                    notes=None):
+        """asyncio version of generate_description; coalesces with threaded callers too."""
+        if not self.client:
+            return self._fallback_description(tile_name, themes, creature_names)
+        key = self._description_key(tile_name, themes, creature_names, extra_instructions, notes)
+        return await _inflight.ado(key, self._generate_description, tile_name, themes, creature_names,
+                                   extra_instructions, quiet, notes)
+
+    @staticmethod
+    def coalescing_stats():
+        """How many description calls ran vs. were served by an identical in-flight call."""
+        return _inflight.stats()
+
+    @staticmethod
+    def build_prompt(tile_name, themes, creature_names, notes=None):
+        return _compiler.compile(tile_name, themes, creature_names, notes).text
 
+    @staticmethod
+    def prompt_stats():
+        """Compiled-prompt cache entries, hits and misses."""
+        return _compiler.stats()
+
+    def generation_options(self):
+        return {**GENERATION_DEFAULTS, **self.options}
+
+    def _generate_description(self, tile_name, themes, creature_names, extra_instructions=None, quiet=False,
+                              notes=None, cancel=None):
+        prompt = self.build_prompt(tile_name, themes, creature_names, notes)
         try:
-            print("Generating AI description...", flush=True)
-            response = self.client.generate(model=self.model, prompt=prompt, stream=False, options={'num_predict': 70})
-            description = response['response'].strip()
+            if not quiet:
+                print("Generating AI description...", flush=True)
+            if cancel is None:
+                description = self.client.generate(prompt, self.generation_options()).strip()
+            else:
+                description = self._stream_until(prompt, cancel).strip()
             description = " ".join(description.split()[:50])  # Truncate to 50 words
             # Format description with line breaks
             formatted_description = self._format_description(description, line_length=80)
-            print()  # Newline
+            self._remember(self._description_key(tile_name, themes, creature_names, extra_instructions, notes),
+                           formatted_description)
+            if not quiet:
+                print()  # Newline
             return formatted_description
+        except DescriptionCancelled:
+            raise
         except Exception as e:
-            print(f"AI description failed: {str(e)}. Using fallback description.")
+            if not quiet:
+                print(f"AI description failed: {str(e)}. Using fallback description.")
             return self._fallback_description(tile_name, themes, creature_names)
+
+    def _stream_until(self, prompt, cancel):
+        pieces = []
+        stream = self.client.stream(prompt, self.generation_options())
+        try:
+            for piece in stream:
+                if cancel():
+                    raise DescriptionCancelled()
+                pieces.append(piece)
+        finally:
+            stream.close()  # stops an abandoned generation instead of reading it to the end
+        return "".join(pieces)
@@ -0,0 +1,199 @@
+"""Pick the installed model and Ollama options that describe encounters fastest on this host.
+
+Runs the real description prompt against every installed model and a grid of num_ctx / num_thread /
+num_batch values, measuring time to first token, generation speed and total latency. The winner is saved
+as this host's profile, which `python -m src.main --local-ai` picks up when --model isn't given.
+
+    python -m src.autotune                           # fastest model and options
+    python -m src.autotune --target-ms 2500          # largest model whose median latency fits 2.5 s
+    python -m src.autotune --models gemma2:2b phi3:mini --runs 5
+    python -m src.autotune --show
+
+Without a target the fastest configuration wins. With one, the largest model (by size on disk) that has a
+configuration within the target wins, using that model's fastest configuration.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import time
+
+PROFILE_VERSION = 1
+DEFAULT_HOST = "http://localhost:11434"
+# A representative encounter; the prompt itself comes from AIDescription.build_prompt
+SAMPLE = ("Crypt", ["undead", "dark"], ["Skeleton", "Skeleton", "Skeleton", "Zombie", "Ghoul"])
+
+
+def profile_path():
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "ravenloft-encounters", "autotune.json")
+
+
+def _profile_key(host):
+    # Profiles depend on both the machine running the model and the server we talk to
+    return f"{platform.node()}|{host.rstrip('/')}"
+
+
+def _read_profiles(path):
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get("profiles", {}) if data.get("version") == PROFILE_VERSION else {}
+
+
+def load_profile(host=DEFAULT_HOST, path=None):
+    """The saved profile for this machine and Ollama host, or None."""
+    return _read_profiles(path or profile_path()).get(_profile_key(host))
+
+
+def save_profile(profile, host=DEFAULT_HOST, path=None):
+    path = path or profile_path()
+    profiles = _read_profiles(path)
+    profiles[_profile_key(host)] = profile
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"version": PROFILE_VERSION, "profiles": profiles}, f, indent=1)
+    os.replace(tmp, path)
+    return path
+
+
+def option_grid(num_ctx=(512, 2048), num_thread=None, num_batch=(None, 128, 512)):
+    """Every combination of the given values; None means "leave it to Ollama"."""
+    if num_thread is None:
+        cpus = os.cpu_count() or 1
+        num_thread = sorted({None, cpus, max(1, cpus // 2)}, key=lambda n: -1 if n is None else n)
+    grid = []
+    for ctx, threads, batch in itertools.product(num_ctx, num_thread, num_batch):
+        options = {"num_ctx": ctx, "num_thread": threads, "num_batch": batch}
+        options = {k: v for k, v in options.items() if v is not None}
+        if options not in grid:
+            grid.append(options)
+    return grid
+
+
+def installed_models(client):
+    models = []
+    for model in client.list().get("models", []):
+        name = getattr(model, "model", "")
+        if name and "embed" not in name:  # embedding models can't generate
+            models.append((name, getattr(model, "size", 0) or 0))
+    return models
+
+
+def measure(client, model, prompt, options, runs=3):
+    """Median time to first token, tokens/s and total latency over `runs` streamed generations."""
+    ttft, rates, totals = [], [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        first = None
+        tokens = 0
+        final = {}
+        for chunk in client.generate(model=model, prompt=prompt, stream=True, options=options):
+            if first is None and chunk.get("response"):
+                first = time.perf_counter()
+            if chunk.get("response"):
+                tokens += 1
+            if chunk.get("done"):
+                final = chunk
+        end = time.perf_counter()
+        first = first or end
+        ttft.append((first - start) * 1000)
+        totals.append((end - start) * 1000)
+        eval_count, eval_ns = final.get("eval_count"), final.get("eval_duration")
+        if eval_count and eval_ns:
+            rates.append(eval_count / (eval_ns / 1e9))  # the server's own figure excludes network time
+        else:
+            rates.append(tokens / max(end - first, 1e-9))
+    return {"ttft_ms": round(statistics.median(ttft), 1), "tokens_per_s": round(statistics.median(rates), 1),
+            "latency_ms": round(statistics.median(totals), 1)}
+
+
+def choose(results, target_ms=None):
+    """The winning result: fastest overall, or the largest model with a configuration within target_ms."""
+    ok = [r for r in results if "error" not in r]
+    if not ok:
+        return None
+    if target_ms is not None:
+        within = [r for r in ok if r["latency_ms"] <= target_ms]
+        if within:
+            return min(within, key=lambda r: (-r["size"], r["latency_ms"]))
+    return min(ok, key=lambda r: r["latency_ms"])
+
+
+def autotune(host=DEFAULT_HOST, models=None, grid=None, runs=3, target_ms=None, log=print):
+    """Benchmark every (model, options) pair; returns (results, best)."""
+    import httpx
+    from ollama import Client
+    from src.ai_description import GENERATION_DEFAULTS, AIDescription
+
+    client = Client(host=host, timeout=httpx.Timeout(300.0))
+    available = installed_models(client)
+    sizes = dict(available)
+    names = models or [name for name, _ in available]
+    grid = grid or option_grid()
+    prompt = AIDescription.build_prompt(*SAMPLE)
+    base_options = dict(GENERATION_DEFAULTS)
+
+    results = []
+    for model in names:
+        if model not in sizes:
+            log(f"{model}: not installed, skipping")
+            continue
+        for options in grid:
+            merged = {**base_options, **options}
+            try:
+                # Warm-up: loads the model (and reloads it when num_ctx changes); not counted
+                client.generate(model=model, prompt="Ping", stream=False, options={**merged, "num_predict": 1})
+                result = measure(client, model, prompt, merged, runs)
+            except Exception as e:
+                result = {"error": str(e)}
+            result.update(model=model, size=sizes[model], options=options)
+            results.append(result)
+            if "error" in result:
+                log(f"{model:<24} {json.dumps(options):<50} failed: {result['error']}")
+            else:
+                log(f"{model:<24} {json.dumps(options):<50} ttft {result['ttft_ms']:8.1f} ms  "
+                    f"{result['tokens_per_s']:6.1f} tok/s  total {result['latency_ms']:8.1f} ms")
+    return results, choose(results, target_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the fastest model and Ollama options for this host")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--models", nargs="+", help="Models to try (default: every installed model)")
+    parser.add_argument("--num-ctx", type=int, nargs="+", default=[512, 2048])
+    parser.add_argument("--num-thread", type=int, nargs="+", help="Default: Ollama's choice, all cores, half")
+    parser.add_argument("--num-batch", type=int, nargs="+", help="Default: Ollama's choice, 128, 512")
+    parser.add_argument("--runs", type=int, default=3, help="Timed generations per configuration")
+    parser.add_argument("--target-ms", type=float, help="Latency target; picks the largest model that meets it")
+    parser.add_argument("--dry-run", action="store_true", help="Don't save the profile")
+    parser.add_argument("--show", action="store_true", help="Print the saved profile for this host and exit")
+    args = parser.parse_args()
+
+    if args.show:
+        profile = load_profile(args.host)
+        print(json.dumps(profile, indent=1) if profile else f"No profile for this host in {profile_path()}")
+        return
+    grid = option_grid(args.num_ctx, args.num_thread, args.num_batch or (None, 128, 512))
+    results, best = autotune(args.host, args.models, grid, args.runs, args.target_ms)
+    if best is None:
+        print("No configuration worked; nothing saved.")
+        return
+    if args.target_ms is not None and best["latency_ms"] > args.target_ms:
+        print(f"Nothing met {args.target_ms:g} ms; using the fastest configuration instead.")
+    print(f"Best: {best['model']} {json.dumps(best['options'])} "
+          f"(ttft {best['ttft_ms']} ms, {best['tokens_per_s']} tok/s, total {best['latency_ms']} ms)")
+    if not args.dry_run:
+        profile = {"model": best["model"], "options": best["options"], "target_ms": args.target_ms,
+                   "measured": {k: best[k] for k in ("ttft_ms", "tokens_per_s", "latency_ms")},
+                   "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        print(f"Saved profile to {save_profile(profile, args.host)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Spread descriptions over several servers of one backend kind, e.g. Ollama instances on different ports.
+
+    backend = make_backend("ollama-http", "gemma2:2b", "http://localhost:11434,http://localhost:11435")
+
+Each request goes to the healthy host with the fewest requests in flight. A host that doesn't have the
+model in memory counts as COLD_COST requests busier, so requests stick to warm hosts unless those are
+queueing (loaded models come from /api/ps and are refreshed every PS_INTERVAL seconds). A request that
+fails because of its host (connection errors, timeouts, HTTP 5xx) marks the host down and is retried on
+the next best one; a down host gets another try after a backoff that doubles with each failure, up to
+MAX_BACKOFF seconds.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.description_backends import BackendError, DescriptionBackend, make_backend
+
+COLD_COST = 2  # a cold host is preferred only when every warm host has this many more requests in flight
+PS_INTERVAL = 10.0
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+
+
+def _host_failure(error):
+    # HTTP 4xx means the request itself was bad and would fail on every host; anything else is the host's fault
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    return not isinstance(status, int) or status >= 500
+
+
+class _Host:
+    __slots__ = ("backend", "connected", "healthy", "outstanding", "requests", "failures", "streak",
+                 "retry_at", "loaded", "ps_at", "ewma_ms")
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.connected = False
+        self.healthy = False
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.streak = 0  # consecutive failures, for the backoff
+        self.retry_at = 0.0
+        self.loaded = None  # models in memory, or None if unknown
+        self.ps_at = 0.0
+        self.ewma_ms = None
+
+
+class BackendPool(DescriptionBackend):
+    name = "pool"
+
+    def __init__(self, kind, model, hosts, timeout=60.0, **kwargs):
+        if not hosts:
+            raise ValueError("BackendPool needs at least one host")
+        super().__init__(model, ",".join(hosts), timeout)
+        self.kind = kind
+        self.hosts = [_Host(make_backend(kind, model, host, timeout=timeout, **kwargs)) for host in hosts]
+        self.label = f"{self.hosts[0].backend.label} pool ({len(hosts)} hosts)"
+        self._lock = threading.Lock()
+
+    # -- connection and health --------------------------------------------------------------------
+
+    def connect(self):
+        """Connect every host at once; fine as long as one of them works."""
+        with ThreadPoolExecutor(max_workers=len(self.hosts)) as executor:
+            errors = list(executor.map(self._connect_host, self.hosts))
+        if not any(host.healthy for host in self.hosts):
+            raise ConnectionError("; ".join(f"{host.backend.host}: {error}"
+                                            for host, error in zip(self.hosts, errors)))
+        for host, error in zip(self.hosts, errors):
+            if error is not None:
+                print(f"{host.backend.host} unavailable, retrying later: {error}")
+
+    def _connect_host(self, host):
+        try:
+            host.backend.connect()
+        except Exception as e:
+            self._failed(host)
+            return e
+        host.connected = True
+        self._succeeded(host, None)
+        self._refresh_loaded(host, force=True)
+        return None
+
+    def health(self):
+        return any(host.backend.health() for host in self.hosts if host.connected)
+
+    def models(self):
+        names = []
+        for host in self.hosts:
+            if host.connected:
+                for name in host.backend.models():
+                    if name not in names:
+                        names.append(name)
+        return names
+
+    def loaded_models(self):
+        loaded = set()
+        for host in self.hosts:
+            loaded.update(host.loaded or ())
+        return sorted(loaded)
+
+    def _refresh_loaded(self, host, force=False):
+        now = time.monotonic()
+        if not force and now - host.ps_at < PS_INTERVAL:
+            return
+        host.ps_at = now
+        try:
+            loaded = host.backend.loaded_models()
+        except Exception:
+            return
+        host.loaded = None if loaded is None else set(loaded)
+
+    def _failed(self, host):
+        with self._lock:
+            host.healthy = False
+            host.failures += 1
+            host.streak += 1
+            host.retry_at = time.monotonic() + min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (host.streak - 1))
+
+    def _succeeded(self, host, elapsed_ms):
+        with self._lock:
+            host.healthy = True
+            host.streak = 0
+            if host.loaded is not None:
+                host.loaded.add(self.model)  # it has the model in memory now
+            if elapsed_ms is not None:
+                host.ewma_ms = elapsed_ms if host.ewma_ms is None else 0.8 * host.ewma_ms + 0.2 * elapsed_ms
+
+    # -- routing ----------------------------------------------------------------------------------
+
+    def _cost(self, host):
+        cold = host.loaded is not None and self.model not in host.loaded
+        return (host.outstanding + (COLD_COST if cold else 0), host.ewma_ms or 0.0)
+
+    def _acquire(self, exclude):
+        """The host to use next, with its request counted as in flight; None if every host was tried."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [h for h in self.hosts if h not in exclude and (h.healthy or now >= h.retry_at)]
+            if not candidates:
+                return None
+            # A down host past its backoff gets one probe request; if that fails it fails over like any other
+            probes = [h for h in candidates if not h.healthy and h.outstanding == 0]
+            host = probes[0] if probes else min((h for h in candidates if h.healthy), key=self._cost, default=None)
+            if host is None:
+                return None
+            host.outstanding += 1
+            host.requests += 1
+            return host
+
+    def _release(self, host):
+        with self._lock:
+            host.outstanding -= 1
+
+    def _call(self, method, prompt, options):
+        tried = []
+        last_error = None
+        while True:
+            host = self._acquire(tried)
+            if host is None:
+                raise BackendError(f"No host could serve the request; last error: {last_error}")
+            tried.append(host)
+            start = time.perf_counter()
+            try:
+                if not host.connected:
+                    host.backend.connect()
+                    host.connected = True
+                result = getattr(host.backend, method)(prompt, options)
+            except Exception as e:
+                if not _host_failure(e):
+                    raise
+                last_error = e
+                self._failed(host)
+                continue
+            finally:
+                self._release(host)
+            self._succeeded(host, (time.perf_counter() - start) * 1000)
+            self._refresh_loaded(host)
+            return result
+
+    def generate(self, prompt, options=None):
+        return self._call("generate", prompt, options)
+
+    def stream(self, prompt, options=None):
+        # Fails over only until the first chunk; after that the text has been shown and can't be redone
+        tried = []
+        while True:
+            host = self._acquire(tried)
+            if host is None:
+                raise BackendError("No host could serve the request")
+            tried.append(host)
+            started = False
+            start = time.perf_counter()
+            try:
+                if not host.connected:
+                    host.backend.connect()
+                    host.connected = True
+                for chunk in host.backend.stream(prompt, options):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                if not _host_failure(e):
+                    raise
+                self._failed(host)
+                if started:
+                    raise
+                continue
+            finally:
+                self._release(host)
+            self._succeeded(host, (time.perf_counter() - start) * 1000)
+            return
+
+    def batch(self, prompts, options=None, max_workers=None):
+        # Enough requests in flight to keep every host busy
+        return super().batch(prompts, options, max_workers or 4 * len(self.hosts))
+
+    def stats(self):
+        with self._lock:
+            return [{"host": h.backend.host, "healthy": h.healthy, "outstanding": h.outstanding,
+                     "requests": h.requests, "failures": h.failures,
+                     "loaded": sorted(h.loaded) if h.loaded is not None else None,
+                     "ewma_ms": round(h.ewma_ms, 1) if h.ewma_ms is not None else None} for h in self.hosts]
+
+    def close(self):
+        for host in self.hosts:
+            host.backend.close()
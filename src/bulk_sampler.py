@@ -0,0 +1,324 @@
+"""Vectorized bulk encounter sampler for Monte Carlo studies (requires NumPy).
+
+Runs the same steps as EncounterGenerator._select_monsters (event-chance roll, target_unique draw,
+big/small first picks, the fill loop, the final check and the half-budget fallback) for a whole
+batch of encounters at once, keeping the catalog as NumPy arrays.
+
+    python -m src.bulk_sampler --setting generic --tile "Dungeon Depths" --level 8 -n 1000000
+    python -m src.bulk_sampler --tile Crypt --check      # compare against the scalar generator
+"""
+import argparse
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.encounter_generator import EncounterGenerator
+from src.tile_manager import TileManager
+
+TARGET_UNIQUE = np.array([1, 2, 3, 4, 5])
+TARGET_WEIGHTS = np.array([0.50, 0.41, 0.05, 0.03, 0.01])
+MAX_MONSTERS = 15
+MAX_ATTEMPTS = 50
+
+
+@dataclass(slots=True)
+class BulkBatch:
+    """Results for n encounters in ragged form: encounter i owns ids/counts[offsets[i]:offsets[i + 1]]."""
+    empty: np.ndarray  # (n,) bool, event-chance roll came up empty
+    total_xp: np.ndarray  # (n,) int64
+    target_unique: np.ndarray  # (n,) int8
+    offsets: np.ndarray  # (n + 1,) int64
+    ids: np.ndarray  # creature ids, ascending within an encounter
+    counts: np.ndarray  # how many of each id
+    final_check: np.ndarray  # (n,) bool, the "final check" loop had to add creatures
+    half_fallback: np.ndarray  # (n,) bool, the half-budget fallback fired
+
+    def __len__(self):
+        return len(self.total_xp)
+
+    def encounter(self, i):
+        """(creature_id, count) pairs for one encounter."""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return list(zip(self.ids[start:end].tolist(), self.counts[start:end].tolist()))
+
+    def creature_frequency(self, catalog_size):
+        """Total creature instances per id across the batch."""
+        return np.bincount(self.ids, weights=self.counts, minlength=catalog_size).astype(np.int64)
+
+    @classmethod
+    def concatenate(cls, batches):
+        offsets = [np.zeros(1, np.int64)]
+        base = 0
+        for batch in batches:
+            offsets.append(batch.offsets[1:] + base)
+            base += batch.offsets[-1]
+        return cls(
+            np.concatenate([b.empty for b in batches]),
+            np.concatenate([b.total_xp for b in batches]),
+            np.concatenate([b.target_unique for b in batches]),
+            np.concatenate(offsets),
+            np.concatenate([b.ids for b in batches]),
+            np.concatenate([b.counts for b in batches]),
+            np.concatenate([b.final_check for b in batches]),
+            np.concatenate([b.half_fallback for b in batches]),
+        )
+
+
+class BulkSampler:
+    def __init__(self, generator):
+        self.generator = generator
+        self.xp = np.array([int(c["xp"]) for c in generator.creatures], dtype=np.int64)
+        # Per-pick weight vectors, same formulas as the scalar selector
+        self.w_high = np.maximum(1, self.xp).astype(np.float64)  # favor high XP
+        self.w_small = np.maximum(1, 1000 - self.xp).astype(np.float64)  # small group
+        self.w_medium = np.maximum(1, 500 - self.xp / 2).astype(np.float64)  # fill loop
+        self._tiles = {}
+
+    def _tile_masks(self, tile_name):
+        masks = self._tiles.get(tile_name)
+        if masks is None:
+            gen = self.generator
+            tile = gen.tiles.get_tile(tile_name)
+            pools = gen._thematic_pools(gen.creatures, tile.get("themes", ["dark"]), gen.theme_map)
+
+            def mask(creatures):
+                m = np.zeros(len(self.xp), dtype=bool)
+                m[[gen.creature_ids[c["name"]] for c in creatures]] = True
+                return m
+
+            masks = self._tiles[tile_name] = {
+                "tile": tile, "thematic": mask(pools["thematic"]),
+                "big": mask(pools["big"]), "small": mask(pools["small"]),
+            }
+        return masks
+
+    def sample(self, tile_name, players, level, skull=False, n=100000, seed=None, chunk=32768):
+        """Sample n encounters; work is done in chunks so memory stays bounded by chunk * catalog size."""
+        rng = np.random.default_rng(seed)
+        masks = self._tile_masks(tile_name)
+        budget = self.generator._get_xp_budget(players, level, skull)
+        batches = []
+        while n > 0:
+            size = min(chunk, n)
+            batches.append(self._sample_chunk(masks, budget, size, rng))
+            n -= size
+        return BulkBatch.concatenate(batches)
+
+    def _pick(self, rng, mask, weights):
+        # Weighted draw per row over the masked catalog, the same bisect-on-cumulative-weights as random.choices.
+        # Only columns some row can pick are kept, which is usually a small thematic slice of the catalog.
+        if not len(mask):
+            return np.zeros(0, dtype=np.int64)
+        cols = np.flatnonzero(mask.any(axis=0))
+        cum = np.cumsum(np.where(mask[:, cols], weights[cols], 0.0), axis=1)
+        r = rng.random(len(mask)) * cum[:, -1]
+        return cols[np.minimum((cum <= r[:, None]).sum(axis=1), len(cols) - 1)]
+
+    def _sample_chunk(self, masks, budget, n, rng):
+        xp = self.xp
+        size_n = len(xp)
+        min_xp_target = int(budget * 0.8)
+        max_xp_target = int(budget * 1.1)
+        tile = masks["tile"]
+        thematic, big, small = masks["thematic"], masks["big"], masks["small"]
+
+        counts = np.zeros((n, size_n), dtype=np.int16)
+        current_xp = np.zeros(n, dtype=np.int64)
+        monsters = np.zeros(n, dtype=np.int64)
+        types = np.zeros(n, dtype=np.int64)
+        final_check = np.zeros(n, dtype=bool)
+        half_fallback = np.zeros(n, dtype=bool)
+
+        if tile["type"] == "generic":
+            empty = rng.random(n) > tile.get("event_chance", 0.5)
+        else:
+            empty = np.zeros(n, dtype=bool)
+        live = ~empty
+        target = rng.choice(TARGET_UNIQUE, size=n, p=TARGET_WEIGHTS / TARGET_WEIGHTS.sum()).astype(np.int8)
+
+        def add(rows, ids):
+            counts[rows, ids] += 1
+            types[rows] += counts[rows, ids] == 1
+            current_xp[rows] += xp[ids]
+            monsters[rows] += 1
+
+        def allowed(rows):
+            # Already-selected types, or any type while there is room for another unique creature
+            return (counts[rows] > 0) | (types[rows] < target[rows])[:, None]
+
+        def fits(rows):
+            return xp[None, :] <= (max_xp_target - current_xp[rows])[:, None]
+
+        # Single or pair of big creatures
+        if big.any():
+            pair = live & (target <= 2)
+            for step in range(2):
+                rows = np.flatnonzero(pair & (target > step) & (current_xp < min_xp_target) & (monsters < MAX_MONSTERS))
+                if not len(rows):
+                    break
+                ok = allowed(rows) & fits(rows)
+                valid = ok & big
+                missing = ~valid.any(axis=1)
+                valid[missing] = ok[missing] & (xp >= 200)
+                has = valid.any(axis=1)
+                rows, valid = rows[has], valid[has]
+                add(rows, self._pick(rng, valid, self.w_high))
+
+        # Group of 3-5 creature types: a small group first, then fill towards the budget
+        group = live & (target >= 3)
+        if small.any():
+            group_size = np.where(group, np.minimum(rng.integers(3, 7, size=n), MAX_MONSTERS), 0)
+            for step in range(6):
+                rows = np.flatnonzero(group_size > step)
+                if not len(rows):
+                    break
+                valid = allowed(rows) & small
+                has = valid.any(axis=1)
+                rows, valid = rows[has], valid[has]
+                add(rows, self._pick(rng, valid, self.w_small))
+        stuck = np.zeros(n, dtype=bool)
+        for _ in range(MAX_ATTEMPTS):
+            rows = np.flatnonzero(group & ~stuck & (current_xp < min_xp_target) & (monsters < MAX_MONSTERS))
+            if not len(rows):
+                break
+            ok = allowed(rows) & fits(rows)
+            valid = ok & thematic
+            missing = ~valid.any(axis=1)
+            valid[missing] = ok[missing]
+            has = valid.any(axis=1)
+            stuck[rows[~has]] = True
+            rows, valid = rows[has], valid[has]
+            add(rows, self._pick(rng, valid, self.w_medium))
+
+        # Final check to ensure XP budget is met
+        stuck[:] = False
+        while True:
+            rows = np.flatnonzero(live & ~stuck & (current_xp < min_xp_target))
+            if not len(rows):
+                break
+            room = fits(rows)
+            valid = room & allowed(rows) & thematic
+            missing = ~valid.any(axis=1)
+            valid[missing] = room[missing]
+            has = valid.any(axis=1)
+            stuck[rows[~has]] = True
+            rows, valid = rows[has], valid[has]
+            final_check[rows] = True
+            add(rows, self._pick(rng, valid, self.w_high))
+
+        # Ensure at least half the budget
+        fallback_ids = np.flatnonzero((xp <= budget) & (xp >= 200))
+        rows = np.flatnonzero(live & ((monsters == 0) | (current_xp < min_xp_target / 2)))
+        if len(rows) and len(fallback_ids):
+            half_fallback[rows] = True
+            add(rows, fallback_ids[rng.integers(0, len(fallback_ids), size=len(rows))])
+
+        row_ids, ids = np.nonzero(counts)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row_ids, minlength=n), out=offsets[1:])
+        return BulkBatch(empty, current_xp, target, offsets, ids.astype(np.int32),
+                         counts[row_ids, ids].astype(np.int16), final_check, half_fallback)
+
+
+def scalar_sample(generator, tile_name, players, level, skull=False, n=20000, seed=None):
+    """The reference: n encounters from the scalar generator, reduced to the same summary arrays."""
+    rng = random.Random(seed)
+    tile = generator.tiles.get_tile(tile_name)
+    pools = generator._thematic_pools(generator.creatures, tile.get("themes", ["dark"]), generator.theme_map)
+    empty, total_xp, frequency = [], [], Counter()
+    for _ in range(n):
+        encounter = generator._build(tile, players, level, skull, rng, None, pools=pools)
+        empty.append(encounter.empty)
+        total_xp.append(encounter.total_xp)
+        for creature_id, count in encounter.counts:
+            frequency[creature_id] += count
+    size = len(generator.creatures)
+    freq = np.zeros(size, dtype=np.int64)
+    for creature_id, count in frequency.items():
+        freq[creature_id] = count
+    return np.array(empty), np.array(total_xp), freq
+
+
+def _summary(empty, total_xp, frequency):
+    live = total_xp[~empty]
+    return {
+        "empty_rate": float(empty.mean()),
+        "mean_xp": float(live.mean()) if len(live) else 0.0,
+        "creature_share": frequency / max(1, frequency.sum()),
+    }
+
+
+def compare(sampler, tile_name, players, level, skull=False, n=20000, seed=0, tolerance=0.02):
+    """Check the vectorized distributions against the scalar generator.
+
+    A second scalar run with another seed gives the sampling-noise floor; every metric must be within
+    twice that floor plus `tolerance`.
+    """
+    gen = sampler.generator
+    reference = _summary(*scalar_sample(gen, tile_name, players, level, skull, n, seed))
+    noise = _summary(*scalar_sample(gen, tile_name, players, level, skull, n, seed + 1))
+    batch = sampler.sample(tile_name, players, level, skull, n=n, seed=seed)
+    vector = _summary(batch.empty, batch.total_xp, batch.creature_frequency(len(gen.creatures)))
+
+    def metrics(other):
+        return {
+            "empty_rate": abs(other["empty_rate"] - reference["empty_rate"]),
+            "mean_xp_rel": abs(other["mean_xp"] - reference["mean_xp"]) / max(1.0, reference["mean_xp"]),
+            "creature_tvd": 0.5 * float(np.abs(other["creature_share"] - reference["creature_share"]).sum()),
+        }
+
+    floor, diff = metrics(noise), metrics(vector)
+    ok = all(diff[k] <= 2 * floor[k] + tolerance for k in diff)
+    return ok, diff, floor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized bulk encounter sampler")
+    parser.add_argument("--setting", default="ravenloft")
+    parser.add_argument("--tile", required=True)
+    parser.add_argument("--numplayers", type=int, default=4)
+    parser.add_argument("--level", type=int, default=5)
+    parser.add_argument("--skull", action="store_true")
+    parser.add_argument("-n", type=int, default=1000000, help="Encounters to sample")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--check", action="store_true", help="Compare distributions against the scalar generator")
+    args = parser.parse_args()
+
+    tiles = TileManager(setting=args.setting)
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting)
+    tile_name = tiles.resolve_tile_name(args.tile) or args.tile
+    sampler = BulkSampler(generator)
+
+    if args.check:
+        ok, diff, floor = compare(sampler, tile_name, args.numplayers, args.level, args.skull,
+                                  n=min(args.n, 20000), seed=args.seed or 0)
+        for key in diff:
+            print(f"{key:<14} vector {diff[key]:.4f}   scalar noise {floor[key]:.4f}")
+        print("OK" if ok else "MISMATCH")
+        raise SystemExit(0 if ok else 1)
+
+    start = time.perf_counter()
+    batch = sampler.sample(tile_name, args.numplayers, args.level, args.skull, n=args.n, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    budget = generator._get_xp_budget(args.numplayers, args.level, args.skull)
+    live = ~batch.empty
+    ratio = batch.total_xp[live] / budget
+    print(f"{args.n} encounters in {tile_name} in {elapsed:.2f}s ({args.n / elapsed:,.0f}/s), XP budget {budget}")
+    print(f"empty: {batch.empty.mean():.1%}  in 80-110% window: {((ratio >= 0.8) & (ratio <= 1.1)).mean():.1%}  "
+          f"final check: {batch.final_check[live].mean():.1%}  half-budget fallback: {batch.half_fallback[live].mean():.1%}")
+    if len(ratio):
+        p = np.percentile(ratio, [5, 50, 95])
+        print(f"XP / budget: p5 {p[0]:.2f}  median {p[1]:.2f}  p95 {p[2]:.2f}  max {ratio.max():.2f}")
+    frequency = batch.creature_frequency(len(generator.creatures))
+    print("Most frequent creatures:")
+    for creature_id in np.argsort(-frequency)[:10]:
+        if frequency[creature_id]:
+            share = frequency[creature_id] / frequency.sum()
+            print(f"  {generator.creatures[creature_id]['name']:<30} {share:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Monte Carlo calibration report for EncounterGenerator._select_monsters.
+
+For every (setting, tile, players, level, skull) cell, runs N seeded encounters and records how often the
+selection lands in the 80-110% XP window, how many picks the fill and "final check" loops needed, how often
+the off-theme, final-check and half-budget fallback paths fire, and the time per encounter.
+Cells run in parallel across cores; every cell has its own seed, so results don't depend on scheduling.
+
+    python -m src.calibrate --settings ravenloft generic -n 2000 --json calibration.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from src.encounter_generator import EncounterGenerator
+from src.tile_manager import TileManager
+
+_generators = {}  # per worker process: setting -> EncounterGenerator
+
+
+def _generator(setting):
+    generator = _generators.get(setting)
+    if generator is None:
+        tiles = TileManager(setting=setting)
+        generator = _generators[setting] = EncounterGenerator(tile_manager=tiles, setting=tiles.setting)
+    return generator
+
+
+def cell_seed(seed, cell):
+    return zlib.crc32(json.dumps([seed, *cell]).encode())
+
+
+def run_cell(cell, n, seed):
+    setting, tile_name, players, level, skull = cell
+    generator = _generator(setting)
+    tile = generator.tiles.get_tile(tile_name)
+    pools = generator._thematic_pools(generator.creatures, tile.get("themes", ["dark"]), generator.theme_map)
+    budget = generator._get_xp_budget(players, level, skull)
+    min_xp, max_xp = int(budget * 0.8), int(budget * 1.1)
+    rng = random.Random(cell_seed(seed, cell))
+
+    empty = hits = over = under = final = half = off_theme = 0
+    attempts, final_picks, ratios = [], [], []
+    start = time.perf_counter()
+    for _ in range(n):
+        stats = {}
+        encounter = generator._build(tile, players, level, skull, rng, None, pools=pools, stats=stats)
+        if encounter.empty:
+            empty += 1
+            continue
+        xp = encounter.total_xp
+        ratios.append(xp / budget)
+        if xp < min_xp:
+            under += 1
+        elif xp > max_xp:
+            over += 1
+        else:
+            hits += 1
+        attempts.append(stats.get("attempts", 0))
+        final_picks.append(stats.get("final_picks", 0))
+        final += stats.get("final_picks", 0) > 0
+        half += bool(stats.get("half_fallback"))
+        off_theme += stats.get("off_theme_picks", 0) > 0
+    elapsed = time.perf_counter() - start
+
+    live = max(1, n - empty)
+    return {
+        "setting": setting, "tile": tile_name, "players": players, "level": level, "skull": skull,
+        "n": n, "xp_budget": budget,
+        "empty_rate": round(empty / n, 4),
+        "budget_hit_rate": round(hits / live, 4),
+        "under_rate": round(under / live, 4),
+        "over_rate": round(over / live, 4),
+        "mean_xp_ratio": round(statistics.fmean(ratios), 4) if ratios else None,
+        "mean_fill_picks": round(statistics.fmean(attempts), 3) if attempts else 0,
+        "max_fill_picks": max(attempts, default=0),
+        "final_check_rate": round(final / live, 4),
+        "mean_final_picks": round(statistics.fmean(final_picks), 3) if final_picks else 0,
+        "max_final_picks": max(final_picks, default=0),
+        "half_fallback_rate": round(half / live, 4),
+        "off_theme_rate": round(off_theme / live, 4),
+        "all_creatures_pool": pools["all_creatures"],
+        "us_per_encounter": round(elapsed / n * 1e6, 2),
+    }
+
+
+def build_cells(settings, tiles, players, levels, skulls):
+    cells = []
+    for setting in settings:
+        manager = TileManager(setting=setting)
+        if manager.setting != setting:
+            print(f"Setting '{setting}' has no tiles of its own; skipping.")
+            continue
+        names = manager.get_available_tiles()
+        if tiles:
+            names = [manager.resolve_tile_name(t) or t for t in tiles]
+        for tile_name in names:
+            for count in players:
+                for level in levels:
+                    for skull in skulls:
+                        cells.append((setting, tile_name, count, level, skull))
+    return cells
+
+
+def run(cells, n, seed, workers=None):
+    if workers == 1:
+        return [run_cell(cell, n, seed) for cell in cells]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_cell, cells, [n] * len(cells), [seed] * len(cells),
+                                 chunksize=max(1, len(cells) // ((workers or os.cpu_count() or 1) * 4))))
+
+
+def print_table(rows):
+    print(f"{'setting':<10} {'tile':<22} {'pl':>2} {'lv':>2} {'sk':>2} {'hit%':>6} {'under%':>6} {'over%':>6} "
+          f"{'final%':>6} {'half%':>6} {'offth%':>6} {'fill':>5} {'fmax':>4} {'us/enc':>7}")
+    for r in rows:
+        print(f"{r['setting'][:10]:<10} {r['tile'][:22]:<22} {r['players']:>2} {r['level']:>2} "
+              f"{'y' if r['skull'] else 'n':>2} {r['budget_hit_rate']:6.1%} {r['under_rate']:6.1%} "
+              f"{r['over_rate']:6.1%} {r['final_check_rate']:6.1%} {r['half_fallback_rate']:6.1%} "
+              f"{r['off_theme_rate']:6.1%} {r['mean_fill_picks']:5.2f} {r['max_final_picks']:>4} "
+              f"{r['us_per_encounter']:7.1f}")
+
+
+def parse_levels(text):
+    levels = []
+    for part in text.split(","):
+        low, _, high = part.partition("-")
+        levels.extend(range(int(low), int(high or low) + 1))
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo calibration report for encounter selection")
+    parser.add_argument("--settings", nargs="+", default=["ravenloft"])
+    parser.add_argument("--tiles", nargs="*", default=None, help="Tiles to run (default: all tiles of each setting)")
+    parser.add_argument("--players", type=int, nargs="+", default=[4])
+    parser.add_argument("--levels", default="1-20", help="Levels, e.g. 1-20 or 1,5,10-12")
+    parser.add_argument("--skull", choices=["no", "yes", "both"], default="both")
+    parser.add_argument("-n", type=int, default=1000, help="Encounters per cell")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--json", dest="json_path", help="Write the full report to this JSON file")
+    parser.add_argument("--quiet", action="store_true", help="Don't print the table")
+    args = parser.parse_args()
+
+    skulls = {"no": [False], "yes": [True], "both": [False, True]}[args.skull]
+    cells = build_cells(args.settings, args.tiles, args.players, parse_levels(args.levels), skulls)
+    start = time.perf_counter()
+    rows = run(cells, args.n, args.seed, args.workers)
+    elapsed = time.perf_counter() - start
+
+    if not args.quiet:
+        print_table(rows)
+    live = [r for r in rows if r["empty_rate"] < 1]
+    if live:
+        print(f"{len(rows)} cells x {args.n} encounters in {elapsed:.1f}s; "
+              f"mean hit rate {statistics.fmean(r['budget_hit_rate'] for r in live):.1%}, "
+              f"final check {statistics.fmean(r['final_check_rate'] for r in live):.1%}, "
+              f"half-budget fallback {statistics.fmean(r['half_fallback_rate'] for r in live):.1%}")
+    if args.json_path:
+        report = {
+            "meta": {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "seed": args.seed, "n": args.n,
+                     "python": platform.python_version(), "host": platform.node(), "seconds": round(elapsed, 2)},
+            "cells": rows,
+        }
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"Wrote {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
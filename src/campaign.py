@@ -0,0 +1,212 @@
+"""Campaign mode: a whole night's tile route, selected up front and described through a pipeline.
+
+The REPL describes one tile at a time, so every tile waits for the previous LLM call. A Campaign selects
+every encounter on the route first (a few hundred microseconds in total), submits their descriptions to a
+pool of `concurrency` workers at once, and yields encounters in route order as soon as each one and all
+the ones before it are ready. Selection uses one seeded RNG in route order, so the creatures don't
+depend on how the descriptions are scheduled.
+
+Pacing scales each tile's XP budget along the route:
+
+    flat    every tile a Medium encounter
+    ramp    0.75x at the start up to 1.25x at the end
+    waves   three rises and falls (0.7x-1.2x), ending on the last peak
+    climax  0.8x throughout, then 1.5x for the last tile
+
+A route file lists one tile per line, with the REPL's +skull suffix for harder tiles; blank lines and
+lines starting with # are skipped.
+
+    python -m src.campaign --route night1.txt --players 4 --level 5 --pacing ramp --local-ai --concurrency 4
+    python -m src.campaign --tiles Crypt Chapel "Dark Fountain" +skull --compare
+"""
+import argparse
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.description_backends import DEFAULT_MODEL
+
+PACING = {
+    "flat": lambda i, n: 1.0,
+    "ramp": lambda i, n: 0.75 + 0.5 * i / max(1, n - 1),
+    "waves": lambda i, n: 0.95 - 0.25 * math.cos(5 * math.pi * i / max(1, n - 1)),
+    "climax": lambda i, n: 1.5 if i == n - 1 else 0.8,
+}
+
+
+def pacing_scales(pacing, count):
+    """XP multipliers for a route of `count` tiles: a PACING name or an explicit list of numbers."""
+    if isinstance(pacing, str):
+        try:
+            curve = PACING[pacing]
+        except KeyError:
+            raise ValueError(f"Unknown pacing '{pacing}'. Choose from: {', '.join(PACING)}") from None
+        return [round(curve(i, count), 3) for i in range(count)]
+    scales = [float(s) for s in pacing]
+    if len(scales) != count:
+        raise ValueError(f"Pacing has {len(scales)} values for a route of {count} tiles")
+    return scales
+
+
+def parse_route(lines):
+    """[(tile_input, skull)] from route lines ('Crypt', 'Crypt +skull'); comments and blanks skipped."""
+    route = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        skull = "+skull" in line.lower()
+        if skull:
+            line = line[:line.lower().index("+skull")].strip()
+        route.append((line, skull))
+    return route
+
+
+def load_route(path):
+    with open(path) as f:
+        return parse_route(f)
+
+
+class Campaign:
+    def __init__(self, generator, route, players=4, level=5, pacing="flat", concurrency=4, seed=None):
+        self.generator = generator
+        self.players = players
+        self.level = level
+        self.concurrency = max(1, concurrency)
+        self.seed = seed
+        self.route = [self._resolve(tile, skull) for tile, skull in
+                      ((item, False) if isinstance(item, str) else item for item in route)]
+        self.scales = pacing_scales(pacing, len(self.route))
+        self.encounters = None
+        self.select_ms = 0.0
+        self.wall_s = 0.0
+
+    def _resolve(self, tile_input, skull):
+        tiles = self.generator.tiles
+        names = tiles.get_available_tiles()
+        # Exact names first, so "Crypt" isn't ambiguous with a "Crypt Entrance"
+        exact = [name for name in names if name.lower() == tile_input.lower()]
+        tile_name = exact[0] if exact else tiles.resolve_tile_name(tile_input)
+        if tile_name is None:
+            raise ValueError(f"Unknown or ambiguous tile '{tile_input}'. Available: {', '.join(names)}")
+        return tile_name, skull
+
+    def select(self):
+        """Build every encounter on the route (no descriptions yet); returns them in route order."""
+        gen = self.generator
+        rng = random.Random(self.seed)
+        start = time.perf_counter()
+        self.encounters = [
+            gen._build(gen.tiles.get_tile(tile_name), self.players, self.level, skull, rng,
+                       gen._trace_events(), xp_scale=scale)
+            for (tile_name, skull), scale in zip(self.route, self.scales)
+        ]
+        self.select_ms = (time.perf_counter() - start) * 1000
+        return self.encounters
+
+    def __iter__(self):
+        """Yields encounters in route order, each as soon as it (and everything before it) is described."""
+        start = time.perf_counter()
+        encounters = self.encounters if self.encounters is not None else self.select()
+        gen = self.generator
+        if not gen.local_ai:
+            yield from encounters
+            self.wall_s = time.perf_counter() - start
+            return
+        # Connect before fanning out, so the workers don't all wait on the handshake
+        gen._get_ai()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="campaign") as executor:
+            futures = [executor.submit(gen.describe, encounter, True)
+                       if not encounter.empty and not encounter.fallback else None
+                       for encounter in encounters]
+            try:
+                for encounter, future in zip(encounters, futures):
+                    if future is not None:
+                        future.result()
+                    yield encounter
+            finally:
+                # A consumer that stops early shouldn't wait for the rest of the route
+                for future in futures:
+                    if future is not None:
+                        future.cancel()
+        self.wall_s = time.perf_counter() - start
+
+    def run(self):
+        return list(self)
+
+
+def sequential(generator, route, players, level, seed=None, scales=None):
+    """The REPL's way: one tile at a time, each description before the next selection. Returns seconds.
+
+    scales are the per-tile XP multipliers (Campaign.scales), so the comparison builds the same encounters.
+    """
+    rng = random.Random(seed)
+    scales = scales or [1.0] * len(route)
+    start = time.perf_counter()
+    for (tile_name, skull), scale in zip(route, scales):
+        generator.generate(tile_name, players, level, skull, quiet=True, rng=rng, xp_scale=scale)
+    return time.perf_counter() - start
+
+
+def main():
+    from src import cassette
+    from src.encounter_generator import EncounterGenerator
+    from src.tile_manager import TileManager
+
+    parser = argparse.ArgumentParser(description="Generate a whole route of encounters, describing them in parallel")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--route", help="File with one tile per line (+skull for harder tiles)")
+    source.add_argument("--tiles", nargs="+", help="Tiles in order; a +skull argument applies to the tile before it")
+    parser.add_argument("--setting", default="ravenloft")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--level", type=int, default=5)
+    parser.add_argument("--pacing", default="flat",
+                        help=f"{', '.join(PACING)}, or comma-separated XP multipliers, one per tile")
+    parser.add_argument("--concurrency", type=int, default=4, help="Descriptions generated at once")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--local-ai", action="store_true")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--backend", choices=["ollama", "ollama-http", "openai"], default="ollama")
+    parser.add_argument("--ai-host", default=None)
+    tape = parser.add_mutually_exclusive_group()
+    tape.add_argument("--record", metavar="PATH", help="Record description responses to a cassette file")
+    tape.add_argument("--replay", metavar="PATH", help="Serve descriptions from a recorded cassette")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="1 as recorded, 0 no waiting")
+    parser.add_argument("--replay-loose", action="store_true")
+    parser.add_argument("--compare", action="store_true",
+                        help="Also time the same route generated one tile at a time, as the REPL does")
+    args = parser.parse_args()
+
+    if args.route:
+        route = load_route(args.route)
+    else:
+        route = []
+        for arg in args.tiles:
+            if arg.lower() == "+skull" and route:
+                route[-1] = (route[-1][0], True)
+            else:
+                route.extend(parse_route([arg]))
+    pacing = [float(s) for s in args.pacing.split(",")] if "," in args.pacing else args.pacing
+
+    tiles = TileManager(setting=args.setting)
+    generator = EncounterGenerator(tile_manager=tiles, local_ai=args.local_ai, model=args.model,
+                                   setting=tiles.setting, ai_backend=args.backend, ai_host=args.ai_host,
+                                   ai_cassette=cassette.from_args(args))
+    campaign = Campaign(generator, route, args.players, args.level, pacing, args.concurrency, args.seed)
+    for number, (encounter, scale) in enumerate(zip(campaign, campaign.scales), 1):
+        print(f"=== {number}/{len(campaign.route)} {encounter.tile} (x{scale:g} XP) ===")
+        print(encounter)
+        print()
+    print(f"Campaign: {len(campaign.route)} tiles, selected in {campaign.select_ms:.1f} ms, "
+          f"done in {campaign.wall_s:.2f} s with {campaign.concurrency} concurrent descriptions")
+    if args.compare:
+        elapsed = sequential(generator, campaign.route, args.players, args.level, args.seed, campaign.scales)
+        print(f"Sequential (REPL): {elapsed:.2f} s ({elapsed / max(campaign.wall_s, 1e-9):.1f}x the campaign)")
+    if generator.ai_cassette is not None:
+        print(f"Cassette: {generator.ai_cassette.stats()}")
+        generator.ai_cassette.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Record backend calls to a cassette file and replay them later with no model running.
+
+    python -m src.main --local-ai --record run.cassette      # talk to the real server, keep every response
+    python -m src.main --local-ai --replay run.cassette      # same responses, same timing, offline
+    python -m src.main --local-ai --replay run.cassette --replay-speed 0   # as fast as possible
+
+A cassette is JSON lines, one per response: the model, prompt and options it answered, and either the whole
+text with how long it took ("ms") or the streamed chunks with when each arrived ("chunks": [[ms, text], ...]).
+Records are appended with one write each, so several processes (src.distributed workers) can record into
+one file; delete it to start over.
+
+Replay matches a request by model, prompt and options. A prompt recorded several times is served in
+recorded order, starting over when they run out. Timing is the recorded time divided by speed (1 is
+the original, 0 skips the waits). With loose=True a prompt that isn't on the cassette gets the next
+unused recording instead of an error, so a change that rewords prompts can still be timed against an
+old cassette.
+
+    python -m src.cassette run.cassette      # what's on a cassette
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import threading
+import time
+from collections import deque
+
+from src.description_backends import BackendError, DescriptionBackend
+
+VERSION = 1
+
+
+def _key(model, prompt, options):
+    return ((model or "").strip(), prompt, json.dumps(options or {}, sort_keys=True))
+
+
+class Cassette:
+    """Where responses are recorded to or replayed from, shared by every backend that uses it."""
+
+    def __init__(self, path, mode="replay", speed=1.0, loose=False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Cassette mode must be 'record' or 'replay', not '{mode}'")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.loose = loose
+        self._lock = threading.Lock()
+        self._fd = None
+        self._records = []
+        self._by_key = {}
+        self._unused = deque()
+        self.recorded = 0
+        self.hits = 0
+        self.misses = 0
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "cassette" in record:
+                    if record["cassette"] > VERSION:
+                        raise ValueError(f"{self.path} is cassette version {record['cassette']}; "
+                                         f"this build reads up to {VERSION}")
+                    continue
+                self._records.append(record)
+        for index, record in enumerate(self._records):
+            key = _key(record["model"], record["prompt"], record.get("options"))
+            self._by_key.setdefault(key, []).append(index)
+        self._cycles = {key: itertools.cycle(indices) for key, indices in self._by_key.items()}
+        self._unused = deque(range(len(self._records)))
+
+    def __len__(self):
+        return len(self._records) if self.mode == "replay" else self.recorded
+
+    # -- recording --------------------------------------------------------------------------------
+
+    def record(self, model, prompt, options, text=None, chunks=None, ms=0.0):
+        record = {"model": model, "prompt": prompt}
+        if options:
+            record["options"] = options
+        if chunks is not None:
+            record["chunks"] = [[round(at, 1), piece] for at, piece in chunks]
+        else:
+            record["text"] = text
+        record["ms"] = round(ms, 1)
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+                if os.fstat(self._fd).st_size == 0:
+                    os.write(self._fd, json.dumps({"cassette": VERSION, "created": time.time()}).encode() + b"\n")
+            os.write(self._fd, line)  # one write per record, so concurrent recorders don't interleave
+            self.recorded += 1
+
+    # -- replay -----------------------------------------------------------------------------------
+
+    def find(self, model, prompt, options):
+        """The recording that answers this request; raises BackendError if there is none."""
+        key = _key(model, prompt, options)
+        with self._lock:
+            cycle = self._cycles.get(key)
+            if cycle is not None:
+                index = next(cycle)
+            elif self.loose and self._records:
+                index = self._unused[0]
+            else:
+                self.misses += 1
+                raise BackendError(f"No recording for this prompt on {self.path}")
+            self.hits += 1
+            try:
+                self._unused.remove(index)
+            except ValueError:
+                pass
+            if not self._unused:
+                self._unused.extend(range(len(self._records)))
+        return self._records[index]
+
+    def wait(self, start, at_ms):
+        """Sleep until at_ms (recorded milliseconds, scaled by speed) after start."""
+        if self.speed <= 0:
+            return
+        delay = start + at_ms / 1000 / self.speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            if self.mode == "record":
+                return {"mode": "record", "path": self.path, "recorded": self.recorded}
+            return {"mode": "replay", "path": self.path, "responses": len(self._records), "hits": self.hits,
+                    "misses": self.misses, "speed": self.speed}
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+def from_args(args):
+    """The Cassette asked for with --record PATH or --replay PATH [--replay-speed X] [--replay-loose], or None."""
+    if getattr(args, "record", None):
+        return Cassette(args.record, "record")
+    if getattr(args, "replay", None):
+        return Cassette(args.replay, "replay", speed=args.replay_speed, loose=args.replay_loose)
+    return None
+
+
+def _chunks(record):
+    """[(ms, text)] for a recording, whether it was streamed or not."""
+    if "chunks" in record:
+        return record["chunks"]
+    return [(record.get("ms", 0.0), record.get("text", ""))]
+
+
+class CassetteBackend(DescriptionBackend):
+    """A backend that records another backend's responses, or replays a cassette in place of one."""
+
+    name = "cassette"
+
+    def __init__(self, cassette, backend=None, model=None):
+        if backend is None and cassette.mode == "record":
+            raise ValueError("Recording needs a backend to record")
+        super().__init__(model or backend.model, backend.host if backend else f"cassette:{cassette.path}",
+                         backend.timeout if backend else 60.0)
+        self.cassette = cassette
+        self.backend = backend
+        if cassette.mode == "record":
+            self.label = f"{backend.label} (recording to {cassette.path})"
+        else:
+            self.label = f"Cassette {cassette.path} ({len(cassette)} responses)"
+
+    def connect(self):
+        if self.cassette.mode == "record":
+            self.backend.connect()
+        elif not len(self.cassette):
+            raise ValueError(f"No responses recorded on {self.cassette.path}")
+
+    def health(self):
+        return self.backend.health() if self.cassette.mode == "record" else True
+
+    def models(self):
+        if self.cassette.mode == "record":
+            return self.backend.models()
+        return sorted({record["model"] for record in self.cassette._records})
+
+    def loaded_models(self):
+        return self.backend.loaded_models() if self.cassette.mode == "record" else self.models()
+
+    def generate(self, prompt, options=None):
+        if self.cassette.mode == "record":
+            start = time.perf_counter()
+            text = self.backend.generate(prompt, options)
+            self.cassette.record(self.model, prompt, options, text=text, ms=(time.perf_counter() - start) * 1000)
+            return text
+        start = time.perf_counter()
+        record = self.cassette.find(self.model, prompt, options)
+        chunks = _chunks(record)
+        self.cassette.wait(start, chunks[-1][0] if chunks else 0.0)
+        return "".join(piece for _, piece in chunks)
+
+    def stream(self, prompt, options=None):
+        start = time.perf_counter()
+        if self.cassette.mode == "record":
+            chunks = []
+            for piece in self.backend.stream(prompt, options):
+                chunks.append(((time.perf_counter() - start) * 1000, piece))
+                yield piece
+            self.cassette.record(self.model, prompt, options, chunks=chunks,
+                                 ms=(time.perf_counter() - start) * 1000)
+            return
+        record = self.cassette.find(self.model, prompt, options)
+        for at, piece in _chunks(record):
+            self.cassette.wait(start, at)
+            yield piece
+
+    def batch(self, prompts, options=None, max_workers=None):
+        if max_workers is None:
+            # As many requests in flight as the wrapped backend would use (a BackendPool wants more than 8)
+            hosts = getattr(self.backend, "hosts", None)
+            max_workers = 4 * len(hosts) if hosts else 8
+        return super().batch(prompts, options, max_workers)
+
+    def close(self):
+        if self.backend is not None:
+            self.backend.close()
+        self.cassette.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a recorded cassette")
+    parser.add_argument("path")
+    args = parser.parse_args()
+    cassette = Cassette(args.path)
+    records = cassette._records
+    if not records:
+        print(f"{args.path}: no responses")
+        return
+    times = [record.get("ms", 0.0) for record in records]
+    streamed = sum("chunks" in record for record in records)
+    print(f"{args.path}: {len(records)} responses ({streamed} streamed), {len(cassette._by_key)} distinct prompts")
+    print(f"Models: {', '.join(sorted({record['model'] for record in records}))}")
+    print(f"Recorded time: {sum(times) / 1000:.2f} s total, {statistics.median(times):.0f} ms median, "
+          f"{max(times):.0f} ms max")
+
+
+if __name__ == "__main__":
+    main()
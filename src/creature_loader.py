@@ -0,0 +1,286 @@
+"""Streaming loader for creatures.json.
+
+Reads the top-level array a chunk at a time and keeps only the fields the generator uses, so a catalog
+of hundreds of thousands of creatures never exists twice in memory (raw text plus full dicts next to the
+compact list). Each chunk's complete entries are decoded by one json.loads call and trimmed in place,
+which keeps the load close to json.load's time for the full catalog. Malformed entries are reported with
+their line number and skipped; a JSON syntax error stops the load with the line and column. Lines are
+only counted when one is reported.
+"""
+import json
+import re
+import sys
+from operator import itemgetter
+
+CREATURE_FIELDS = ("name", "cr", "xp")  # all that selection, rendering and the codecs read
+CHUNK_SIZE = 1 << 16
+
+_NON_WHITESPACE = re.compile(r"[^ \t\n\r]")
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+_WHITESPACE = " \t\n\r"
+_FIELD_SET = frozenset(CREATURE_FIELDS)
+_NAME, _CR, _XP = (itemgetter(field) for field in CREATURE_FIELDS)
+
+
+def _last_boundary(buf, start):
+    """(end of an object, start of the next) for the last '},{' in buf[start:], or None.
+
+    A '},{' inside a string or a nested value can match too; json.loads then fails on the run and the
+    reader falls back to decoding those entries one at a time.
+    """
+    i = len(buf)
+    while True:
+        i = buf.rfind("{", start, i)
+        if i <= start:
+            return None
+        j = i - 1
+        while j > start and buf[j] in _WHITESPACE:
+            j -= 1
+        if buf[j] == ",":
+            j -= 1
+            while j > start and buf[j] in _WHITESPACE:
+                j -= 1
+            if buf[j] == "}":
+                return j + 1, i
+
+
+class _ArrayReader:
+    """Yields the elements of a JSON array read from a text file in chunks, as lists of decoded entries.
+
+    entry_lines(indices) gives the lines the given elements of the list just yielded start on; lines are
+    only counted when asked.
+    """
+
+    def __init__(self, fp, path, chunk_size=CHUNK_SIZE):
+        self.fp = fp
+        self.path = path
+        self.chunk_size = chunk_size
+        self.scan = json.JSONDecoder().scan_once
+        self.buf = ""
+        self.pos = 0
+        self.span = (0, 0)  # where the entries just yielded are in buf
+        self.eof = False
+        self.offset = 0  # file offset of buf[0]
+        self.careful_until = 0  # file offset up to which entries are decoded one at a time
+        self._lines = None  # second handle on the file, opened to count lines when one is asked for
+        self.line = 1  # line number at file offset self.counted
+        self.line_start = 0  # file offset where that line starts
+        self.counted = 0
+
+    def _line_at(self, pos):
+        """Line of buf[pos], counted by reading the file again from the last position asked for.
+
+        Only reports need lines, so the fast path never counts newlines; positions asked for only move
+        forward, so the file is read through at most once more.
+        """
+        target = self.offset + pos
+        if self._lines is None:
+            self._lines = open(self.path, "r")
+        while self.counted < target:
+            text = self._lines.read(min(self.chunk_size, target - self.counted))
+            if not text:
+                break
+            newlines = text.count("\n")
+            if newlines:
+                self.line += newlines
+                self.line_start = self.counted + text.rfind("\n") + 1
+            self.counted += len(text)
+        return self.line
+
+    def close(self):
+        if self._lines is not None:
+            self._lines.close()
+            self._lines = None
+
+    def entry_lines(self, indices):
+        """{index: line} for elements of the last yielded list, by decoding its span again."""
+        wanted = set(indices)
+        lines = {}
+        pos, end = self.span
+        index = 0
+        while pos < end and len(lines) < len(wanted):
+            if index in wanted:
+                lines[index] = self._line_at(pos)
+            _, after = self.scan(self.buf, pos)
+            separator = _SEPARATOR.match(self.buf, after)
+            pos = separator.end() if separator else end
+            index += 1
+        return lines
+
+    def _fill(self):
+        """Read another chunk, dropping what has been consumed; False at end of file."""
+        if self.eof:
+            return False
+        more = self.fp.read(self.chunk_size)
+        if not more:
+            self.eof = True
+            return False
+        self.offset += self.pos
+        self.buf = self.buf[self.pos:] + more
+        self.pos = 0
+        return True
+
+    def _peek(self):
+        """Next non-whitespace character (without consuming it), or '' at end of file."""
+        while True:
+            match = _NON_WHITESPACE.search(self.buf, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buf[self.pos]
+            self.pos = len(self.buf)
+            if not self._fill():
+                return ""
+
+    def _error(self, message, pos=None):
+        pos = self.pos if pos is None else pos
+        line = self._line_at(pos)
+        return ValueError(f"{self.path}:{line}:{self.offset + pos - self.line_start + 1}: {message}")
+
+    def __iter__(self):
+        if self._peek() != "[":
+            raise self._error("expected a JSON array of creatures")
+        self.pos += 1
+        if self._peek() == "]":
+            self._end()
+            return
+        loads = json.loads
+        while True:
+            # Fast path: every complete entry in the buffer, decoded by one json.loads call
+            if self.offset + self.pos >= self.careful_until:
+                boundary = _last_boundary(self.buf, self.pos)
+                if boundary is not None:
+                    end, following = boundary
+                    try:
+                        entries = loads("[" + self.buf[self.pos:end] + "]")
+                    except ValueError:
+                        # Malformed, or the '},{' wasn't between entries: go one at a time up to it
+                        self.careful_until = self.offset + end
+                    else:
+                        self.span = (self.pos, end)
+                        yield entries
+                        self.pos = following
+                        self._fill()  # the rest is at most one entry cut short; decode it with the next run
+                        continue
+            # The last entry, or the input needs a closer look
+            if self._peek() == "":
+                raise self._error("unexpected end of file")
+            value, end = self._decode_one()
+            self.span = (self.pos, end)
+            yield [value]
+            self.pos = end
+            char = self._peek()
+            if char == "]":
+                self._end()
+                return
+            if char != ",":
+                raise self._error("expected ',' or ']' after an entry" if char else "unexpected end of file")
+            self.pos += 1
+            self._peek()
+            if not self.eof and len(self.buf) - self.pos < self.chunk_size // 2:
+                self._fill()  # keep enough text buffered for the next run
+
+    def _end(self):
+        # Past the closing ']' only whitespace may follow, as json.load requires
+        self.pos += 1
+        if self._peek() != "":
+            raise self._error("Extra data")
+
+    def _decode_one(self):
+        while True:
+            try:
+                value, end = self.scan(self.buf, self.pos)
+            except StopIteration as e:
+                if self._fill():
+                    continue
+                raise self._error("Expecting value", e.value) from None
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise self._error(e.msg, e.pos) from None
+            if end == len(self.buf) and self._fill():
+                continue  # a bare number may have been cut short; decode it again with more text
+            return value, end
+
+
+def compact_creature(entry, fields=CREATURE_FIELDS):
+    """The entry reduced to `fields`; raises ValueError if it can't be used as a creature."""
+    try:
+        name, xp = entry["name"], entry["xp"]
+    except (KeyError, TypeError):
+        if not isinstance(entry, dict):
+            raise ValueError(f"expected an object, got {type(entry).__name__}") from None
+        raise ValueError(f"missing '{'name' if 'name' not in entry else 'xp'}'") from None
+    if not isinstance(name, str):
+        raise ValueError("'name' is not a string")
+    if type(xp) is not int:
+        try:
+            int(xp)
+        except (TypeError, ValueError):
+            raise ValueError(f"'xp' is not a number: {xp!r}") from None
+    compact = {field: entry[field] for field in fields if field in entry}
+    cr = compact.get("cr")
+    if type(cr) is str:
+        compact["cr"] = sys.intern(cr)  # a few dozen distinct CR strings shared by every entry
+    return compact
+
+
+def _compact_batch(entries):
+    """entries trimmed to CREATURE_FIELDS in place, or None if any of them needs compact_creature.
+
+    The checks run over the whole batch at C speed (map/set), and deleting the other keys leaves the same
+    small dict a fresh three-key dict would be, without building one.
+    """
+    try:
+        # an entry that isn't an object raises TypeError in itemgetter
+        if set(map(type, map(_NAME, entries))) != {str} or set(map(type, map(_XP, entries))) != {int}:
+            return None
+        crs = list(map(sys.intern, map(_CR, entries)))  # a few dozen distinct CR strings shared by every entry
+    except (KeyError, TypeError):
+        return None  # a missing field, or a CR that isn't a string
+    drop = tuple(key for key in entries[0] if key not in _FIELD_SET)  # usually "type" and "notes"
+    for entry, cr in zip(entries, crs):
+        try:
+            for key in drop:
+                del entry[key]
+        except KeyError:
+            pass  # different extra keys; trimmed below
+        entry["cr"] = cr
+    if set(map(len, entries)) != {len(CREATURE_FIELDS)}:
+        # name, cr and xp are all there, so only entries with other extra keys are longer
+        entries = [entry if len(entry) == len(CREATURE_FIELDS) else {field: entry[field] for field in CREATURE_FIELDS}
+                   for entry in entries]
+    return entries
+
+
+def load_creatures(path, fields=CREATURE_FIELDS, errors=None, chunk_size=CHUNK_SIZE):
+    """Stream a creatures.json into a list of compact creature dicts.
+
+    Unusable entries are skipped and reported as "path:line: message" (appended to `errors` when given,
+    printed otherwise).
+    """
+    creatures = []
+    with open(path, "r") as fp:
+        reader = _ArrayReader(fp, path, chunk_size)
+        try:
+            for entries in reader:
+                compact = _compact_batch(entries) if fields == CREATURE_FIELDS else None
+                if compact is not None:
+                    creatures.extend(compact)
+                    continue
+                failed = []
+                for index, entry in enumerate(entries):
+                    try:
+                        creatures.append(compact_creature(entry, fields))
+                    except ValueError as e:
+                        failed.append((index, e))
+                if failed:
+                    lines = reader.entry_lines(index for index, _ in failed)
+                    for index, error in failed:
+                        message = f"{path}:{lines[index]}: skipping creature entry: {error}"
+                        if errors is not None:
+                            errors.append(message)
+                        else:
+                            print(message)
+        finally:
+            reader.close()
+    return creatures
@@ -0,0 +1,230 @@
+"""Monte Carlo combat-deadliness estimate for an encounter (requires NumPy).
+
+The XP budget says nothing about action economy: one Wight and eight Swarms of Rats cost the same. This
+simulates the fight thousands of times at once instead. Each creature gets the DMG "Monster Statistics by
+Challenge Rating" values for its CR (midpoint HP and damage per round, AC, attack bonus), the party gets
+level-based defaults (see Party), and every simulation runs in lockstep as NumPy arrays:
+
+- PCs act first, one at a time, focusing the weakest monster still standing; d20 + attack vs AC, natural
+  20s crit for double damage, damage varies +-25%.
+- Then every monster standing attacks a random PC still up, splitting its damage per round over 1-3
+  attacks by CR.
+- The fight ends when one side is down or after max_rounds.
+
+    python -m src.deadliness --tile Crypt --players 4 --level 5 -n 20
+"""
+import argparse
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+# CR -> (proficiency, AC, HP min, HP max, attack bonus, damage/round min, damage/round max); DMG p. 274
+CR_TABLE = {
+    "0": (2, 13, 1, 6, 3, 0, 1),
+    "1/8": (2, 13, 7, 35, 3, 2, 3),
+    "1/4": (2, 13, 36, 49, 3, 4, 5),
+    "1/2": (2, 13, 50, 70, 3, 6, 8),
+    "1": (2, 13, 71, 85, 3, 9, 14),
+    "2": (2, 13, 86, 100, 3, 15, 20),
+    "3": (2, 13, 101, 115, 4, 21, 26),
+    "4": (2, 14, 116, 130, 5, 27, 32),
+    "5": (3, 15, 131, 145, 6, 33, 38),
+    "6": (3, 15, 146, 160, 6, 39, 44),
+    "7": (3, 15, 161, 175, 6, 45, 50),
+    "8": (3, 16, 176, 190, 7, 51, 56),
+    "9": (4, 16, 191, 205, 7, 57, 62),
+    "10": (4, 17, 206, 220, 7, 63, 68),
+    "11": (4, 17, 221, 235, 8, 69, 74),
+    "12": (4, 17, 236, 250, 8, 75, 80),
+    "13": (5, 18, 251, 265, 8, 81, 86),
+    "14": (5, 18, 266, 280, 8, 87, 92),
+    "15": (5, 18, 281, 295, 8, 93, 98),
+    "16": (5, 18, 296, 310, 9, 99, 104),
+    "17": (6, 19, 311, 325, 10, 105, 110),
+    "18": (6, 19, 326, 340, 10, 111, 116),
+    "19": (6, 19, 341, 355, 10, 117, 122),
+    "20": (6, 19, 356, 400, 10, 123, 140),
+    "21": (7, 19, 401, 445, 11, 141, 158),
+    "22": (7, 19, 446, 490, 11, 159, 176),
+    "23": (7, 19, 491, 535, 11, 177, 194),
+    "24": (7, 19, 536, 580, 12, 195, 212),
+    "25": (8, 19, 581, 625, 12, 213, 230),
+    "26": (8, 19, 626, 670, 12, 231, 248),
+    "27": (8, 19, 671, 715, 13, 249, 266),
+    "28": (8, 19, 716, 760, 13, 267, 284),
+    "29": (8, 19, 761, 805, 13, 285, 302),
+    "30": (9, 19, 806, 850, 14, 303, 320),
+}
+DEFAULT_SIMS = 2000
+MAX_ROUNDS = 20
+
+
+@dataclass
+class Party:
+    """Identical PCs; Party.for_level() fills in typical values and any field can be overridden."""
+    players: int
+    level: int
+    hp: float
+    ac: int
+    attack_bonus: int
+    damage: float  # damage per round when the attack hits
+
+    @classmethod
+    def for_level(cls, players, level, **overrides):
+        level = max(1, min(20, level))
+        proficiency = 2 + (level - 1) // 4
+        values = {
+            "hp": 12 + 8 * (level - 1),  # d10 hit die with +2 Con, on average
+            "ac": 15 + (level >= 5) + (level >= 10) + (level >= 17),
+            "attack_bonus": proficiency + (3 if level < 4 else 4 if level < 8 else 5),
+            # Extra attacks, area spells against groups, cantrip scaling and magic items, roughly; tuned so
+            # DMG Medium encounters mostly end without a TPK at levels 1-10 against midpoint monster HP
+            "damage": 10 + 4 * (level - 1),
+        }
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(players, level, **values)
+
+
+@dataclass(slots=True)
+class Deadliness:
+    rounds: float  # mean rounds until one side is down (capped at max_rounds)
+    pc_down: float  # chance at least one PC drops to 0 HP
+    tpk: float  # chance the whole party drops
+    party_wins: float  # chance every monster drops within max_rounds
+    sims: int
+    ms: float
+
+    def __str__(self):
+        return (f"Deadliness: ~{self.rounds:.1f} rounds, {self.pc_down:.0%} chance a PC drops, "
+                f"{self.tpk:.0%} TPK ({self.sims} sims, {self.ms:.0f} ms)")
+
+
+_stats_cache = {}  # id(catalog) -> (catalog, per-creature stat arrays)
+
+
+def creature_stats(catalog):
+    """(hp, ac, attack bonus, damage per hit, attacks) arrays indexed like the catalog."""
+    entry = _stats_cache.get(id(catalog))
+    if entry is None or entry[0] is not catalog:
+        rows = [CR_TABLE.get(str(c.get("cr", "0")).strip(), CR_TABLE["0"]) for c in catalog]
+        table = np.array(rows, dtype=np.float64).reshape(-1, 7)
+        cr = np.array([_cr_value(c.get("cr", "0")) for c in catalog])
+        attacks = np.where(cr < 5, 1, np.where(cr <= 10, 2, 3)).astype(np.float64)
+        stats = ((table[:, 2] + table[:, 3]) / 2, table[:, 1], table[:, 4],
+                 (table[:, 5] + table[:, 6]) / 2 / attacks, attacks.astype(np.int64))
+        entry = _stats_cache[id(catalog)] = (catalog, stats)
+    return entry[1]
+
+
+def _cr_value(cr):
+    try:
+        num, _, den = str(cr).partition("/")
+        return float(num) / float(den or 1)
+    except ValueError:
+        return 0.0
+
+
+def estimate(encounter, party=None, sims=DEFAULT_SIMS, rng=None, seed=None, max_rounds=MAX_ROUNDS):
+    """Simulate the encounter `sims` times against party (default: Party.for_level from the encounter)."""
+    start = time.perf_counter()
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    party = party or Party.for_level(encounter.players, encounter.level)
+    if encounter.empty or not encounter.counts or encounter.catalog is None:
+        return Deadliness(0.0, 0.0, 0.0, 1.0, sims, (time.perf_counter() - start) * 1000)
+
+    hp_table, ac_table, atk_table, hit_table, attacks_table = creature_stats(encounter.catalog)
+    ids = np.repeat([cid for cid, _ in encounter.counts], [count for _, count in encounter.counts])
+    # One row per (monster, attack) so multiattack is just more rows
+    attack_owner = np.repeat(np.arange(len(ids)), attacks_table[ids])
+    monster_ac = ac_table[ids]
+    attack_bonus = atk_table[ids][attack_owner]
+    attack_damage = hit_table[ids][attack_owner]
+
+    players = party.players
+    monster_hp = np.tile(hp_table[ids], (sims, 1))
+    pc_hp = np.full((sims, players), float(party.hp))
+    ever_down = np.zeros(sims, dtype=bool)
+    rounds = np.full(sims, max_rounds, dtype=np.int64)
+    running = np.ones(sims, dtype=bool)
+    sim_index = np.arange(sims)
+
+    for round_no in range(1, max_rounds + 1):
+        # PCs, one at a time, each hitting the weakest monster still standing
+        for pc in range(players):
+            acting = running & (pc_hp[:, pc] > 0)
+            target = np.where(monster_hp > 0, monster_hp, np.inf).argmin(axis=1)
+            roll = rng.integers(1, 21, sims)
+            hit = acting & ((roll + party.attack_bonus >= monster_ac[target]) | (roll == 20)) & (roll != 1)
+            damage = party.damage * rng.uniform(0.75, 1.25, sims) * np.where(roll == 20, 2.0, 1.0)
+            monster_hp[sim_index, target] -= np.where(hit, damage, 0.0)
+        monsters_up = (monster_hp > 0).any(axis=1)
+
+        # Every monster still standing attacks a random PC that is still up
+        alive_pcs = pc_hp > 0
+        can_act = (monster_hp > 0)[:, attack_owner] & running[:, None] & monsters_up[:, None]
+        # Living PCs first in each row, then a uniform pick among the first n_alive columns
+        order = np.argsort(~alive_pcs, axis=1, kind="stable")
+        pick = (rng.random((sims, len(attack_owner))) * alive_pcs.sum(axis=1)[:, None]).astype(np.int64)
+        target = np.take_along_axis(order, pick, axis=1)
+        roll = rng.integers(1, 21, (sims, len(attack_owner)))
+        hit = can_act & ((roll + attack_bonus >= party.ac) | (roll == 20)) & (roll != 1)
+        damage = attack_damage * rng.uniform(0.75, 1.25, hit.shape) * np.where(roll == 20, 2.0, 1.0)
+        flat = (sim_index[:, None] * players + target)[hit]
+        pc_hp -= np.bincount(flat, weights=damage[hit], minlength=sims * players).reshape(sims, players)
+
+        down = pc_hp <= 0
+        ever_down |= down.any(axis=1)
+        finished = running & (~monsters_up | down.all(axis=1))
+        rounds[finished] = round_no
+        running &= ~finished
+        if not running.any():
+            break
+
+    party_down = (pc_hp <= 0).all(axis=1)
+    monsters_down = ~(monster_hp > 0).any(axis=1)
+    return Deadliness(float(rounds.mean()), float(ever_down.mean()), float(party_down.mean()),
+                      float(monsters_down.mean()), sims, (time.perf_counter() - start) * 1000)
+
+
+def main():
+    from src.encounter_generator import EncounterGenerator
+    from src.tile_manager import TileManager
+
+    parser = argparse.ArgumentParser(description="Estimate how deadly generated encounters are")
+    parser.add_argument("--setting", default="ravenloft")
+    parser.add_argument("--tile", default="Crypt")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--level", type=int, default=5)
+    parser.add_argument("--skull", action="store_true")
+    parser.add_argument("-n", type=int, default=10, help="Encounters to generate")
+    parser.add_argument("--sims", type=int, default=DEFAULT_SIMS, help="Simulated fights per encounter")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pc-hp", type=float)
+    parser.add_argument("--pc-ac", type=int)
+    parser.add_argument("--pc-attack", type=int)
+    parser.add_argument("--pc-damage", type=float)
+    args = parser.parse_args()
+
+    tiles = TileManager(setting=args.setting)
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, seed=args.seed)
+    party = Party.for_level(args.players, args.level, hp=args.pc_hp, ac=args.pc_ac,
+                            attack_bonus=args.pc_attack, damage=args.pc_damage)
+    print(party)
+    rng = np.random.default_rng(args.seed)
+    tile_name = tiles.resolve_tile_name(args.tile) or args.tile
+    for _ in range(args.n):
+        encounter = generator.generate(tile_name, args.players, args.level, args.skull)
+        if encounter.empty:
+            continue
+        result = estimate(encounter, party, args.sims, rng=rng)
+        counts = ", ".join(f"{count} {name}" for name, count in _names(encounter))
+        print(f"{encounter.total_xp:>6} XP  {counts}\n        {result}")
+
+
+def _names(encounter):
+    return [(encounter.catalog[cid]["name"], count) for cid, count in encounter.counts]
+
+
+if __name__ == "__main__":
+    main()
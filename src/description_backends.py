@@ -0,0 +1,253 @@
+"""Text-generation backends behind AIDescription.
+
+A backend connects to one server and model and offers health(), generate(), stream() and batch():
+
+- OllamaBackend: the Ollama API through the ollama package (default, http://localhost:11434).
+- OllamaHTTPBackend ("ollama-http"): the same server through the slim client in src/ollama_http.py,
+  which skips the ollama package's import and per-response validation cost.
+- OpenAIBackend: any OpenAI-compatible server, e.g. llama.cpp's `llama-server` (http://localhost:8080).
+  Its continuous batching serves concurrent requests together, so batch() just keeps enough requests
+  in flight to fill its slots.
+
+Options use Ollama's names (num_predict, temperature, ...); each backend maps the ones it understands.
+"""
+import abc
+import json
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+# httpx and the ollama package are imported by the backends that use them, so picking the slim client
+# keeps both out of the process
+DEFAULT_MODEL = "gemma2:2b"  # the model used when none is given or autotuned
+DEFAULT_HOSTS = {"ollama": "http://localhost:11434", "ollama-http": "http://localhost:11434",
+                 "openai": "http://localhost:8080"}
+
+
+class BackendError(RuntimeError):
+    pass
+
+
+def _check_port(host, default_port):
+    url = urlparse(host)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.settimeout(2)
+    try:
+        result = sock.connect_ex((url.hostname, url.port or default_port))
+    finally:
+        sock.close()
+    if result != 0:
+        raise ConnectionError(f"Server not running on {url.hostname}:{url.port or default_port}")
+
+
+class DescriptionBackend(abc.ABC):
+    name = "base"
+    label = "backend"  # for messages
+
+    def __init__(self, model, host, timeout=60.0):
+        self.model = model
+        self.host = host
+        self.timeout = timeout
+
+    @abc.abstractmethod
+    def connect(self):
+        """Check the server is up and has the model; raises on failure."""
+
+    @abc.abstractmethod
+    def health(self):
+        """True if the server answers right now."""
+
+    @abc.abstractmethod
+    def models(self):
+        """Names of the models the server has."""
+
+    def loaded_models(self):
+        """Models the server has in memory right now, or None if it can't say."""
+        return None
+
+    @abc.abstractmethod
+    def generate(self, prompt, options=None):
+        """The whole completion for prompt."""
+
+    @abc.abstractmethod
+    def stream(self, prompt, options=None):
+        """Yields completion text as it is generated."""
+
+    def batch(self, prompts, options=None, max_workers=8):
+        """Completions for several prompts, in order, with up to max_workers requests in flight."""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda prompt: self.generate(prompt, options), prompts))
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.model!r}, {self.host!r})"
+
+
+class OllamaBackend(DescriptionBackend):
+    name = "ollama"
+    label = "Ollama"
+
+    def __init__(self, model, host=DEFAULT_HOSTS["ollama"], timeout=60.0):
+        super().__init__(model, host, timeout)
+        self.client = None
+
+    def _make_client(self):
+        import httpx
+        from ollama import Client
+        return Client(host=self.host, timeout=httpx.Timeout(self.timeout))
+
+    def connect(self):
+        _check_port(self.host, 11434)
+        self.client = self._make_client()
+        available_models = self.models()
+        if not available_models:
+            raise ValueError("No models found in Ollama")
+        if self.model not in available_models:
+            raise ValueError(f"Model '{self.model}' not found. Available models: {', '.join(available_models)}")
+        # Test connection (this also loads the model)
+        self.client.generate(model=self.model, prompt='Ping', stream=False, options={'num_predict': 1})
+
+    def health(self):
+        try:
+            self.client.ps()
+            return True
+        except Exception:
+            return False
+
+    def models(self):
+        names = []
+        for model in self.client.list().get('models', []):
+            name = getattr(model, 'model', '')
+            if name and name not in names:
+                names.append(name)  # Use full model name, e.g., gemma3:1b
+        return names
+
+    def loaded_models(self):
+        return [getattr(model, 'model', '') for model in self.client.ps().get('models', [])]
+
+    def generate(self, prompt, options=None):
+        response = self.client.generate(model=self.model, prompt=prompt, stream=False, options=options)
+        return response['response']
+
+    def stream(self, prompt, options=None):
+        for chunk in self.client.generate(model=self.model, prompt=prompt, stream=True, options=options):
+            if chunk.get('response'):
+                yield chunk['response']
+
+
+class OllamaHTTPBackend(OllamaBackend):
+    """OllamaBackend over src.ollama_http: plain dicts, pooled keep-alive connections, no pydantic."""
+
+    name = "ollama-http"
+
+    def _make_client(self):
+        from src.ollama_http import OllamaHTTPClient
+        return OllamaHTTPClient(self.host, timeout=self.timeout)
+
+    def models(self):
+        names = []
+        for model in self.client.list().get('models', []):
+            name = model.get('model') or model.get('name', '')
+            if name and name not in names:
+                names.append(name)
+        return names
+
+    def loaded_models(self):
+        return [model.get('model') or model.get('name', '') for model in self.client.ps().get('models', [])]
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+
+
+class OpenAIBackend(DescriptionBackend):
+    """An OpenAI-compatible /v1/chat/completions server (llama.cpp's llama-server, vLLM, LM Studio, ...)."""
+
+    name = "openai"
+    label = "OpenAI-compatible server"
+    # Ollama option -> OpenAI request field; the rest (num_ctx, num_thread, ...) are server flags there
+    OPTION_NAMES = {"num_predict": "max_tokens", "temperature": "temperature", "top_p": "top_p",
+                    "seed": "seed", "stop": "stop", "repeat_penalty": "repeat_penalty", "top_k": "top_k"}
+
+    def __init__(self, model, host=DEFAULT_HOSTS["openai"], timeout=60.0, api_key=None):
+        super().__init__(model, host, timeout)
+        import httpx
+        self._http_error = httpx.HTTPError
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        # One pooled keep-alive client shared by every thread
+        self.http = httpx.Client(base_url=host.rstrip("/"), timeout=httpx.Timeout(timeout), headers=headers,
+                                 limits=httpx.Limits(max_keepalive_connections=32, max_connections=64))
+
+    def connect(self):
+        _check_port(self.host, 8080)
+        available_models = self.models()
+        # llama-server serves exactly one model under whatever name it was started with
+        if available_models and self.model not in available_models and len(available_models) > 1:
+            raise ValueError(f"Model '{self.model}' not found. Available models: {', '.join(available_models)}")
+        self.generate('Ping', {'num_predict': 1})
+
+    def health(self):
+        try:
+            return self.http.get("/health").status_code == 200
+        except self._http_error:
+            return False
+
+    def models(self):
+        response = self.http.get("/v1/models")
+        response.raise_for_status()
+        return [m.get("id") for m in response.json().get("data", [])]
+
+    def _body(self, prompt, options, stream):
+        body = {"model": self.model, "messages": [{"role": "user", "content": prompt}], "stream": stream}
+        for key, value in (options or {}).items():
+            if key in self.OPTION_NAMES:
+                body[self.OPTION_NAMES[key]] = value
+        return body
+
+    def generate(self, prompt, options=None):
+        response = self.http.post("/v1/chat/completions", json=self._body(prompt, options, False))
+        if response.status_code != 200:
+            raise BackendError(f"{response.status_code}: {response.text[:200]}")
+        return response.json()["choices"][0]["message"]["content"]
+
+    def stream(self, prompt, options=None):
+        with self.http.stream("POST", "/v1/chat/completions", json=self._body(prompt, options, True)) as response:
+            if response.status_code != 200:
+                raise BackendError(f"{response.status_code}: {response.read()[:200]!r}")
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+
+    def close(self):
+        self.http.close()
+
+
+BACKENDS = {"ollama": OllamaBackend, "ollama-http": OllamaHTTPBackend, "openai": OpenAIBackend}
+
+
+def make_backend(kind, model, host=None, cassette=None, **kwargs):
+    """A backend for one server; a comma-separated host list gives a BackendPool of them.
+
+    With a Cassette (src/cassette.py) the backend's responses are recorded, or replayed with no server.
+    """
+    if cassette is not None:
+        from src.cassette import CassetteBackend
+        if cassette.mode == "replay":
+            return CassetteBackend(cassette, model=model)
+        return CassetteBackend(cassette, make_backend(kind, model, host, **kwargs))
+    if host and "," in host:
+        from src.backend_pool import BackendPool
+        return BackendPool(kind, model, [h.strip() for h in host.split(",") if h.strip()], **kwargs)
+    try:
+        cls = BACKENDS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown backend '{kind}'. Choose from: {', '.join(BACKENDS)}") from None
+    return cls(model, host or DEFAULT_HOSTS[kind], **kwargs)
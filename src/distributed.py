@@ -0,0 +1,482 @@
+"""Coordinator/worker batch generation for encounter banks too big for one machine.
+
+The coordinator splits a job list (every tile x level x party size, `--per` encounters each) into chunks
+and hands them to whichever worker asks next over a TCP or Unix socket. Workers run EncounterGenerator
+locally (with their own Ollama for descriptions if --local-ai) and send back Encounter.to_dict() rows.
+The coordinator writes results to one JSONL or RVE1 binary sink (src.encounter_codec) in job order, so
+the output doesn't depend on which worker did what: every job carries its own seed derived from --seed.
+
+A chunk in flight on a worker that disconnects or misses --chunk-timeout goes back to the front of the
+queue for the next worker. If no worker is left to finish the job (every local worker process has exited,
+or no worker has been connected for --idle-timeout seconds) the coordinator stops with an error instead of
+waiting forever. At the end it prints throughput per worker.
+
+Protocol: each message is a 4-byte big-endian length and a JSON object.
+    worker -> {"op": "hello", "worker", "setting", "catalog", "describe"}   catalog = fingerprint of the
+              creature list, describe = whether the worker can write descriptions (--local-ai)
+    coord  -> {"op": "config", "describe"}  or  {"op": "error", "message"}
+    worker -> {"op": "next"}
+    coord  -> {"op": "chunk", "id", "jobs": [[tile, players, level, skull, seed], ...]}  or  {"op": "done"}
+    worker -> {"op": "result", "id", "encounters": [...], "busy_ms"}, then "next" again
+
+    python -m src.distributed coordinator --listen 0.0.0.0:7700 --levels 1-20 --players 3-6 --per 200 --out bank.rve
+    python -m src.distributed worker --connect coord-host:7700 [--local-ai --model gemma2:2b]
+    python -m src.distributed local --workers 4 --levels 1-20 --players 3-6 --per 50 --out bank.jsonl
+"""
+import argparse
+import hashlib
+import json
+import os
+import queue
+import random
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.description_backends import DEFAULT_MODEL
+from src.encounter import Encounter
+from src.encounter_codec import BinaryWriter, dump_jsonl
+
+_LENGTH = struct.Struct(">I")
+
+
+def send_message(sock, message):
+    data = json.dumps(message, separators=(",", ":")).encode()
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+
+
+def recv_message(stream):
+    """The next message from a socket's binary makefile(), or None when the peer has closed it."""
+    header = stream.read(_LENGTH.size)
+    if len(header) < _LENGTH.size:
+        return None
+    length, = _LENGTH.unpack(header)
+    data = stream.read(length)
+    if len(data) < length:
+        return None
+    return json.loads(data)
+
+
+def parse_address(address):
+    """'unix:/path/to.sock' or 'host:port' -> (family, address)."""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[5:]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def catalog_fingerprint(catalog):
+    # Encounters refer to creatures by catalog index, so both ends must have loaded the same list
+    digest = hashlib.sha1()
+    for creature in catalog:
+        digest.update(f"{creature['name']}|{creature['cr']}|{creature['xp']}\n".encode())
+    return digest.hexdigest()
+
+
+def job_grid(tiles, levels, players, per=1, skull=False):
+    """Every (tile, players, level, skull) combination, each repeated `per` times."""
+    return [(tile, count, level, skull) for tile in tiles for level in levels for count in players
+            for _ in range(per)]
+
+
+# -- coordinator ----------------------------------------------------------------------------------
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.server.coordinator._serve_worker(self.request)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class Coordinator:
+    def __init__(self, generator, jobs, address, chunk_size=100, describe=False, seed=None, chunk_timeout=300.0,
+                 idle_timeout=600.0):
+        self.generator = generator
+        self.catalog = generator.creatures
+        self.fingerprint = catalog_fingerprint(self.catalog)
+        self.address = address
+        self.describe = describe
+        self.chunk_timeout = chunk_timeout
+        self.idle_timeout = idle_timeout  # seconds without a connected worker before giving up; None = wait
+        self.processes = []  # local worker processes; once they have all exited nothing more can arrive
+        seeder = random.Random(seed)
+        jobs = [list(job) + [seeder.getrandbits(64)] for job in jobs]
+        self.chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+        self.jobs = len(jobs)
+        self._pending = deque(range(len(self.chunks)))
+        self._finished = set()
+        self._cond = threading.Condition()
+        self._results = queue.Queue()
+        self.workers = {}  # name -> throughput stats
+        self._connected = 0  # accepted workers currently connected
+        self._idle_since = time.monotonic()
+        self._server = None
+
+    def _listen(self):
+        family, address = parse_address(self.address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(address):
+                os.unlink(address)
+            server = _UnixServer(address, _Handler)
+        else:
+            server = _TCPServer(address, _Handler)
+        server.coordinator = self
+        return server
+
+    def _take(self):
+        """The next chunk id, waiting while others are in flight (they may come back); None when all done."""
+        with self._cond:
+            while not self._pending:
+                if len(self._finished) == len(self.chunks):
+                    return None
+                self._cond.wait(1.0)
+            return self._pending.popleft()
+
+    def _requeue(self, chunk_id):
+        with self._cond:
+            if chunk_id not in self._finished:
+                self._pending.appendleft(chunk_id)
+                self._cond.notify()
+
+    def _complete(self, chunk_id, rows):
+        with self._cond:
+            if chunk_id in self._finished:
+                return False  # a retried chunk came back twice
+            self._finished.add(chunk_id)
+            self._cond.notify_all()
+        self._results.put((chunk_id, rows))
+        return True
+
+    def _serve_worker(self, sock):
+        stream = sock.makefile("rb")
+        hello = recv_message(stream)
+        if not hello or hello.get("op") != "hello":
+            return
+        name = hello.get("worker") or repr(sock.getpeername())
+        if hello.get("catalog") != self.fingerprint:
+            send_message(sock, {"op": "error", "message": f"worker loaded a different creature catalog than the "
+                                                          f"coordinator (setting '{self.generator.setting}')"})
+            print(f"Rejected worker {name}: catalog mismatch", file=sys.stderr)
+            return
+        if self.describe and not hello.get("describe"):
+            # Its rows would come back without descriptions, mixed in with described ones
+            send_message(sock, {"op": "error", "message": "coordinator wants descriptions (--describe); "
+                                                          "start the worker with --local-ai"})
+            print(f"Rejected worker {name}: can't describe", file=sys.stderr)
+            return
+        stats = self.workers.setdefault(name, {"chunks": 0, "encounters": 0, "lost": 0, "busy_s": 0.0})
+        send_message(sock, {"op": "config", "describe": self.describe})
+        sock.settimeout(self.chunk_timeout)
+        chunk_id = None
+        with self._cond:
+            self._connected += 1
+        try:
+            while True:
+                request = recv_message(stream)
+                if request is None:
+                    break
+                if request.get("op") == "result":
+                    if self._complete(request["id"], request["encounters"]):
+                        stats["chunks"] += 1
+                        stats["encounters"] += len(request["encounters"])
+                        stats["busy_s"] += request.get("busy_ms", 0.0) / 1000
+                    chunk_id = None
+                    continue
+                chunk_id = self._take()
+                if chunk_id is None:
+                    send_message(sock, {"op": "done"})
+                    break
+                send_message(sock, {"op": "chunk", "id": chunk_id, "jobs": self.chunks[chunk_id]})
+        except (OSError, ValueError):
+            pass  # lost or timed out; its chunk goes back below
+        finally:
+            if chunk_id is not None:
+                stats["lost"] += 1
+                print(f"Worker {name} lost chunk {chunk_id}; requeued", file=sys.stderr)
+                self._requeue(chunk_id)
+            with self._cond:
+                self._connected -= 1
+                if not self._connected:
+                    self._idle_since = time.monotonic()
+            stream.close()
+
+    def results(self):
+        """Yields every Encounter in job order as chunks arrive (out-of-order chunks wait in a buffer).
+
+        Raises RuntimeError when no worker is left that could send the missing chunks (see _check_workers).
+        """
+        waiting = {}
+        next_id = 0
+        while next_id < len(self.chunks):
+            try:
+                chunk_id, rows = self._results.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            waiting[chunk_id] = rows
+            while next_id in waiting:
+                for row in waiting.pop(next_id):
+                    yield Encounter.from_dict(row, self.catalog)
+                next_id += 1
+
+    def _check_workers(self):
+        with self._cond:
+            connected, idle = self._connected, time.monotonic() - self._idle_since
+            missing = len(self.chunks) - len(self._finished)
+        if connected:
+            return
+        # A connected worker's result may still be on its way; with none connected, nothing more can come
+        if self.processes:
+            if all(process.poll() is not None for process in self.processes):
+                codes = ", ".join(str(process.returncode) for process in self.processes)
+                raise RuntimeError(f"every local worker exited (exit codes {codes}) with {missing} of "
+                                   f"{len(self.chunks)} chunks unfinished")
+        elif self.idle_timeout is not None and idle > self.idle_timeout:
+            raise RuntimeError(f"no worker connected for {self.idle_timeout:g} s with {missing} of "
+                               f"{len(self.chunks)} chunks unfinished")
+
+    def start(self):
+        """Start accepting workers (run() does this if it hasn't been done)."""
+        if self._server is None:
+            self._server = self._listen()
+            threading.Thread(target=self._server.serve_forever, name="coordinator", daemon=True).start()
+        return self
+
+    def run(self, out_path, binary=None):
+        """Serve workers until every chunk is in out_path; returns the number of encounters written."""
+        binary = out_path.endswith(".rve") if binary is None else binary
+        self.start()
+        try:
+            with open(out_path, "wb" if binary else "w") as f:
+                if binary:
+                    return BinaryWriter(f).write_all(self.results())
+                return dump_jsonl(self.results(), f)
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+            family, address = parse_address(self.address)
+            if family == socket.AF_UNIX and os.path.exists(address):
+                os.unlink(address)
+
+    def report(self, elapsed):
+        lines = [f"{self.jobs} encounters in {len(self.chunks)} chunks, {elapsed:.2f} s "
+                 f"({self.jobs / max(elapsed, 1e-9):,.0f}/s overall)"]
+        for name, s in sorted(self.workers.items()):
+            rate = s["encounters"] / s["busy_s"] if s["busy_s"] else 0.0
+            lines.append(f"  {name:<28} {s['chunks']:>5} chunks {s['encounters']:>8} encounters  "
+                         f"busy {s['busy_s']:7.2f} s  {rate:10,.0f}/s busy  lost {s['lost']}")
+        return "\n".join(lines)
+
+
+# -- worker ---------------------------------------------------------------------------------------
+
+def _connect(address, wait):
+    family, addr = parse_address(address)
+    deadline = time.monotonic() + wait
+    while True:
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.connect(addr)
+            return sock
+        except OSError:
+            sock.close()
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.5)  # the coordinator may not be listening yet
+
+
+def run_worker(generator, address, name=None, describe_workers=4, wait=30.0):
+    """Take chunks from the coordinator until it says done; returns the number of encounters made."""
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    sock = _connect(address, wait)
+    stream = sock.makefile("rb")
+    made = 0
+    try:
+        send_message(sock, {"op": "hello", "worker": name, "setting": generator.setting,
+                            "catalog": catalog_fingerprint(generator.creatures), "describe": generator.local_ai})
+        config = recv_message(stream)
+        if config is None or config.get("op") == "error":
+            raise RuntimeError(config.get("message") if config else "coordinator closed the connection")
+        describe = config.get("describe")
+        if describe and not generator.local_ai:
+            raise RuntimeError("coordinator wants descriptions; start the worker with --local-ai")
+        executor = ThreadPoolExecutor(max_workers=describe_workers) if describe else None
+        while True:
+            send_message(sock, {"op": "next"})
+            message = recv_message(stream)
+            if message is None or message.get("op") != "chunk":
+                break
+            start = time.perf_counter()
+            encounters = [generator._build(generator.tiles.get_tile(tile), players, level, skull,
+                                           random.Random(seed), generator._trace_events())
+                          for tile, players, level, skull, seed in message["jobs"]]
+            if describe:
+                list(executor.map(lambda e: generator.describe(e, quiet=True),
+                                  [e for e in encounters if not e.empty and not e.fallback]))
+            busy_ms = (time.perf_counter() - start) * 1000
+            send_message(sock, {"op": "result", "id": message["id"], "busy_ms": busy_ms,
+                                "encounters": [e.to_dict() for e in encounters]})
+            made += len(encounters)
+        if executor is not None:
+            executor.shutdown()
+    finally:
+        stream.close()
+        sock.close()
+    return made
+
+
+# -- command line ---------------------------------------------------------------------------------
+
+def _int_range(text):
+    """'5' -> [5], '1-20' -> [1..20], '3,5,7' -> [3, 5, 7]."""
+    values = []
+    for part in text.split(","):
+        low, _, high = part.partition("-")
+        values.extend(range(int(low), int(high or low) + 1))
+    return values
+
+
+def _generator(args, local_ai=False):
+    from src.encounter_generator import EncounterGenerator
+    from src.tile_manager import TileManager
+
+    from src.cassette import from_args
+
+    tiles = TileManager(setting=args.setting)
+    return EncounterGenerator(tile_manager=tiles, setting=tiles.setting, local_ai=local_ai,
+                              model=getattr(args, "model", DEFAULT_MODEL), ai_backend=getattr(args, "backend", "ollama"),
+                              ai_host=getattr(args, "ai_host", None), ai_cassette=from_args(args) if local_ai else None)
+
+
+def _resolve_tiles(tile_manager, tile_inputs):
+    """Tile names for --tiles, matched like a campaign route: exact names first, then a unique substring.
+
+    Raises ValueError for a name that matches no tile or several, instead of generating encounters for a
+    tile the setting doesn't have.
+    """
+    names = tile_manager.get_available_tiles()
+    resolved = []
+    for tile_input in tile_inputs:
+        exact = [name for name in names if name.lower() == tile_input.lower()]
+        tile_name = exact[0] if exact else tile_manager.resolve_tile_name(tile_input)
+        if tile_name is None:
+            raise ValueError(f"Unknown or ambiguous tile '{tile_input}'. Available: {', '.join(names)}")
+        resolved.append(tile_name)
+    return resolved
+
+
+def _coordinate(args):
+    generator = _generator(args)
+    tiles = _resolve_tiles(generator.tiles, args.tiles) if args.tiles else generator.tiles.get_available_tiles()
+    jobs = job_grid(tiles, _int_range(args.levels), _int_range(args.players), args.per, args.skull)
+    coordinator = Coordinator(generator, jobs, args.listen, args.chunk, args.describe, args.seed, args.chunk_timeout,
+                              args.idle_timeout or None)
+    print(f"Coordinator on {args.listen}: {len(jobs)} encounters in {len(coordinator.chunks)} chunks -> {args.out}",
+          file=sys.stderr)
+    return coordinator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed encounter bank generation")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def job_options(p):
+        p.add_argument("--tiles", nargs="+", help="Default: every tile in the setting")
+        p.add_argument("--levels", default="1-20", help="e.g. 5, 1-20 or 3,5,7")
+        p.add_argument("--players", default="4", help="Party sizes, same syntax as --levels")
+        p.add_argument("--skull", action="store_true")
+        p.add_argument("--per", type=int, default=100, help="Encounters per tile/level/party combination")
+        p.add_argument("--chunk", type=int, default=200, help="Encounters per chunk handed to a worker")
+        p.add_argument("--chunk-timeout", type=float, default=300.0, help="Seconds before a silent worker's chunk is retried")
+        p.add_argument("--idle-timeout", type=float, default=600.0,
+                       help="Give up after this many seconds with no worker connected (0: wait forever)")
+        p.add_argument("--describe", action="store_true", help="Ask workers for descriptions (workers need --local-ai)")
+        p.add_argument("--seed", type=int, default=0)
+        p.add_argument("--out", required=True, help="Output file; .rve writes the binary format, anything else JSONL")
+
+    def worker_options(p):
+        p.add_argument("--local-ai", action="store_true")
+        p.add_argument("--model", default=DEFAULT_MODEL)
+        p.add_argument("--backend", choices=["ollama", "ollama-http", "openai"], default="ollama")
+        p.add_argument("--ai-host", default=None)
+        p.add_argument("--describe-workers", type=int, default=4, help="Descriptions generated at once")
+        tape = p.add_mutually_exclusive_group()
+        tape.add_argument("--record", metavar="PATH", help="Record description responses to a cassette (shared by workers)")
+        tape.add_argument("--replay", metavar="PATH", help="Serve descriptions from a recorded cassette")
+        p.add_argument("--replay-speed", type=float, default=1.0, help="1 as recorded, 0 no waiting")
+        p.add_argument("--replay-loose", action="store_true")
+
+    coordinator_parser = commands.add_parser("coordinator", help="Hand out chunks and write the results")
+    coordinator_parser.add_argument("--listen", default="127.0.0.1:7700", help="host:port or unix:/path")
+    job_options(coordinator_parser)
+
+    worker_parser = commands.add_parser("worker", help="Generate chunks for a coordinator")
+    worker_parser.add_argument("--connect", default="127.0.0.1:7700", help="host:port or unix:/path")
+    worker_parser.add_argument("--name", help="Default: hostname:pid")
+    worker_options(worker_parser)
+
+    local_parser = commands.add_parser("local", help="Coordinator plus N worker processes on this host")
+    local_parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    local_parser.add_argument("--listen", default=f"unix:/tmp/ravenloft-{os.getpid()}.sock")
+    job_options(local_parser)
+    worker_options(local_parser)
+    for p in (coordinator_parser, worker_parser, local_parser):
+        p.add_argument("--setting", default="ravenloft")
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        generator = _generator(args, local_ai=args.local_ai)
+        made = run_worker(generator, args.connect, args.name, args.describe_workers)
+        if generator.ai_cassette is not None:
+            generator.ai_cassette.close()
+        print(f"Worker done: {made} encounters", file=sys.stderr)
+        return
+
+    if args.command == "local" and args.describe and not args.local_ai:
+        parser.error("--describe needs --local-ai for the local workers")
+    try:
+        coordinator = _coordinate(args)
+    except ValueError as e:
+        parser.error(str(e))
+    processes = []
+    if args.command == "local":
+        command = [sys.executable, "-m", "src.distributed", "worker", "--connect", args.listen,
+                   "--setting", args.setting, "--model", args.model, "--backend", args.backend,
+                   "--describe-workers", str(args.describe_workers)]
+        command += ["--local-ai"] if args.local_ai else []
+        command += ["--ai-host", args.ai_host] if args.ai_host else []
+        command += ["--record", args.record] if args.record else []
+        command += ["--replay", args.replay, "--replay-speed", str(args.replay_speed)] if args.replay else []
+        command += ["--replay-loose"] if args.replay_loose else []
+        coordinator.start()
+        processes = [subprocess.Popen(command + ["--name", f"local-{i}"]) for i in range(args.workers)]
+        coordinator.processes = processes
+    start = time.perf_counter()
+    try:
+        written = coordinator.run(args.out)
+    except RuntimeError as e:
+        for process in processes:
+            process.kill()
+        sys.exit(f"Coordinator stopped: {e}")
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.wait()
+    print(f"Wrote {written} encounters to {args.out}", file=sys.stderr)
+    print(coordinator.report(elapsed), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class Encounter:
+    """One generated encounter. Creatures are stored as (catalog index, count) pairs."""
+    tile: str
+    tile_type: str
+    themes: tuple
+    players: int
+    level: int
+    skull: bool
+    counts: tuple = ()  # ((creature_id, count), ...), most numerous first
+    total_xp: int = 0
+    empty: bool = False  # the tile's event-chance roll came up empty
+    fallback: bool = False  # selection failed and _fallback_encounter was used
+    description: str = None
+    select_ms: float = field(default=0.0, compare=False)  # time spent rolling and selecting creatures
+    describe_ms: float = field(default=0.0, compare=False)  # time spent on the description
+    catalog: list = field(default=None, repr=False, compare=False)
+    theme_map: dict = field(default=None, repr=False, compare=False)  # the themes of the catalog's setting
+
+    @property
+    def creatures(self):
+        """(creature dict, count) pairs, resolved against the catalog the encounter was drawn from."""
+        return [(self.catalog[creature_id], count) for creature_id, count in self.counts]
+
+    @property
+    def creature_names(self):
+        """Every creature instance by name, as the description prompt expects."""
+        names = []
+        for creature, count in self.creatures:
+            names.extend([creature["name"]] * count)
+        return names
+
+    def to_dict(self, names=False):
+        """Plain-JSON form; names=True also spells out creature names for readers without the catalog."""
+        data = {
+            "tile": self.tile, "type": self.tile_type, "themes": list(self.themes),
+            "players": self.players, "level": self.level, "skull": self.skull,
+            "counts": [[creature_id, count] for creature_id, count in self.counts],
+            "total_xp": self.total_xp, "empty": self.empty, "fallback": self.fallback,
+            "description": self.description, "select_ms": self.select_ms, "describe_ms": self.describe_ms,
+        }
+        if names:
+            data["creatures"] = [[c["name"], count] for c, count in self.creatures]
+        return data
+
+    @classmethod
+    def from_dict(cls, data, catalog=None):
+        return cls(data["tile"], data["type"], tuple(data["themes"]), data["players"], data["level"],
+                   data["skull"], tuple((i, n) for i, n in data["counts"]), data["total_xp"],
+                   data["empty"], data["fallback"], data["description"],
+                   data.get("select_ms", 0.0), data.get("describe_ms", 0.0), catalog)
+
+    def render_text(self):
+        if self.empty:
+            return f"No encounter in {self.tile}, just eerie silence."
+        header = f"Encounter in {self.tile} ({self.tile_type}): {self.players} level-{self.level} PCs.\n"
+        if self.fallback:
+            if self.counts:
+                creature = self.creatures[0][0]
+                name, cr, xp = creature["name"], creature["cr"], creature["xp"]
+            else:
+                name, cr, xp = "Mimic", "2", 450
+            return (f"{header}- {name} (CR {cr}, {xp} XP)\n"
+                    f"DC 12 Wisdom save avoids fear.\nReward: Potion of healing\nTotal XP: {xp}")
+        encounter_text = "\n".join(f"{count} - {c['name']} (CR {c['cr']}, {c['xp']} XP)"
+                                   for c, count in self.creatures)
+        text = f"{header}{encounter_text}\nTotal XP: {self.total_xp}"
+        if self.description is not None:
+            text += f"\n\nDescription:\n{self.description}"
+        return text
+
+    def __str__(self):
+        return self.render_text()
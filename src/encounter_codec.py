@@ -0,0 +1,204 @@
+"""Bulk export formats for Encounter records.
+
+JSON lines: a header line {"catalog": [[name, cr, xp], ...]} followed by one Encounter.to_dict() per line.
+Encounters from another catalog (the generator switched settings) start a new header line.
+
+Binary (RVE1): a compact varint format. The header holds the creature catalog once; each record stores
+tile/type/theme strings as back-references into a string table built while writing, creature counts
+as (id, count) varints and timings in microseconds. Every encounter in a file must share that catalog.
+"""
+import json
+
+from src.encounter import Encounter
+
+MAGIC = b"RVE1"
+
+_SKULL, _EMPTY, _FALLBACK, _DESCRIPTION = 1, 2, 4, 8
+
+
+def _catalog_rows(catalog):
+    return [[c["name"], c["cr"], int(c["xp"])] for c in catalog or []]
+
+
+def _catalog_from_rows(rows):
+    return [{"name": name, "cr": cr, "xp": xp} for name, cr, xp in rows]
+
+
+# --- JSON lines ---------------------------------------------------------------
+
+def dump_jsonl(encounters, fp):
+    """Write encounters to a text file object; returns the number written."""
+    dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+    count = 0
+    catalog = None
+    for encounter in encounters:
+        # Creature ids index the catalog, so a different catalog needs its own header
+        if count == 0 or encounter.catalog is not catalog:
+            catalog = encounter.catalog
+            fp.write(dumps({"catalog": _catalog_rows(catalog)}) + "\n")
+        fp.write(dumps(encounter.to_dict()) + "\n")
+        count += 1
+    return count
+
+
+def load_jsonl(fp):
+    """Yield Encounters from a file written by dump_jsonl."""
+    catalog = None
+    for line in fp:
+        data = json.loads(line)
+        if "catalog" in data:
+            catalog = _catalog_from_rows(data["catalog"])
+            continue
+        yield Encounter.from_dict(data, catalog)
+
+
+# --- binary -------------------------------------------------------------------
+
+def _varint(value, out):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _text(value, out):
+    data = value.encode("utf-8")
+    _varint(len(data), out)
+    out += data
+
+
+class BinaryWriter:
+    """Streams encounters to a binary file object in the RVE1 format."""
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.count = 0
+        self._strings = {}
+        self._started = False
+        self._catalog = None
+
+    def _string(self, value, out):
+        # 0 introduces a new string inline; n > 0 refers back to string n - 1
+        index = self._strings.get(value)
+        if index is None:
+            self._strings[value] = len(self._strings)
+            out.append(0)
+            _text(value, out)
+        else:
+            _varint(index + 1, out)
+
+    def _header(self, catalog):
+        out = bytearray(MAGIC)
+        rows = _catalog_rows(catalog)
+        _varint(len(rows), out)
+        for name, cr, xp in rows:
+            _text(name, out)
+            _text(cr, out)
+            _varint(xp, out)
+        self.fp.write(out)
+        self._started = True
+        self._catalog = catalog
+
+    def write(self, encounter):
+        if not self._started:
+            self._header(encounter.catalog)
+        elif encounter.catalog is not self._catalog:
+            raise ValueError("RVE1 files hold one creature catalog; this encounter is from another one "
+                             "(write each setting to its own file, or use JSON lines)")
+        out = bytearray()
+        flags = ((_SKULL if encounter.skull else 0) | (_EMPTY if encounter.empty else 0)
+                 | (_FALLBACK if encounter.fallback else 0)
+                 | (_DESCRIPTION if encounter.description is not None else 0))
+        out.append(flags)
+        self._string(encounter.tile, out)
+        self._string(encounter.tile_type, out)
+        _varint(len(encounter.themes), out)
+        for theme in encounter.themes:
+            self._string(theme, out)
+        _varint(encounter.players, out)
+        _varint(encounter.level, out)
+        _varint(encounter.total_xp, out)
+        _varint(len(encounter.counts), out)
+        for creature_id, count in encounter.counts:
+            _varint(creature_id, out)
+            _varint(count, out)
+        _varint(int(encounter.select_ms * 1000), out)
+        _varint(int(encounter.describe_ms * 1000), out)
+        if encounter.description is not None:
+            _text(encounter.description, out)
+        self.fp.write(out)
+        self.count += 1
+
+    def write_all(self, encounters):
+        for encounter in encounters:
+            self.write(encounter)
+        if not self._started:
+            self._header([])
+        return self.count
+
+
+def dump_binary(encounters, fp):
+    return BinaryWriter(fp).write_all(encounters)
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def varint(self):
+        data, pos = self.data, self.pos
+        shift = result = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                self.pos = pos
+                return result
+            shift += 7
+
+    def text(self):
+        length = self.varint()
+        start = self.pos
+        self.pos += length
+        return str(self.data[start:self.pos], "utf-8")
+
+
+def load_binary(fp):
+    """Yield Encounters from a file written by dump_binary/BinaryWriter."""
+    data = fp.read()
+    if data[:4] != MAGIC:
+        raise ValueError("Not an RVE1 encounter file")
+    reader = _Reader(memoryview(data))
+    reader.pos = 4
+    catalog = []
+    for _ in range(reader.varint()):
+        name = reader.text()
+        cr = reader.text()
+        catalog.append({"name": name, "cr": cr, "xp": reader.varint()})
+    strings = []
+
+    def string():
+        index = reader.varint()
+        if index == 0:
+            strings.append(reader.text())
+            return strings[-1]
+        return strings[index - 1]
+
+    end = len(data)
+    while reader.pos < end:
+        flags = data[reader.pos]
+        reader.pos += 1
+        tile = string()
+        tile_type = string()
+        themes = tuple(string() for _ in range(reader.varint()))
+        players = reader.varint()
+        level = reader.varint()
+        total_xp = reader.varint()
+        counts = tuple((reader.varint(), reader.varint()) for _ in range(reader.varint()))
+        select_ms = reader.varint() / 1000
+        describe_ms = reader.varint() / 1000
+        description = reader.text() if flags & _DESCRIPTION else None
+        yield Encounter(tile, tile_type, themes, players, level, bool(flags & _SKULL), counts, total_xp,
+                        bool(flags & _EMPTY), bool(flags & _FALLBACK), description, select_ms, describe_ms, catalog)
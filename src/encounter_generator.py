@@ -1,80 +1,203 @@
 import random
-import json
-import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.description_backends import DEFAULT_MODEL
 from src.tile_manager import TileManager
+from src.encounter import Encounter
+from src.settings import available_settings, creature_notes, load_setting, setting_exists, thematic_pools
 from collections import Counter
 
+def _down_weight(weights, valid, penalty):
+    # Scale selection weights by EncounterHistory.penalty() so recently faced creatures come up less
+    return [w * penalty.get(c['name'], 1.0) for w, c in zip(weights, valid)]
+
+
 class EncounterGenerator:
-    def __init__(self, tile_manager, local_ai=False, model="gemma2:2b ", setting="ravenloft", debug=False):
+    def __init__(self, tile_manager, local_ai=False, model=DEFAULT_MODEL, setting="ravenloft", debug=False,
+                 rng=None, seed=None, ai_options=None, ai_backend="ollama", ai_host=None, trace=None, history=None,
+                 prompt_notes=False, ai_cassette=None):
         self.tiles = tile_manager
         self.local_ai = local_ai
         self.model = model
+        self.ai_options = ai_options  # extra Ollama options, e.g. from an autotune profile
+        self.ai_backend = ai_backend  # "ollama", "ollama-http" or "openai" (see src/description_backends.py)
+        self.ai_host = ai_host
+        self.ai_cassette = ai_cassette  # a Cassette to record descriptions to or replay them from
         self.setting = setting
         self.debug = debug
+        # Per-instance RNG so runs are reproducible; pass rng/seed to generate() for per-call streams
+        self.rng = rng if rng is not None else random.Random(seed)
+        # Optional SelectionTrace ring buffer; every built encounter leaves a structured record in it
+        self.trace = trace
+        # Optional EncounterHistory; creatures from the session's recent encounters are picked less often
+        self.history = history
+        # Add short creature notes (type, behavior) to description prompts, within the prompt token budget
+        self.prompt_notes = prompt_notes
         self.creatures = []
         self.theme_map = {}
+        self.creature_ids = {}
+        self._active = ([], {}, {}, {})  # (creatures, creature_ids, theme_map, theme pools), swapped as one
+        self._setting = None
+        self._ai = None
+        self._ai_lock = threading.Lock()
+        self._ai_status = None  # connection message from a quiet connect, printed by the next non-quiet call
 
         # Load creatures and themes at initialization
-        creatures_file = f"data/settings/{self.setting}/creatures.json"
-        themes_file = f"data/settings/{self.setting}/themes.json"
         try:
-            if self.debug:
-                print(f"Loading creatures from: {creatures_file}")
-            with open(creatures_file, "r") as f:
-                self.creatures = json.load(f)
-            if self.debug:
-                print(f"Successfully loaded creatures from: {creatures_file}")
+            self.use_setting(load_setting(self.setting, debug=self.debug))
         except Exception as e:
-            print(f"Failed to load creatures: {e}. Using empty creature list.")
-            self.creatures = []
+            print(f"Failed to load setting '{self.setting}': {e}. Using empty creature list and theme map.")
 
-        try:
-            if self.debug:
-                print(f"Loading themes from: {themes_file}")
-            with open(themes_file, "r") as f:
-                self.theme_map = json.load(f)
-            if self.debug:
-                print(f"Successfully loaded themes from: {themes_file}")
-        except Exception as e:
-            print(f"Failed to load themes: {e}. Using empty theme map.")
-            self.theme_map = {}
+    def use_setting(self, setting):
+        """Use a resolved Setting's creatures, themes and indices."""
+        self.setting = setting.name
+        self.creatures = setting.creatures
+        self.theme_map = setting.themes
+        self.creature_ids = setting.creature_ids
+        self._active = (setting.creatures, setting.creature_ids, setting.themes, setting.theme_pools)
+        self._setting = setting
+        if not self.creatures:
+            print(f"No creatures found for setting '{setting.name}'.")
+
+    def switch_setting(self, name):
+        """Switch this generator and its TileManager to another setting at runtime.
+
+        Settings come from the per-process LRU, so switching back to a recent one costs a dict lookup.
+        The AI client (and the model it keeps warm) is kept.
+        """
+        if not setting_exists(name):
+            raise ValueError(f"Unknown setting '{name}'. Available: {', '.join(available_settings())}")
+        setting = load_setting(name, debug=self.debug)
+        self.tiles.use_setting(setting)
+        self.use_setting(setting)
+        return setting
+
+    def _get_ai(self, quiet=False):
+        # One AIDescription per generator so the Ollama handshake happens once. A quiet caller (the
+        # encounter pool's thread) connects without printing over the prompt; the message waits for the
+        # next caller that may print.
+        with self._ai_lock:
+            if self._ai is None:
+                from src.ai_description import AIDescription
+                self._ai = AIDescription(model=self.model, host=self.ai_host, options=self.ai_options,
+                                         backend=self.ai_backend, cassette=self.ai_cassette, quiet=quiet)
+                self._ai_status = self._ai.status if quiet else None
+            elif self._ai_status is not None and not quiet:
+                print(self._ai_status)
+                self._ai_status = None
+            return self._ai
+
+    def generate(self, tile_name, players, level, skull=False, quiet=False, rng=None, seed=None, xp_scale=1.0):
+        """Generate one Encounter; str(encounter) gives the classic text output.
+
+        xp_scale multiplies the XP budget, as campaign pacing does.
+        """
+        if rng is None:
+            rng = random.Random(seed) if seed is not None else self.rng
+        return self._generate(tile_name, players, level, skull, quiet, rng, self._trace_events(), xp_scale)
+
+    def generate_many(self, jobs, max_workers=None, seed=None, quiet=True):
+        """Generate (tile_name, players, level[, skull]) jobs on a thread pool; results come back in job order.
+
+        With a seed, every job gets its own RNG derived from it, so results don't depend on scheduling.
+        """
+        jobs = [tuple(job) for job in jobs]
+        if seed is not None:
+            seeder = random.Random(seed)
+            seeds = [seeder.getrandbits(64) for _ in jobs]
+        else:
+            seeds = [None] * len(jobs)
+
+        def run(job, job_seed):
+            tile_name, players, level = job[:3]
+            skull = job[3] if len(job) > 3 else False
+            return self.generate(tile_name, players, level, skull, quiet=quiet, rng=random.Random(job_seed))
 
-    def generate(self, tile_name, players, level, skull=False):
-        tile = self.tiles.get_tile(tile_name)
-        if tile["type"] == "generic" and random.random() > tile.get("event_chance", 0.5):
-            return f"No encounter in {tile_name}, just eerie silence."
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(run, jobs, seeds))
 
+    def stream(self, params, **kwargs):
+        """Lazy iterator of Encounter records; see EncounterStream."""
+        from src.encounter_stream import EncounterStream
+        return EncounterStream(self, params, **kwargs)
+
+    def _trace_events(self):
+        # Event list for one encounter, or None when tracing is off
+        return [] if self.trace is not None else None
+
+    def _generate(self, tile_name, players, level, skull, quiet, rng, trace, xp_scale=1.0):
+        encounter = self._build(self.tiles.get_tile(tile_name), players, level, skull, rng, trace, xp_scale=xp_scale)
+        if self.local_ai and not encounter.empty and not encounter.fallback:
+            self.describe(encounter, quiet=quiet)
+        return encounter
+
+    def _build(self, tile, players, level, skull, rng, trace, pools=None, stats=None, xp_scale=1.0, active=None):
+        """Roll and select the creatures for one encounter; the description is left for describe().
+
+        xp_scale multiplies the XP budget (campaign pacing); 1.0 is the usual Medium encounter. Callers that
+        pass pools also pass the _active snapshot they were built from.
+        """
+        start = time.perf_counter()
+        tile_name = tile["name"]
         themes = tile.get("themes", ["dark"])
+        # Read the setting once so a concurrent switch_setting() can't mix two catalogs in one encounter
+        creatures, creature_ids, theme_map, pool_cache = self._active if active is None else active
+        if pools is None:
+            pools = self._pools_for(themes, creatures, theme_map, pool_cache)
+        encounter = Encounter(tile_name, tile["type"], tuple(themes), players, level, skull, catalog=creatures,
+                              theme_map=theme_map)
+        if tile["type"] == "generic" and rng.random() > tile.get("event_chance", 0.5):
+            encounter.empty = True
+            encounter.select_ms = (time.perf_counter() - start) * 1000
+            if trace is not None:
+                self.trace.push(tile_name, players, level, skull, 0, trace, 0, empty=True,
+                                elapsed_ms=encounter.select_ms)
+            return encounter
 
+        xp_budget = 0
         try:
             xp_budget = self._get_xp_budget(players, level, skull)
-            selected = self._select_monsters(self.creatures, xp_budget, themes, self.theme_map, skull, tile["type"])
+            if xp_scale != 1.0:
+                xp_budget = max(1, int(xp_budget * xp_scale))
+            selected = self._select_monsters(creatures, xp_budget, themes, theme_map, skull, tile["type"],
+                                             rng=rng, trace=trace, pools=pools, stats=stats)
             # Group and count creatures
-            creature_counts = Counter((c['name'], c['cr'], c['xp']) for c in selected)
+            creature_counts = Counter(creature_ids[c['name']] for c in selected)
             # Sort by count (descending), then by name for ties
-            sorted_counts = sorted(creature_counts.items(), key=lambda x: (-x[1], x[0][0]))
-            encounter_text = "\n".join(f"{count} - {name} (CR {cr}, {xp} XP)" 
-                                     for ((name, cr, xp), count) in sorted_counts)
-            total_xp = sum(int(c['xp']) for c in selected)
+            encounter.counts = tuple(sorted(creature_counts.items(),
+                                            key=lambda x: (-x[1], creatures[x[0]]['name'])))
+            encounter.total_xp = sum(int(c['xp']) for c in selected)
         except Exception as e:
             print(f"Creature data failed: {e}. Using fallback.")
-            return self._fallback_encounter(tile_name, players, level, tile)
+            self._fallback_encounter(encounter, rng, (creatures, creature_ids, theme_map, pool_cache))
+        encounter.select_ms = (time.perf_counter() - start) * 1000
+        if trace is not None:
+            self.trace.push(tile_name, players, level, skull, xp_budget, trace, encounter.total_xp,
+                            fallback=encounter.fallback, elapsed_ms=encounter.select_ms)
+        return encounter
 
-        if self.local_ai:
-            try:
-                from src.ai_description import AIDescription
-                ai = AIDescription(model=self.model)
-                creature_names = [c['name'] for c in selected]
-                description = ai.generate_description(tile_name, themes, creature_names)
-                return (f"Encounter in {tile_name} ({tile['type']}): {players} level-{level} PCs.\n"
-                        f"{encounter_text}\nTotal XP: {total_xp}\n\nDescription:\n{description}")
-            except Exception as e:
-                print(f"AI description failed: {e}. Skipping description.")
-                return (f"Encounter in {tile_name} ({tile['type']}): {players} level-{level} PCs.\n"
-                        f"{encounter_text}\nTotal XP: {total_xp}")
+    def describe(self, encounter, quiet=False, fresh=False, cancel=None):
+        """Fill in encounter.description with the local AI; only done when a caller asks for it.
 
-        return (f"Encounter in {tile_name} ({tile['type']}): {players} level-{level} PCs.\n"
-                f"{encounter_text}\nTotal XP: {total_xp}")
+        fresh=True (a description reroll) makes its own call instead of sharing an identical one in flight.
+        cancel is passed on to AIDescription.generate_description(); its DescriptionCancelled is re-raised.
+        """
+        from src.ai_description import DescriptionCancelled
+        start = time.perf_counter()
+        try:
+            ai = self._get_ai(quiet=quiet)
+            notes = creature_notes(self._setting) if self.prompt_notes and self._setting else None
+            encounter.description = ai.generate_description(encounter.tile, list(encounter.themes),
+                                                            encounter.creature_names, quiet=quiet, fresh=fresh,
+                                                            notes=notes, cancel=cancel)
+        except DescriptionCancelled:
+            raise
+        except Exception as e:
+            if not quiet:
+                print(f"AI description failed: {e}. Skipping description.")
+        encounter.describe_ms = (time.perf_counter() - start) * 1000
+        return encounter
 
     def _get_xp_budget(self, players, level, skull):
         # DMG XP thresholds for a "Medium" encounter per player
@@ -87,7 +210,29 @@ class EncounterGenerator:
         base_multiplier = 1.5 if skull else 1.0
         return int(medium_xp * base_multiplier)
 
-    def _select_monsters(self, creatures, xp_budget, themes, theme_map, skull, tile_type):
+    def _pools_for(self, themes, creatures, theme_map, pool_cache):
+        # Candidate lists are cached on the Setting, so they survive switching away and back
+        key = tuple(themes)
+        pools = pool_cache.get(key)
+        if pools is None:
+            pools = pool_cache[key] = self._thematic_pools(creatures, themes, theme_map)
+        return pools
+
+    def _thematic_pools(self, creatures, themes, theme_map):
+        """Candidate lists for a set of themes; they only depend on the tile, so callers can reuse them."""
+        return thematic_pools(creatures, themes, theme_map)
+
+    def _select_monsters(self, creatures, xp_budget, themes, theme_map, skull, tile_type, rng=None, trace=None,
+                         pools=None, stats=None):
+        """Pick creatures for xp_budget.
+
+        If a stats dict is passed it receives which paths the selection took; a trace list receives
+        selection_trace events.
+        """
+        rng = rng if rng is not None else self.rng
+        if pools is None:
+            pools = self._thematic_pools(creatures, themes, theme_map)
+        penalty = self.history.penalty() if self.history is not None else None
         selected = []
         current_xp = 0
         max_attempts = 50
@@ -96,31 +241,29 @@ class EncounterGenerator:
         max_monsters = 15
         attempts = 0
         selected_types = set()
+        off_theme_picks = 0  # picks that had to fall back to the whole catalog
+        final_picks = 0
+        half_fallback = False
 
         # Determine target number of unique creatures
-        target_unique = random.choices(
+        target_unique = rng.choices(
             [1, 2, 3, 4, 5],
             weights=[0.50, 0.41, 0.05, 0.03, 0.01],
             k=1
         )[0]
 
         # Get thematic creatures
-        thematic_names = set()
-        for theme in themes:
-            thematic_names.update(theme_map.get(theme, []))
-        thematic_creatures = [c for c in creatures if c["name"] in thematic_names]
-        if not thematic_creatures:
-            thematic_creatures = creatures
-            if self.debug:
-                print(f"No thematic creatures for themes {themes}, falling back to all creatures.")
-
-        if self.debug:
-            print(f"Thematic creatures for {tile_type}: {[c['name'] for c in thematic_creatures]}")
-            print(f"Target unique creatures: {target_unique}")
+        thematic_creatures = pools["thematic"]
+        if trace is not None:
+            trace.append(("pools", len(thematic_creatures), len(pools["big"]), len(pools["small"]),
+                          pools["all_creatures"]))
+            if pools["all_creatures"]:
+                trace.append(("fallback", "all_creatures", f"no creatures for themes {', '.join(themes)}"))
+            trace.append(("target", target_unique))
 
         # Handle different cases based on target_unique
         if target_unique <= 2:  # Single or pair of big creatures
-            big_creatures = [c for c in thematic_creatures if int(c['xp']) >= 200]  # Lowered threshold
+            big_creatures = pools["big"]
             if big_creatures:
                 for _ in range(target_unique):
                     if current_xp >= min_xp_target or len(selected) >= max_monsters:
@@ -134,20 +277,26 @@ class EncounterGenerator:
                                 (c['name'] in selected_types or len(selected_types) < target_unique)]
                         if not valid:
                             break
+                        off_theme_picks += 1
+                        if trace is not None:
+                            trace.append(("fallback", "off_theme", f"no big thematic creature <= {remaining_xp} XP"))
                     weights = [max(1, int(c['xp'])) for c in valid]  # Favor higher XP
-                    monster = random.choices(valid, weights=weights, k=1)[0]
+                    if penalty:
+                        weights = _down_weight(weights, valid, penalty)
+                    monster = rng.choices(valid, weights=weights, k=1)[0]
                     selected.append(monster)
                     selected_types.add(monster['name'])
                     current_xp += int(monster['xp'])
                     attempts += 1
-                    if self.debug:
-                        print(f"Selected {monster['name']} ({monster['xp']} XP), current total: {current_xp} XP")
+                    if trace is not None:
+                        trace.append(("pick", "big", monster['name'], monster['xp'], current_xp,
+                                      max_xp_target - current_xp))
 
         else:  # Group of 3, 4, or 5 creatures
             # Always start with a small group of creatures
-            small_creatures = [c for c in thematic_creatures if int(c['xp']) <= 200]
+            small_creatures = pools["small"]
             if small_creatures:
-                group_size = min(random.randint(3, 6), max_monsters - len(selected))
+                group_size = min(rng.randint(3, 6), max_monsters - len(selected))
                 small_group = []
                 for _ in range(group_size):
                     valid = [c for c in small_creatures if
@@ -155,13 +304,19 @@ class EncounterGenerator:
                     if not valid:
                         break
                     weights = [max(1, 1000 - int(c['xp'])) for c in valid]
-                    monster = random.choices(valid, weights=weights, k=1)[0]
+                    if penalty:
+                        weights = _down_weight(weights, valid, penalty)
+                    monster = rng.choices(valid, weights=weights, k=1)[0]
                     small_group.append(monster)
                     selected_types.add(monster['name'])
                 selected.extend(small_group)
+                if trace is not None:
+                    running = current_xp
+                    for monster in small_group:
+                        running += int(monster['xp'])
+                        trace.append(("pick", "small", monster['name'], monster['xp'], running,
+                                      max_xp_target - running))
                 current_xp += sum(int(c['xp']) for c in small_group)
-                if self.debug:
-                    print(f"Added group of small creatures: {[c['name'] for c in small_group]}, total XP: {current_xp}")
 
             # Continue adding to reach XP budget
             while current_xp < min_xp_target and len(selected) < max_monsters and attempts < max_attempts:
@@ -169,20 +324,24 @@ class EncounterGenerator:
                 valid = [c for c in thematic_creatures if int(c['xp']) <= remaining_xp and
                         (c['name'] in selected_types or len(selected_types) < target_unique)]
                 if not valid:
-                    if self.debug:
-                        print(f"No valid thematic creatures with XP <= {remaining_xp}, switching to all creatures.")
+                    if trace is not None:
+                        trace.append(("fallback", "off_theme", f"no thematic creature <= {remaining_xp} XP"))
                     valid = [c for c in creatures if int(c['xp']) <= remaining_xp and
                             (c['name'] in selected_types or len(selected_types) < target_unique)]
                     if not valid:
                         break
+                    off_theme_picks += 1
                 weights = [max(1, 500 - int(c['xp']) / 2) for c in valid]  # Favor medium XP
-                monster = random.choices(valid, weights=weights, k=1)[0]
+                if penalty:
+                    weights = _down_weight(weights, valid, penalty)
+                monster = rng.choices(valid, weights=weights, k=1)[0]
                 selected.append(monster)
                 selected_types.add(monster['name'])
                 current_xp += int(monster['xp'])
                 attempts += 1
-                if self.debug:
-                    print(f"Selected {monster['name']} ({monster['xp']} XP), current total: {current_xp} XP")
+                if trace is not None:
+                    trace.append(("pick", "fill", monster['name'], monster['xp'], current_xp,
+                                  max_xp_target - current_xp))
 
         # Final check to ensure XP budget is met
         while current_xp < min_xp_target:
@@ -191,36 +350,54 @@ class EncounterGenerator:
                     (c['name'] in selected_types or len(selected_types) < target_unique)]
             if not valid:
                 valid = [c for c in creatures if int(c['xp']) <= remaining_xp]
+                off_theme_picks += 1 if valid else 0
+                if valid and trace is not None:
+                    trace.append(("fallback", "off_theme", f"final check: no thematic creature <= {remaining_xp} XP"))
             if not valid:
                 break
             weights = [max(1, int(c['xp'])) for c in valid]  # Favor high XP
-            monster = random.choices(valid, weights=weights, k=1)[0]
+            if penalty:
+                weights = _down_weight(weights, valid, penalty)
+            monster = rng.choices(valid, weights=weights, k=1)[0]
             selected.append(monster)
             selected_types.add(monster['name'])
             current_xp += int(monster['xp'])
-            if self.debug:
-                print(f"Added final monster to meet XP: {monster['name']} ({monster['xp']} XP), total: {current_xp} XP")
+            final_picks += 1
+            if trace is not None:
+                trace.append(("pick", "final", monster['name'], monster['xp'], current_xp,
+                              max_xp_target - current_xp))
 
         if not selected or current_xp < min_xp_target / 2:  # Ensure at least half the budget
             valid = [c for c in creatures if int(c['xp']) <= xp_budget and int(c['xp']) >= 200]
             if valid:
-                monster = random.choice(valid)
+                monster = rng.choice(valid)
                 selected.append(monster)
-                if self.debug:
-                    print(f"Added fallback monster: {monster['name']} ({monster['xp']} XP)")
+                half_fallback = True
+                if trace is not None:
+                    trace.append(("fallback", "half_budget", f"{current_xp} XP < half of {min_xp_target}"))
+                    trace.append(("pick", "half_budget", monster['name'], monster['xp'],
+                                  current_xp + int(monster['xp']), max_xp_target - current_xp - int(monster['xp'])))
 
+        if stats is not None:
+            stats.update(target_unique=target_unique, xp_budget=xp_budget, attempts=attempts,
+                         final_picks=final_picks, off_theme_picks=off_theme_picks, half_fallback=half_fallback,
+                         all_creatures_pool=pools["all_creatures"])
         return selected
 
-    def _fallback_encounter(self, tile_name, players, level, tile):
-        max_cr = max(1, level)
-        valid_creatures = [c for c in self.creatures if float(c["cr"].replace("/", ".")) <= max_cr]
+    def _fallback_encounter(self, encounter, rng=None, active=None):
+        rng = rng if rng is not None else self.rng
+        # The same snapshot as the encounter's catalog, so the counts index into it
+        creatures, creature_ids = (self._active if active is None else active)[:2]
+        encounter.fallback = True
+        max_cr = max(1, encounter.level)
+        valid_creatures = [c for c in creatures if float(c["cr"].replace("/", ".")) <= max_cr]
         if not valid_creatures:
-            valid_creatures = self.creatures
+            valid_creatures = creatures
         if valid_creatures:
-            monster = random.choice(valid_creatures)
-            return (f"Encounter in {tile_name} ({tile['type']}): {players} level-{level} PCs.\n"
-                    f"- {monster['name']} (CR {monster['cr']}, {monster['xp']} XP)\n"
-                    f"DC 12 Wisdom save avoids fear.\nReward: Potion of healing\nTotal XP: {monster['xp']}")
-        return (f"Encounter in {tile_name} ({tile['type']}): {players} level-{level} PCs.\n"
-                f"- Mimic (CR 2, 450 XP)\n"
-                f"DC 12 Wisdom save avoids fear.\nReward: Potion of healing\nTotal XP: 450")
+            monster = rng.choice(valid_creatures)
+            encounter.counts = ((creature_ids[monster["name"]], 1),)
+            encounter.total_xp = int(monster["xp"])
+        else:
+            encounter.counts = ()
+            encounter.total_xp = 450  # Mimic
+        return encounter
@@ -0,0 +1,149 @@
+import random
+import threading
+from collections import deque
+
+from src.ai_description import DescriptionCancelled
+
+
+class EncounterPool:
+    """Keeps a few ready encounters per tile, generated in the background while the REPL is idle."""
+
+    def __init__(self, generator, tile_manager, players, level, size=2, seed=None):
+        self.generator = generator
+        self.tiles = tile_manager
+        self.players = players
+        self.level = level
+        self.size = max(0, size)
+        # The worker's own stream: background refills never draw from the REPL's generator.rng, and with a
+        # seed the pool builds the same encounters in the same refill order
+        self.rng = random.Random(None if seed is None else f"pool:{seed}")
+        self._ready = {}  # tile name -> deque of finished encounters
+        self._cond = threading.Condition()
+        self._epoch = 0  # bumped whenever pooled encounters become stale
+        self._foreground = 0  # real requests currently being served
+        self._working_on = None  # tile the worker is generating right now
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        if self.size == 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="encounter-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def configure(self, players, level):
+        """Change party size/level; everything pooled for the old party is dropped."""
+        with self._cond:
+            if players == self.players and level == self.level:
+                return
+            self.players = players
+            self.level = level
+            self._epoch += 1
+            self._ready.clear()
+            self._cond.notify_all()
+
+    def invalidate(self):
+        """Drop every pooled encounter, e.g. after the generator switched settings."""
+        with self._cond:
+            self._epoch += 1
+            self._ready.clear()
+            self._cond.notify_all()
+
+    def ready_count(self, tile_name):
+        with self._cond:
+            return len(self._ready.get(tile_name, ()))
+
+    def get(self, tile_name, skull=False):
+        """Return an encounter for tile_name, from the pool when one is ready."""
+        if self.size == 0 or skull:
+            # +skull encounters are rare, so they are never pooled
+            return self._generate_foreground(tile_name, skull)
+        with self._cond:
+            ready = self._ready.get(tile_name)
+            if not ready and self._working_on == (tile_name, self._epoch):
+                # The worker is already building this exact encounter; wait for it instead of duplicating the work
+                self._cond.wait_for(lambda: self._ready.get(tile_name) or self._working_on is None or self._stopped)
+                ready = self._ready.get(tile_name)
+            if ready:
+                encounter = ready.popleft()
+                self._cond.notify_all()  # Trigger a refill
+                return encounter
+        return self._generate_foreground(tile_name, skull)
+
+    def _generate_foreground(self, tile_name, skull):
+        with self._cond:
+            self._foreground += 1
+            players, level = self.players, self.level
+        try:
+            return self.generator.generate(tile_name, players, level, skull)
+        finally:
+            with self._cond:
+                self._foreground -= 1
+                self._cond.notify_all()
+
+    def _next_tile(self):
+        # Refill the emptiest tile first so every tile gets at least one ready encounter quickly
+        best = None
+        for tile_name in self.tiles.get_available_tiles():
+            count = len(self._ready.get(tile_name, ()))
+            if count < self.size and (best is None or count < best[0]):
+                best = (count, tile_name)
+        return best[1] if best else None
+
+    def _interrupted(self, epoch):
+        # A real request is waiting for the model, or the encounter being built is already stale
+        return self._foreground > 0 or epoch != self._epoch or self._stopped
+
+    def _run(self):
+        # An encounter whose describe gave way to a real request: (tile name, epoch, encounter). It is finished
+        # before anything else is built, so a seeded pool still builds the same encounters in the same order.
+        paused = None
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    if paused is not None and paused[1] != self._epoch:
+                        paused = None
+                    tile_name = None
+                    if not self._foreground:
+                        tile_name = paused[0] if paused is not None else self._next_tile()
+                    if tile_name is not None:
+                        break
+                    self._cond.wait()
+                epoch = self._epoch
+                players, level = self.players, self.level
+                self._working_on = (tile_name, epoch)
+            resumed, encounter = (True, paused[2]) if paused is not None else (False, None)
+            paused = None
+            try:
+                if not resumed:
+                    # Untraced: the trace buffer is for what the user asked for, and speculative builds would
+                    # push those records out
+                    encounter = self.generator._build(self.tiles.get_tile(tile_name), players, level, False,
+                                                      self.rng, None)
+                if self.generator.local_ai and not encounter.empty and not encounter.fallback:
+                    # Selection is cheap but the describe holds the model; a real request goes first
+                    if self._interrupted(epoch):
+                        raise DescriptionCancelled()
+                    self.generator.describe(encounter, quiet=True, cancel=lambda: self._interrupted(epoch))
+            except DescriptionCancelled:
+                paused, encounter = (tile_name, epoch, encounter), None
+            except Exception:
+                encounter = None
+            with self._cond:
+                self._working_on = None
+                # Results for a party that no longer exists are thrown away
+                if encounter is not None and epoch == self._epoch:
+                    self._ready.setdefault(tile_name, deque()).append(encounter)
+                self._cond.notify_all()
+                if encounter is None and paused is None:
+                    self._cond.wait(timeout=5)  # Back off instead of spinning on a broken generator
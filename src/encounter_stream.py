@@ -0,0 +1,66 @@
+import itertools
+import random
+
+
+def tile_cycle(tile_names, count=None):
+    """Yield tile names round-robin, forever or for count items."""
+    cycle = itertools.cycle(list(tile_names))
+    return cycle if count is None else itertools.islice(cycle, count)
+
+
+class EncounterStream:
+    """Lazily yields Encounter records from a stream of parameters.
+
+    Each item of params is a tile name (using the stream's players/level/skull) or a
+    (tile_name, players, level[, skull]) tuple. Nothing is generated until the consumer pulls
+    the next record, and nothing is kept between records except per-tile state (tile lookup and
+    thematic candidate lists) for the generator's current setting, so memory stays flat however long the
+    stream runs. A switch_setting() mid-stream takes effect from the next record.
+    Descriptions are only generated when describe=True or the consumer calls describe(encounter).
+    """
+
+    def __init__(self, generator, params, players=4, level=5, skull=False, describe=False, rng=None, seed=None):
+        self.generator = generator
+        self.params = params
+        self.players = players
+        self.level = level
+        self.skull = skull
+        self.auto_describe = describe
+        self.rng = rng if rng is not None else random.Random(seed)
+        self._tiles = {}  # tile name -> (tile, pools) for the generator's current setting, built on first use
+        self._active = None  # the generator's setting snapshot those were built from
+
+    def _tile_state(self, tile_name):
+        gen = self.generator
+        active = gen._active  # read once, so the tile's pools and the catalog _build uses always match
+        if active is not self._active:
+            self._tiles.clear()  # switched settings: the old setting's tiles and pools don't apply
+            self._active = active
+        state = self._tiles.get(tile_name)
+        if state is None:
+            creatures, _, theme_map, pool_cache = active
+            tile = gen.tiles.get_tile(tile_name)
+            pools = gen._pools_for(tile.get("themes", ["dark"]), creatures, theme_map, pool_cache)
+            state = self._tiles[tile_name] = (tile, pools)
+        return active, state
+
+    def __iter__(self):
+        gen = self.generator
+        for item in self.params:
+            if isinstance(item, str):
+                tile_name, players, level, skull = item, self.players, self.level, self.skull
+            else:
+                tile_name, players, level = item[:3]
+                skull = item[3] if len(item) > 3 else False
+            active, (tile, pools) = self._tile_state(tile_name)
+            encounter = gen._build(tile, players, level, skull, self.rng, gen._trace_events(), pools=pools,
+                                   active=active)
+            if self.auto_describe:
+                self.describe(encounter)
+            yield encounter
+
+    def describe(self, encounter):
+        """Generate the description for one record on demand (no-op for empty and fallback encounters)."""
+        if encounter.description is None and not encounter.empty and not encounter.fallback:
+            self.generator.describe(encounter, quiet=True)
+        return encounter
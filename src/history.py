@@ -0,0 +1,228 @@
+"""Optional SQLite history of the encounters a table actually ran.
+
+Every recorded encounter becomes one row in `encounters` plus one row per creature in
+`encounter_creatures`, indexed by session, tile and creature. The database runs in WAL mode so analytics
+queries never block the writer. record() only appends to a queue; a background thread writes whatever
+has queued up in one transaction, so the REPL never waits on the disk.
+
+The store also keeps an in-memory count of which creatures appeared in the session's last `recent`
+encounters. EncounterGenerator(history=...) turns that into selection weights (penalty()), so creatures
+the party has just faced come up less often without a query per pick.
+
+    history = EncounterHistory("history.sqlite", session="night-3")
+    generator = EncounterGenerator(tiles, history=history)
+    history.record(encounter)
+    history.record(rerolled, replaces_last=True)   # the table kept the reroll instead
+    history.creature_frequency(last=50)      # [(name, encounters, count), ...] most frequent first
+    history.session_xp()                     # XP awarded per session
+"""
+import contextlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS encounters (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    created REAL NOT NULL,
+    setting TEXT,
+    tile TEXT NOT NULL,
+    players INTEGER,
+    level INTEGER,
+    skull INTEGER,
+    total_xp INTEGER
+);
+CREATE TABLE IF NOT EXISTS encounter_creatures (
+    encounter_id INTEGER NOT NULL REFERENCES encounters(id),
+    session TEXT NOT NULL,
+    creature TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    xp INTEGER
+);
+CREATE INDEX IF NOT EXISTS encounters_session ON encounters(session, id);
+CREATE INDEX IF NOT EXISTS encounters_tile ON encounters(tile);
+CREATE INDEX IF NOT EXISTS creatures_creature ON encounter_creatures(creature);
+CREATE INDEX IF NOT EXISTS creatures_session ON encounter_creatures(session, encounter_id);
+"""
+
+
+def history_path():
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "ravenloft-encounters", "history.sqlite")
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # WAL keeps this crash-safe; only the last commit can be lost
+    return conn
+
+
+class EncounterHistory:
+    def __init__(self, path=None, session=None, recent=50, strength=1.0):
+        self.path = path or history_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.session = session or time.strftime("%Y-%m-%d %H:%M")
+        self.strength = strength  # weight = 1 / (1 + strength * recent appearances)
+        self._read = _connect(self.path)
+        self._read.executescript(SCHEMA)
+        self._read_lock = threading.Lock()
+        self._recent = deque(maxlen=recent)  # creature-name tuples of the session's last encounters
+        self._counts = Counter()
+        self._penalty = None  # cached {name: weight}, rebuilt after the counts change
+        self._counts_lock = threading.Lock()
+        self._last_kept = False  # whether the previous record() call was written (empty ones are not)
+        for names in self._load_recent(recent):
+            self._remember(names)
+        self._queue = queue.Queue()
+        self._last_id = None  # the writer's last inserted encounter id, for replaces_last
+        # In-memory databases are per connection, so those are written on the reading connection
+        self._write = self._read if self.path == ":memory:" else _connect(self.path)
+        self._writer = threading.Thread(target=self._drain, name="encounter-history", daemon=True)
+        self._writer.start()
+
+    # -- recording --------------------------------------------------------------------------------
+
+    def record(self, encounter, setting=None, replaces_last=False):
+        """Queue one encounter for writing and count its creatures at once; empty encounters are skipped.
+
+        replaces_last=True takes back the encounter from the previous record() call first, for a reroll or
+        swap the table ran instead of it, so only encounters the table kept are counted.
+        """
+        replace = replaces_last and self._last_kept
+        if encounter.empty or not encounter.counts:
+            row = creatures = names = None
+        else:
+            creatures = tuple((c["name"], count, int(c["xp"])) for c, count in encounter.creatures)
+            row = (self.session, time.time(), setting, encounter.tile, encounter.players, encounter.level,
+                   int(encounter.skull), encounter.total_xp)
+            names = tuple(name for name, _, _ in creatures)
+        self._last_kept = row is not None
+        if not replace and row is None:
+            return
+        self._remember(names, replace)
+        self._queue.put((row, creatures, replace))
+
+    def _remember(self, names, replace=False):
+        with self._counts_lock:
+            if replace:
+                self._counts.subtract(self._recent.pop())
+            elif names is not None and len(self._recent) == self._recent.maxlen:
+                self._counts.subtract(self._recent[0])
+            if names is not None:
+                self._recent.append(names)
+                self._counts.update(names)
+            self._penalty = None
+
+    def _drain(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            items = [item for item in batch if item is not None]
+            try:
+                if items:
+                    self._write_batch(items)
+            except sqlite3.Error as e:
+                print(f"Encounter history write failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, items):
+        lock = self._read_lock if self._write is self._read else contextlib.nullcontext()
+        with lock, self._write:  # one transaction per batch
+            for row, creatures, replace in items:
+                if replace and self._last_id is not None:
+                    self._write.execute("DELETE FROM encounter_creatures WHERE encounter_id = ?", (self._last_id,))
+                    self._write.execute("DELETE FROM encounters WHERE id = ?", (self._last_id,))
+                    self._last_id = None
+                if row is None:
+                    continue
+                cursor = self._write.execute(
+                    "INSERT INTO encounters (session, created, setting, tile, players, level, skull, total_xp) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+                encounter_id = self._last_id = cursor.lastrowid
+                self._write.executemany(
+                    "INSERT INTO encounter_creatures (encounter_id, session, creature, count, xp) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(encounter_id, row[0], name, count, xp) for name, count, xp in creatures])
+
+    def flush(self):
+        """Wait until everything recorded so far is in the database."""
+        self._queue.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        if self._write is not self._read:
+            self._write.close()
+        self._read.close()
+
+    # -- selection weights ------------------------------------------------------------------------
+
+    def penalty(self):
+        """{creature name: weight multiplier} for creatures in the session's recent encounters, or None."""
+        penalty = self._penalty
+        if penalty is None:
+            with self._counts_lock:
+                penalty = {name: 1.0 / (1.0 + self.strength * n) for name, n in self._counts.items() if n > 0}
+                self._penalty = penalty
+        return penalty or None
+
+    def _load_recent(self, last):
+        rows = self._read.execute(
+            "SELECT e.id, c.creature FROM encounter_creatures c JOIN encounters e ON e.id = c.encounter_id "
+            "WHERE e.id IN (SELECT id FROM encounters WHERE session = ? ORDER BY id DESC LIMIT ?) "
+            "ORDER BY e.id", (self.session, last)).fetchall()
+        encounters = {}
+        for encounter_id, creature in rows:
+            encounters.setdefault(encounter_id, []).append(creature)
+        return [tuple(names) for names in encounters.values()]
+
+    # -- analytics --------------------------------------------------------------------------------
+
+    def _query(self, sql, params=()):
+        self.flush()
+        with self._read_lock:
+            return self._read.execute(sql, params).fetchall()
+
+    def creature_frequency(self, session=None, last=50, limit=None):
+        """[(creature, encounters it appeared in, total count)] over a session's last `last` encounters."""
+        session = session or self.session
+        sql = ("SELECT creature, COUNT(*) AS encounters, SUM(count) FROM encounter_creatures "
+               "WHERE session = ? AND encounter_id IN "
+               "(SELECT id FROM encounters WHERE session = ? ORDER BY id DESC LIMIT ?) "
+               "GROUP BY creature ORDER BY encounters DESC, SUM(count) DESC, creature")
+        rows = self._query(sql, (session, session, last))
+        return rows[:limit] if limit else rows
+
+    def session_xp(self, session=None):
+        """[(session, encounters, total XP, first, last timestamp)], newest session first; or just one."""
+        sql = ("SELECT session, COUNT(*), SUM(total_xp), MIN(created), MAX(created) FROM encounters "
+               + ("WHERE session = ? " if session else "") + "GROUP BY session ORDER BY MAX(created) DESC")
+        return self._query(sql, (session,) if session else ())
+
+    def tile_counts(self, session=None):
+        """[(tile, encounters)] for a session (all sessions by default), most visited first."""
+        sql = ("SELECT tile, COUNT(*) FROM encounters " + ("WHERE session = ? " if session else "")
+               + "GROUP BY tile ORDER BY COUNT(*) DESC, tile")
+        return self._query(sql, (session,) if session else ())
+
+    def creature_sessions(self, creature):
+        """[(session, encounters)] in which a creature appeared."""
+        return self._query("SELECT session, COUNT(*) FROM encounter_creatures WHERE creature = ? "
+                           "GROUP BY session ORDER BY MAX(encounter_id) DESC", (creature,))
+
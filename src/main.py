@@ -1,21 +1,68 @@
 import argparse
 import sys
+import time
+from src import cassette, settings
+from src.description_backends import DEFAULT_MODEL
 from src.encounter_generator import EncounterGenerator
 from src.tile_manager import TileManager
+from src.encounter_pool import EncounterPool
+from src.settings_watcher import SettingsWatcher
+from src.selection_trace import SelectionTrace
 
 def main():
     parser = argparse.ArgumentParser(description="Castle Ravenloft Encounter Generator")
     parser.add_argument("--local-ai", action="store_true", help="Use local Ollama server for descriptions")
-    parser.add_argument("--model", type=str, default="gemma2:2b ", help="Ollama model to use with --local-ai (e.g., gemma2:2b , phi3:mini)")
+    parser.add_argument("--model", type=str, default=None, help=f"Ollama model to use with --local-ai (e.g., gemma2:2b, phi3:mini; default: autotune profile, else {DEFAULT_MODEL})")
+    parser.add_argument("--backend", choices=["ollama", "ollama-http", "openai"], default="ollama",
+                        help="Description server: Ollama (ollama-http: through the slim built-in client), or an OpenAI-compatible server such as llama.cpp's llama-server")
+    parser.add_argument("--ai-host", type=str, default=None,
+                        help="Server URL (default: http://localhost:11434 for ollama, http://localhost:8080 for openai); several comma-separated URLs are load-balanced with failover")
+    tape = parser.add_mutually_exclusive_group()
+    tape.add_argument("--record", metavar="PATH", help="Record every description response (and its timing) to a cassette file")
+    tape.add_argument("--replay", metavar="PATH", help="Serve descriptions from a recorded cassette instead of a server (src/cassette.py)")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="Replay timing: 1 as recorded, 2 twice as fast, 0 no waiting")
+    parser.add_argument("--replay-loose", action="store_true", help="Answer prompts missing from the cassette with the next unused recording")
+    parser.add_argument("--no-profile", action="store_true", help="Ignore the saved autotune profile (python -m src.autotune)")
     parser.add_argument("--numplayers", type=int, default=4, help="Number of players")
     parser.add_argument("--level", type=int, default=5, help="Player level")
     parser.add_argument("--setting", type=str, default="ravenloft", help="Game setting (e.g., ravenloft, generic)")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging for file loading")
+    parser.add_argument("--seed", type=int, default=None, help="Seed the encounter RNG for reproducible runs")
+    parser.add_argument("--settings-cache-mb", type=float, default=64, help="Memory bound for loaded settings kept for switching")
+    parser.add_argument("--watch", type=float, nargs="?", const=1.0, default=None, metavar="SECONDS",
+                        help="Reload the setting's JSON files when they change (polls every SECONDS, default 1)")
+    parser.add_argument("--trace-size", type=int, default=256, help="Encounters kept in the selection trace ('trace' at the prompt; 0 disables)")
+    parser.add_argument("--no-deadliness", action="store_true", help="Don't simulate how deadly each encounter is (needs NumPy)")
+    parser.add_argument("--history", nargs="?", const="", default=None, metavar="PATH",
+                        help="Record encounters in a SQLite history (default ~/.local/share/ravenloft-encounters/history.sqlite) and pick recently faced creatures less often")
+    parser.add_argument("--session", type=str, default=None, help="History session name (default: the start time)")
+    parser.add_argument("--prompt-notes", action="store_true", help="Add short creature notes to description prompts (kept within the prompt token budget)")
+    parser.add_argument("--pool-size", type=int, default=0, help="Encounters to pre-generate per tile while idle (0 disables)")
     args = parser.parse_args()
 
+    ai_options = None
+    if args.model is None:
+        args.model = DEFAULT_MODEL
+        profile = None
+        if args.local_ai and args.backend in ("ollama", "ollama-http") and not args.no_profile:
+            from src.autotune import DEFAULT_HOST, load_profile
+            profile = load_profile(args.ai_host or DEFAULT_HOST)
+        if profile:
+            args.model, ai_options = profile["model"], profile.get("options")
+            print(f"Using autotune profile: {args.model} {ai_options or ''}")
+    settings.configure_cache(max_bytes=int(args.settings_cache_mb * 1024 * 1024))
+    history = None
+    if args.history is not None:
+        from src.history import EncounterHistory
+        history = EncounterHistory(args.history or None, session=args.session)
+        print(f"Recording history to {history.path} (session: {history.session})")
     try:
         tiles = TileManager(setting=args.setting, debug=args.debug)
-        generator = EncounterGenerator(tile_manager=tiles, local_ai=args.local_ai, model=args.model, setting=tiles.setting, debug=args.debug)
+        generator = EncounterGenerator(tile_manager=tiles, local_ai=args.local_ai, model=args.model, setting=tiles.setting, debug=args.debug,
+                                       seed=args.seed, ai_options=ai_options,
+                                       trace=SelectionTrace(args.trace_size) if args.trace_size > 0 else None,
+                                       ai_backend=args.backend, ai_host=args.ai_host, history=history,
+                                       prompt_notes=args.prompt_notes, ai_cassette=cassette.from_args(args))
     except Exception as e:
         print(f"Failed to initialize EncounterGenerator: {e}")
         sys.exit(1)
@@ -24,6 +71,39 @@ def main():
     print(f"Castle Ravenloft Encounter Generator (Mode: {mode}, "
           f"{args.numplayers} players, level {args.level}, setting: {args.setting})")
 
+    estimate_deadliness = None
+    if not args.no_deadliness:
+        try:
+            import numpy as np
+            from src.deadliness import estimate as estimate_deadliness
+            deadliness_rng = np.random.default_rng(args.seed)
+        except ImportError:
+            pass  # NumPy is optional; encounters just print without the estimate
+
+    if generator.local_ai:
+        generator._get_ai()  # connect (and say so) here, not from the pool's thread mid-prompt
+    pool = EncounterPool(generator, tiles, args.numplayers, args.level, size=args.pool_size, seed=args.seed)
+    pool.start()
+
+    def reloaded(setting):
+        pool.invalidate()
+        changes = setting.changes
+        print(f"\nReloaded {', '.join(changes['files'])}: {changes['creatures']} creatures, "
+              f"{changes['themes']} themes, {changes['tiles']} tiles changed.")
+    watcher = SettingsWatcher(generator, interval=args.watch or 1.0, on_reload=reloaded)
+    if args.watch:
+        watcher.start()
+
+    def show(encounter, replaces_last=False):
+        print(encounter)
+        if history is not None:
+            # A reroll or swap replaces the encounter it was made from, so history only has the kept ones
+            history.record(encounter, setting=generator.setting, replaces_last=replaces_last)
+        if estimate_deadliness is not None and not encounter.empty and not encounter.fallback:
+            print(estimate_deadliness(encounter, rng=deadliness_rng))
+        print()
+
+    last = None  # the encounter shown last, for reroll/swap
     while True:
         available_tiles = tiles.get_available_tiles()
         print(f"Available tiles: {', '.join(available_tiles)} (add +skull for harder encounter)")
@@ -32,6 +112,82 @@ def main():
             break
         if tile_input == '?':
             continue  # Re-print available tiles on next loop
+        # 'players N' / 'level N' change the party; pooled encounters for the old party are dropped
+        command, _, value = tile_input.lower().partition(" ")
+        if command in ("players", "level") and value.strip().isdigit():
+            if command == "players":
+                args.numplayers = int(value)
+            else:
+                args.level = int(value)
+            pool.configure(args.numplayers, args.level)
+            print(f"Party is now {args.numplayers} level-{args.level} PCs.")
+            continue
+        # 'setting NAME' switches settings in place; recently used ones come from the settings LRU
+        if command == "setting" and value.strip():
+            start = time.perf_counter()
+            try:
+                generator.switch_setting(value.strip())
+            except Exception as e:
+                print(e)
+                continue
+            pool.invalidate()
+            elapsed_us = (time.perf_counter() - start) * 1e6
+            print(f"Setting is now {generator.setting} ({elapsed_us:.0f} us).")
+            continue
+        # 'trace [N]' shows the last N selections; 'trace json FILE' exports the whole buffer
+        if command == "trace":
+            if generator.trace is None:
+                print("Tracing is off (--trace-size 0).")
+            elif value.split()[:1] == ["json"]:
+                path = tile_input.split(None, 2)[2] if len(tile_input.split()) > 2 else "trace.json"
+                generator.trace.export_json(path)
+                print(f"Wrote {len(generator.trace)} traced selections to {path}")
+            else:
+                print(generator.trace.format(last=int(value) if value.strip().isdigit() else 5))
+            continue
+        # 'reroll desc' keeps the creatures, 'reroll' keeps the tile, 'swap [NAME]' replaces one creature group
+        if command in ("reroll", "swap"):
+            from src import reroll
+            if last is None:
+                print("Nothing to reroll yet.")
+                continue
+            try:
+                if command == "swap":
+                    result = reroll.swap_creature(generator, last, value.strip() or None)
+                elif value.strip() in ("desc", "description"):
+                    result = reroll.reroll_description(generator, last)
+                else:
+                    result = reroll.reroll_creatures(generator, last)
+            except ValueError as e:
+                print(e)
+                continue
+            last = result.encounter
+            show(last, replaces_last=True)
+            print(result)
+            print()
+            continue
+        if command == "reload":
+            try:
+                if watcher.check() is None:
+                    print("No setting files changed.")
+            except Exception as e:
+                print(f"Settings reload failed: {e}")
+            continue
+        # 'history' shows the session's most frequent recent creatures and XP awarded per session
+        if command == "history":
+            if history is None:
+                print("History is off (start with --history).")
+                continue
+            frequent = history.creature_frequency(last=50, limit=10)
+            print("Recent creatures: " + (", ".join(f"{name} x{n}" for name, n, _ in frequent) or "none yet"))
+            for session, encounters, xp, _, _ in history.session_xp()[:5]:
+                print(f"  {session}: {encounters} encounters, {xp} XP")
+            continue
+        if command == "settings":
+            cached = settings.cache_stats()["settings"]
+            print(", ".join(f"{name}*" if name in cached else name for name in settings.available_settings())
+                  + "  (* = loaded)")
+            continue
         # Parse +skull modifier
         skull = False
         if "+skull" in tile_input.lower():
@@ -41,9 +197,16 @@ def main():
         if tile_name is None:
             print("Invalid tile or ambiguous input. Please choose from the available tiles.")
             continue
-        encounter = generator.generate(tile_name, args.numplayers, args.level, skull)
-        print(encounter)
-        print()
+        last = pool.get(tile_name, skull)
+        show(last)
+
+    watcher.stop()
+    pool.stop()
+    if history is not None:
+        history.close()
+    if generator.ai_cassette is not None:
+        print(f"Cassette: {generator.ai_cassette.stats()}")
+        generator.ai_cassette.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,151 @@
+"""A slim Ollama client over the standard library's http.client.
+
+The ollama package imports httpx and pydantic and validates every response (and every streamed chunk)
+into models. This client speaks just the endpoints AIDescription needs (/api/tags, /api/ps and
+/api/generate) and hands back the plain dicts from json.loads. Connections are kept alive and pooled,
+one per concurrent caller, and streamed NDJSON is parsed a line at a time as it arrives.
+
+It mirrors the parts of ollama.Client that OllamaBackend and src.autotune call:
+
+    client = OllamaHTTPClient("http://localhost:11434")
+    client.list()["models"][0]["model"]
+    client.generate(model="gemma2:2b", prompt="...", options={"num_predict": 70})["response"]
+    for chunk in client.generate(model="gemma2:2b", prompt="...", stream=True):
+        print(chunk["response"], end="")
+"""
+import http.client
+import json
+import socket
+import threading
+from urllib.parse import urlparse
+
+
+class OllamaHTTPError(RuntimeError):
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+# A reused keep-alive connection the server has already closed fails with one of these on first use
+_STALE = (http.client.RemoteDisconnected, http.client.CannotSendRequest, BrokenPipeError, ConnectionResetError)
+
+
+class OllamaHTTPClient:
+    def __init__(self, host="http://localhost:11434", timeout=60.0, max_idle=8):
+        url = urlparse(host if "://" in host else f"http://{host}")
+        if url.scheme == "https":
+            self._connection_class = http.client.HTTPSConnection
+        else:
+            self._connection_class = http.client.HTTPConnection
+        self.host = host
+        self._address = (url.hostname or "localhost", url.port or (443 if url.scheme == "https" else 11434))
+        self._prefix = url.path.rstrip("/")
+        self.timeout = timeout
+        self._max_idle = max_idle
+        self._idle = []  # keep-alive connections not in use, most recent last
+        self._lock = threading.Lock()
+        self._headers = {"Content-Type": "application/json", "Accept": "application/json",
+                         "Connection": "keep-alive"}
+
+    # -- connection pool --------------------------------------------------------------------------
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        conn = self._connection_class(*self._address, timeout=self.timeout)
+        conn.connect()
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn, False
+
+    def _release(self, conn):
+        with self._lock:
+            if len(self._idle) < self._max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _request(self, method, path, body=None):
+        """(connection, response) with the body still unread; retries once on a stale pooled connection."""
+        data = json.dumps(body).encode() if body is not None else None
+        while True:
+            conn, reused = self._acquire()
+            try:
+                conn.request(method, self._prefix + path, body=data, headers=self._headers)
+                response = conn.getresponse()
+            except _STALE:
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if response.status >= 400:
+                detail = response.read()
+                self._finish(conn, response)
+                try:
+                    detail = json.loads(detail).get("error", detail)
+                except (ValueError, AttributeError):
+                    detail = detail[:200]
+                raise OllamaHTTPError(response.status, detail)
+            return conn, response
+
+    def _finish(self, conn, response):
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+
+    def _get_json(self, method, path, body=None):
+        conn, response = self._request(method, path, body)
+        try:
+            data = response.read()
+        except BaseException:
+            conn.close()
+            raise
+        self._finish(conn, response)
+        return json.loads(data)
+
+    # -- API --------------------------------------------------------------------------------------
+
+    def list(self):
+        return self._get_json("GET", "/api/tags")
+
+    def ps(self):
+        return self._get_json("GET", "/api/ps")
+
+    def generate(self, model, prompt="", stream=False, options=None, **fields):
+        """The final response dict, or with stream=True an iterator of chunk dicts as they arrive."""
+        body = {"model": model, "prompt": prompt, "stream": stream, **fields}
+        if options:
+            body["options"] = options
+        if not stream:
+            return self._get_json("POST", "/api/generate", body)
+        return self._stream("/api/generate", body)
+
+    def _stream(self, path, body):
+        conn, response = self._request("POST", path, body)
+        done = False
+        try:
+            # HTTPResponse.readline() undoes the chunked encoding, so each line is one NDJSON object
+            for line in response:
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise OllamaHTTPError(response.status, chunk["error"])
+                yield chunk
+            done = True
+        finally:
+            # Abandoned mid-stream: the rest of the body is still on the wire, so drop the connection
+            if done:
+                self._finish(conn, response)
+            else:
+                conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
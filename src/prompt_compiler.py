@@ -0,0 +1,127 @@
+"""Compile description prompts: counted creature groups, optional creature notes, a token budget.
+
+The prompt used to list every creature instance ("Skeleton, Skeleton, Skeleton, Skeleton, Zombie"), so a
+15-monster group spent most of its prompt on repetition. Here creatures are rendered once per kind with
+a count ("Skeleton x4, Zombie"). Short per-creature notes (type and behavior from creatures.json) can be
+added. They are trimmed and dropped, least numerous creature first, until the estimated prompt fits
+token_budget.
+
+Compiled prompts are cached by tile, themes and creature multiset, so a repeated mix costs a dict lookup.
+estimate_tokens() is a rough BPE-style count (words and punctuation, long words split every 4
+characters). bench/prompt_tokens.py checks it, and the savings, against the prompt_eval_count Ollama
+reports.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+DEFAULT_BUDGET = 200  # tokens for the whole prompt, notes included
+NOTE_WORDS = 12  # a note is cut to its first clause and at most this many words
+NOTES_PREFIX = "Notes: "
+
+TEMPLATE = (
+    "Describe a D&D 5e encounter in the {tile} with {themes} themes. "
+    "Include these monsters: {creatures}. "
+    "{notes}"
+    "Write one vivid paragraph of no more than 50 words describing the room and creatures as they appear. "
+    "Focus on atmosphere, senses, and monster behavior. Use present tense for an active, immersive narrative. "
+    "Do not list CR, XP, or select monsters. No external locations or narrative beyond the room. "
+    "Use 2014 D&D tone."
+)
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text):
+    return sum((len(piece) + 3) // 4 for piece in _PIECES.findall(text))
+
+
+def creature_groups(creature_names):
+    """[(name, count)] in first-appearance order (encounters list the most numerous first)."""
+    counts = {}
+    for name in creature_names:
+        counts[name] = counts.get(name, 0) + 1
+    return list(counts.items())
+
+
+def render_groups(groups):
+    return ", ".join(f"{name} x{count}" if count > 1 else name for name, count in groups)
+
+
+def trim_note(note, max_words=NOTE_WORDS):
+    clause = re.split(r"(?<=[.;])\s", note.strip(), maxsplit=1)[0].rstrip(".;")
+    words = clause.split()
+    return " ".join(words[:max_words])
+
+
+class CompiledPrompt:
+    __slots__ = ("text", "tokens", "notes", "notes_text")
+
+    def __init__(self, text, tokens, notes, notes_text=""):
+        self.text = text
+        self.tokens = tokens  # estimate_tokens(text)
+        self.notes = notes  # creatures whose notes made it into the prompt
+        self.notes_text = notes_text  # the "Notes: ..." part of text, "" without notes
+
+    def __repr__(self):
+        return f"CompiledPrompt({self.tokens} tokens, notes for {len(self.notes)})"
+
+
+class PromptCompiler:
+    def __init__(self, token_budget=DEFAULT_BUDGET, cache_size=512):
+        self.token_budget = token_budget
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, tile, themes, creature_names, notes=None):
+        """The prompt for an encounter; notes maps creature name -> (type, note) for the ones to describe."""
+        groups = tuple(creature_groups(creature_names))
+        used = tuple((name, notes[name]) for name, _ in groups if name in notes) if notes else ()
+        key = (tile, tuple(themes), groups, used)
+        with self._lock:
+            compiled = self._cache.get(key)
+            if compiled is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+        compiled = self._compile(tile, themes, groups, used)
+        with self._lock:
+            self._cache[key] = compiled
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return compiled
+
+    def _compile(self, tile, themes, groups, used):
+        fields = {"tile": tile, "themes": ", ".join(themes), "creatures": render_groups(groups)}
+        text = TEMPLATE.format(notes="", **fields)
+        tokens = estimate_tokens(text)
+        lines = []
+        for name, (kind, note) in used:
+            line = "; ".join(part for part in (kind, trim_note(note or "")) if part)
+            if not line:
+                continue
+            cost = estimate_tokens(f"{name}: {line}. ")
+            if not lines:
+                cost += estimate_tokens(NOTES_PREFIX)  # the first note brings the prefix with it
+            if tokens + cost > self.token_budget:
+                break  # groups come most numerous first, so the rarer creatures lose their notes
+            lines.append(f"{name}: {line}.")
+            tokens += cost
+        if not lines:
+            return CompiledPrompt(text, tokens, ())
+        notes_text = NOTES_PREFIX + " ".join(lines) + " "
+        text = TEMPLATE.format(notes=notes_text, **fields)
+        return CompiledPrompt(text, estimate_tokens(text), tuple(line.split(":", 1)[0] for line in lines), notes_text)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+def legacy_prompt(tile, themes, creature_names):
+    """The prompt as it was before compilation: every creature instance listed."""
+    return TEMPLATE.format(tile=tile, themes=", ".join(themes), creatures=", ".join(creature_names), notes="")
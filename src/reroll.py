@@ -0,0 +1,156 @@
+"""Partial rerolls of an encounter that only redo the half the DM didn't like.
+
+- reroll_description: same creatures, new description. Selection is skipped.
+- reroll_creatures: new creatures for the same tile and party. If that creature mix has been described
+  before, its cached description is reused and the LLM call is skipped.
+- swap_creature: replaces one creature group with a thematic creature worth about the same XP. The other
+  creatures stay; only the description (which names every creature) is redone, or taken from the cache.
+
+Each returns a Reroll whose str() reports the work that was redone and saved. Savings are estimated from
+the original encounter's select_ms and describe_ms.
+
+    result = reroll_creatures(generator, encounter)
+    print(result.encounter)
+    print(result)     # Rerolled creatures: selection 0.04 ms; description from cache; saved ~1840 ms
+"""
+import dataclasses
+import time
+from dataclasses import dataclass
+
+from src.settings import creature_notes
+
+MAX_MONSTERS = 15
+MAX_ROLLS = 20  # generic tiles can roll "no encounter"; a creature reroll keeps trying for one
+
+
+@dataclass(slots=True)
+class Reroll:
+    kind: str  # description | creatures | swap
+    encounter: object
+    selected: bool  # creature selection ran
+    described: bool  # the LLM was called
+    cached: bool  # the description came from the cache
+    saved_ms: float  # estimated time not spent, from the original encounter's timings
+    ms: float
+    note: str = ""
+
+    def __str__(self):
+        done = []
+        if self.selected:
+            done.append(f"selection {self.encounter.select_ms:.2f} ms")
+        if self.described:
+            done.append(f"LLM description {self.encounter.describe_ms:.0f} ms")
+        elif self.cached:
+            done.append("description from cache")
+        text = f"Rerolled {self.kind}{f' ({self.note})' if self.note else ''}: " + ("; ".join(done) or f"{self.ms:.2f} ms")
+        if self.saved_ms > 0:
+            text += f"; saved ~{self.saved_ms:.0f} ms" if self.saved_ms >= 10 else f"; saved ~{self.saved_ms:.2f} ms"
+        return text
+
+
+def _copy(encounter, **changes):
+    return dataclasses.replace(encounter, **changes)
+
+
+def _describe(generator, encounter, fresh=False):
+    """(described, cached) after giving encounter a description the way the generator would."""
+    if not generator.local_ai or encounter.empty or encounter.fallback:
+        return False, False
+    if not fresh:
+        ai = generator._get_ai()
+        notes = creature_notes(generator._setting) if generator.prompt_notes and generator._setting else None
+        cached = ai.cached_description(encounter.tile, list(encounter.themes), encounter.creature_names,
+                                       notes=notes)
+        if cached is not None:
+            encounter.description = cached
+            encounter.describe_ms = 0.0
+            return False, True
+    generator.describe(encounter, quiet=True, fresh=fresh)
+    return True, False
+
+
+def reroll_description(generator, encounter):
+    """Same creatures, new description."""
+    start = time.perf_counter()
+    if encounter.empty or not encounter.counts:
+        raise ValueError("Nothing to describe in this encounter")
+    if not generator.local_ai:
+        raise ValueError("Descriptions need --local-ai")
+    result = _copy(encounter, description=None, select_ms=0.0)
+    described, _ = _describe(generator, result, fresh=True)
+    return Reroll("description", result, False, described, False, encounter.select_ms,
+                  (time.perf_counter() - start) * 1000)
+
+
+def reroll_creatures(generator, encounter, rng=None):
+    """New creatures for the same tile and party; reuses a cached description if the mix repeats."""
+    start = time.perf_counter()
+    rng = rng or generator.rng
+    tile = generator.tiles.get_tile(encounter.tile)
+    for _ in range(MAX_ROLLS):
+        result = generator._build(tile, encounter.players, encounter.level, encounter.skull, rng,
+                                  generator._trace_events())
+        if not result.empty:
+            break
+    described, cached = _describe(generator, result)
+    saved = encounter.describe_ms if cached else 0.0
+    note = "same creatures as before" if result.counts == encounter.counts else ""
+    return Reroll("creatures", result, True, described, cached, saved, (time.perf_counter() - start) * 1000, note)
+
+
+def swap_creature(generator, encounter, name=None, rng=None):
+    """Replace one creature group (by name, or the least numerous) with a thematic one of similar XP."""
+    start = time.perf_counter()
+    rng = rng or generator.rng
+    if encounter.empty or not encounter.counts:
+        raise ValueError("No creatures to swap")
+    catalog = encounter.catalog
+    if name is None:
+        index = len(encounter.counts) - 1
+    else:
+        matches = [i for i, (cid, _) in enumerate(encounter.counts) if name.lower() in catalog[cid]["name"].lower()]
+        if len(matches) != 1:
+            names = ", ".join(catalog[cid]["name"] for cid, _ in encounter.counts)
+            raise ValueError(f"'{name}' matches {'nothing' if not matches else 'several creatures'}; choose from {names}")
+        index = matches[0]
+    old_id, old_count = encounter.counts[index]
+    old_xp = int(catalog[old_id]["xp"]) * old_count
+    rest = [pair for i, pair in enumerate(encounter.counts) if i != index]
+    rest_xp = encounter.total_xp - old_xp
+    rest_monsters = sum(count for _, count in rest)
+
+    # Aim for the same XP window the selector uses, with whatever the other creatures leave
+    budget = generator._get_xp_budget(encounter.players, encounter.level, encounter.skull)
+    low, high = int(budget * 0.8) - rest_xp, int(budget * 1.1) - rest_xp
+    kept = {cid for cid, _ in rest} | {old_id}
+    # The encounter may be from a setting the generator has since switched away from: use that setting's
+    # catalog and themes (an encounter read back from a file has no themes, so the current ones stand in)
+    ids = generator.creature_ids if catalog is generator.creatures else {c["name"]: i for i, c in enumerate(catalog)}
+    theme_map = encounter.theme_map if encounter.theme_map is not None else generator.theme_map
+    pools = generator._thematic_pools(catalog, encounter.themes, theme_map)
+    candidates = []
+    for pool in (pools["thematic"], catalog):
+        for creature in pool:
+            cid = ids.get(creature["name"])
+            xp = max(1, int(creature["xp"]))
+            if cid is None or cid in kept:
+                continue
+            count = max(1, min(MAX_MONSTERS - rest_monsters, round(old_xp / xp)))
+            if low <= count * xp <= high:
+                candidates.append((cid, count, xp))
+        if candidates:
+            break
+    if not candidates:
+        raise ValueError(f"No other creature fits {catalog[old_id]['name']}'s {old_xp} XP")
+    # Closest to the XP being replaced is likeliest
+    weights = [1.0 / (1 + abs(count * xp - old_xp)) for _, count, xp in candidates]
+    new_id, new_count, new_xp = rng.choices(candidates, weights=weights, k=1)[0]
+
+    counts = tuple(sorted(rest + [(new_id, new_count)], key=lambda x: (-x[1], catalog[x[0]]["name"])))
+    result = _copy(encounter, counts=counts, total_xp=rest_xp + new_count * new_xp, description=None,
+                   select_ms=0.0, describe_ms=0.0, fallback=False)
+    described, cached = _describe(generator, result)
+    saved = encounter.select_ms + (encounter.describe_ms if cached else 0.0)
+    note = (f"{old_count} {catalog[old_id]['name']} -> {new_count} {catalog[new_id]['name']}, "
+            f"kept {len(rest)} other group{'s' if len(rest) != 1 else ''}")
+    return Reroll("swap", result, False, described, cached, saved, (time.perf_counter() - start) * 1000, note)
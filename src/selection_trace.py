@@ -0,0 +1,96 @@
+"""Fixed-size ring buffer of structured monster-selection traces.
+
+Each generated encounter can leave one record: tile, party, XP budget, pool sizes, target_unique, every
+pick (phase, creature, XP, running total, XP left) and each fallback branch that fired. Events are plain
+tuples appended to a list while selecting and the record is pushed once at the end, so tracing costs a
+few appends per pick; with tracing off the selector only checks `trace is not None`.
+
+    trace = SelectionTrace(256)
+    generator = EncounterGenerator(tiles, trace=trace)
+    print(trace.format(last=5))
+    trace.export_json("trace.json")
+"""
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+# Event tuples recorded by EncounterGenerator._select_monsters:
+#   ("pools", thematic, big, small, all_creatures)
+#   ("target", target_unique)
+#   ("pick", phase, name, xp, total_xp, xp_left)      phase: big | small | fill | final | half_budget
+#   ("fallback", branch, detail)                       branch: all_creatures | off_theme | half_budget
+EVENT_FIELDS = {
+    "pools": ("thematic", "big", "small", "all_creatures"),
+    "target": ("target_unique",),
+    "pick": ("phase", "name", "xp", "total_xp", "xp_left"),
+    "fallback": ("branch", "detail"),
+}
+
+
+class SelectionTrace:
+    def __init__(self, size=256):
+        self._records = deque(maxlen=size)
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()  # only for snapshots; deque.append is already atomic
+
+    @property
+    def size(self):
+        return self._records.maxlen
+
+    def push(self, tile, players, level, skull, xp_budget, events, total_xp, empty=False, fallback=False,
+             elapsed_ms=0.0):
+        self._records.append((next(self._seq), time.time(), tile, players, level, skull, xp_budget,
+                              tuple(events), total_xp, empty, fallback, elapsed_ms))
+
+    def __len__(self):
+        return len(self._records)
+
+    def clear(self):
+        self._records.clear()
+
+    def records(self, last=None):
+        """The newest `last` records (all by default) as dicts, oldest first."""
+        with self._lock:
+            records = list(self._records)
+        if last is not None:
+            records = records[-last:] if last > 0 else []
+        return [_as_dict(record) for record in records]
+
+    def export_json(self, path, last=None):
+        with open(path, "w") as f:
+            json.dump({"size": self.size, "records": self.records(last)}, f, indent=1)
+        return path
+
+    def format(self, last=5):
+        lines = []
+        for r in self.records(last):
+            head = (f"#{r['seq']} {r['tile']} {r['players']}x L{r['level']}{' +skull' if r['skull'] else ''}: "
+                    f"budget {r['xp_budget']} XP")
+            if r["empty"]:
+                lines.append(f"{head} -> empty (event roll)")
+                continue
+            lines.append(f"{head} -> {r['total_xp']} XP{' (fallback)' if r['fallback'] else ''} "
+                         f"in {r['elapsed_ms']:.3f} ms")
+            for event in r["events"]:
+                kind = event["event"]
+                if kind == "pools":
+                    lines.append(f"    pools: {event['thematic']} thematic, {event['big']} big, {event['small']} small"
+                                 f"{' (whole catalog)' if event['all_creatures'] else ''}")
+                elif kind == "target":
+                    lines.append(f"    target unique: {event['target_unique']}")
+                elif kind == "pick":
+                    lines.append(f"    {event['phase']:<11} {event['name']} ({event['xp']} XP) -> "
+                                 f"{event['total_xp']} XP, {event['xp_left']} left")
+                else:
+                    lines.append(f"    fallback: {event['branch']} {event['detail']}")
+        return "\n".join(lines) if lines else "(no selections traced)"
+
+
+def _as_dict(record):
+    seq, wall, tile, players, level, skull, xp_budget, events, total_xp, empty, fallback, elapsed_ms = record
+    return {"seq": seq, "time": wall, "tile": tile, "players": players, "level": level, "skull": skull,
+            "xp_budget": xp_budget, "total_xp": total_xp, "empty": empty, "fallback": fallback,
+            "elapsed_ms": round(elapsed_ms, 4),
+            "events": [{"event": e[0], **dict(zip(EVENT_FIELDS[e[0]], e[1:]))} for e in events]}
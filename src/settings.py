@@ -0,0 +1,580 @@
+"""Layered game settings.
+
+A setting lives in data/settings/<name>/ and is built from layers, lowest first:
+
+1. An optional shared base catalog named in setting.json ("base": "srd5e" -> data/catalogs/srd5e/),
+   which can hold creatures.json, themes.json and tiles.json.
+2. Optional other settings to union ("union": ["ravenloft", "generic"]); theme lists are merged.
+3. The setting's own creatures.json / themes.json / tiles.json, which add or replace entries by key.
+4. Overlay operations from setting.json:
+       "creatures": {"add": [...], "override": [{"name": ..., "xp": ...}], "remove": ["name", ...]}
+       "themes":    {"add": {"undead": ["My Lich"]}, "override": {"dark": [...]}, "remove": ["theme", ...]}
+       "tiles":     {"add": [...], "override": [...], "remove": [...]}
+   creature/tile overrides update the named entry's fields; theme add appends names, override replaces the list.
+
+An optional theme_index.npz maps tile themes that themes.json lacks to creatures (see src/theme_index.py).
+creatures.json files are streamed into compact entries (name, cr, xp) by src/creature_loader.py.
+A setting without setting.json is just its own three files, as before. Parsed files and resolved settings
+are cached per process, so a base shared by several settings is parsed and indexed once and the very
+same creature list is handed to every setting that doesn't change it.
+
+reload_setting() re-parses only the files whose mtime/size changed and diffs the re-resolved entries
+against the loaded setting. The new Setting reuses every unchanged creature and tile dict, and only the
+creature_ids / tile_index entries and theme pools the diff touches are updated. Settings are never
+modified in place, so code holding the old one keeps a consistent snapshot.
+"""
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from src import theme_index
+from src.creature_loader import compact_creature, load_creatures
+
+SETTINGS_DIR = "data/settings"
+CATALOGS_DIR = "data/catalogs"
+DEFAULT_SETTING = "ravenloft"
+
+_lock = threading.RLock()
+_files = {}  # path -> parsed JSON (shared between settings)
+_catalogs = {}  # id(creature list) -> (creature list, name index), for lists a cached setting still uses
+_signatures = {}  # path -> (mtime_ns, size) when it was parsed
+
+
+class Setting:
+    """A resolved setting: creatures, themes and tiles plus the indices the generator uses."""
+
+    def __init__(self, name, creatures, themes, tiles, files, creature_ids=None, tile_index=None):
+        self.name = name
+        self.creatures = creatures
+        self.creature_ids = _creature_index(creatures) if creature_ids is None else creature_ids
+        self.themes = themes
+        self.tiles = tiles
+        self.tile_index = {tile["name"].lower(): tile for tile in tiles} if tile_index is None else tile_index
+        self.files = files  # every file this setting was built from
+        self.theme_pools = {}  # tuple(themes) -> thematic_pools(), filled in by the generator
+        self.inferred_themes = frozenset()  # themes filled in from theme_index.npz
+        self.changes = None  # set by reload_setting(): what differs from the setting it replaced
+        self.notes = None  # {name: (type, notes)}, read on first use by creature_notes()
+
+    def __repr__(self):
+        return (f"Setting({self.name!r}, {len(self.creatures)} creatures, {len(self.themes)} themes, "
+                f"{len(self.tiles)} tiles)")
+
+
+def _deep_size(obj, seen=None):
+    """Approximate bytes held by nested lists/dicts/strings (shared objects counted once)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_size(v, seen) for v in obj)
+    return size
+
+
+class SettingsCache:
+    """LRU of resolved settings, bounded by approximate memory and entry count.
+
+    The most recently used setting is never evicted, however large. Evicting a setting also drops
+    parsed files and creature name indices that no remaining setting uses. Settings share catalogs, so
+    total_bytes() counts every shared object once rather than adding up each setting's size.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=8):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._bytes = None  # total_bytes(), until the entries change
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, name, count=True):
+        """The cached setting or None; count=False leaves the hit/miss counters alone."""
+        setting = self._entries.get(name)
+        if setting is None:
+            self.misses += count
+            return None
+        self._entries.move_to_end(name)
+        self.hits += count
+        return setting
+
+    def put(self, name, setting):
+        self._entries[name] = setting
+        self._entries.move_to_end(name)
+        self._bytes = None
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self.total_bytes() > self.max_bytes):
+            _, setting = self._entries.popitem(last=False)
+            self._bytes = None
+            self.evictions += 1
+            in_use = {path for other in self._entries.values() for path in other.files}
+            for path in setting.files:
+                if path not in in_use:
+                    _files.pop(path, None)
+                    _signatures.pop(path, None)
+        self._prune_catalogs()
+
+    def _prune_catalogs(self):
+        # Name indices are shared through _catalogs; keep only those of creature lists still cached
+        live = {id(setting.creatures) for setting in self._entries.values()}
+        for key in [key for key in _catalogs if key not in live]:
+            del _catalogs[key]
+
+    def total_bytes(self):
+        if self._bytes is None:
+            parts = [(s.creatures, s.themes, s.tiles) for s in self._entries.values()]
+            # One walk over everything, so objects shared between settings are counted once
+            self._bytes = _deep_size(parts) - sys.getsizeof(parts)
+        return self._bytes
+
+    def names(self):
+        return list(self._entries)
+
+    def peek(self, name):
+        return self._entries.get(name)
+
+    def drop(self, name):
+        if self._entries.pop(name, None) is not None:
+            self._bytes = None
+            self._prune_catalogs()
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = None
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        return {"settings": self.names(), "bytes": self.total_bytes(), "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+_settings = SettingsCache()
+
+
+def configure_cache(max_bytes=None, max_entries=None):
+    with _lock:
+        if max_bytes is not None:
+            _settings.max_bytes = max_bytes
+        if max_entries is not None:
+            _settings.max_entries = max_entries
+        _settings._evict()
+
+
+def cache_stats():
+    with _lock:
+        return _settings.stats()
+
+
+def _creature_index(creatures):
+    # Settings that share a creature list share its index too
+    entry = _catalogs.get(id(creatures))
+    if entry is None or entry[0] is not creatures:
+        entry = _catalogs[id(creatures)] = (creatures, {c["name"]: i for i, c in enumerate(creatures)})
+    return entry[1]
+
+
+def _read(path, loader=None):
+    """Parse a JSON file once per process (with loader(path) if given); returns None if it doesn't exist."""
+    with _lock:
+        if path in _files:
+            return _files[path]
+    signature = _signature(path)  # taken before reading, so a write during the read shows up next poll
+    if signature is None:
+        return None
+    if loader is not None:
+        data = loader(path)
+    else:
+        with open(path, "r") as f:
+            data = json.load(f)
+    with _lock:
+        if path not in _files:
+            _signatures[path] = signature
+        return _files.setdefault(path, data)
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def setting_exists(name):
+    return os.path.isdir(os.path.join(SETTINGS_DIR, name))
+
+
+def available_settings():
+    if not os.path.isdir(SETTINGS_DIR):
+        return []
+    return sorted(name for name in os.listdir(SETTINGS_DIR) if setting_exists(name))
+
+
+def _merge_entries(entries, layer, key="name"):
+    """entries + layer, replacing entries with the same key in place.
+
+    Returns entries itself when the layer changes nothing, so an unchanged catalog stays shared.
+    """
+    if not layer:
+        return entries
+    merged = None
+    positions = {e[key]: i for i, e in enumerate(entries)}
+    for entry in layer:
+        i = positions.get(entry[key])
+        if i is not None and (entries if merged is None else merged)[i] == entry:
+            continue
+        if merged is None:
+            merged = list(entries)
+        if i is None:
+            positions[entry[key]] = len(merged)
+            merged.append(entry)
+        else:
+            merged[i] = entry
+    return entries if merged is None else merged
+
+
+def _union_lists(*lists):
+    seen = {}
+    for names in lists:
+        for name in names:
+            seen.setdefault(name, None)
+    return list(seen)
+
+
+def _apply_entry_ops(entries, ops, kind, setting, key="name"):
+    if not ops:
+        return entries
+    entries = _merge_entries(entries, ops.get("add"), key)
+    overrides = ops.get("override") or []
+    if overrides:
+        entries = list(entries)
+        positions = {e[key]: i for i, e in enumerate(entries)}
+        for change in overrides:
+            i = positions.get(change.get(key))
+            if i is None:
+                print(f"Setting '{setting}': cannot override unknown {kind} '{change.get(key)}'")
+                continue
+            entries[i] = {**entries[i], **change}
+    removed = set(ops.get("remove") or [])
+    if removed:
+        entries = [e for e in entries if e[key] not in removed]
+    return entries
+
+
+def _apply_theme_ops(themes, ops):
+    if not ops:
+        return themes
+    themes = dict(themes)
+    for theme, names in (ops.get("add") or {}).items():
+        themes[theme] = _union_lists(themes.get(theme, []), names)
+    themes.update(ops.get("override") or {})
+    for theme in ops.get("remove") or []:
+        themes.pop(theme, None)
+    return themes
+
+
+def _resolve(name, debug=False, stack=()):
+    creatures, themes, tiles, files, inferred = _resolve_entries(name, debug, stack)
+    setting = Setting(name, creatures, themes, tiles, files)
+    setting.inferred_themes = frozenset(inferred)
+    return setting
+
+
+def _resolve_entries(name, debug=False, stack=()):
+    """The layered creatures, themes and tiles for a setting, plus its files and the inferred themes."""
+    if name in stack:
+        raise ValueError(f"Setting '{name}' includes itself via {' -> '.join(stack)}")
+    directory = os.path.join(SETTINGS_DIR, name)
+    manifest = _read(os.path.join(directory, "setting.json")) or {}
+    files = []
+    creatures, themes, tiles = [], {}, []
+
+    base = manifest.get("base")
+    if base:
+        base_dir = os.path.join(CATALOGS_DIR, base)
+        if not os.path.isdir(base_dir):
+            raise FileNotFoundError(f"Base catalog '{base}' not found in {CATALOGS_DIR}")
+        for kind in ("creatures", "themes", "tiles"):
+            path = os.path.join(base_dir, f"{kind}.json")
+            data = _read(path, load_creatures if kind == "creatures" else None)
+            if data is None:
+                continue
+            files.append(path)
+            if kind == "creatures":
+                creatures = data
+            elif kind == "themes":
+                themes = data
+            else:
+                tiles = data
+
+    for other in manifest.get("union") or []:
+        part = load_setting(other, debug=debug, _stack=stack + (name,))
+        files.extend(f for f in part.files if f not in files)
+        creatures = _merge_entries(creatures, part.creatures) if creatures else part.creatures
+        tiles = _merge_entries(tiles, part.tiles) if tiles else part.tiles
+        merged = dict(themes)
+        for theme, names in part.themes.items():
+            merged[theme] = _union_lists(merged.get(theme, []), names)
+        themes = merged
+
+    for kind in ("creatures", "themes", "tiles"):
+        path = os.path.join(directory, f"{kind}.json")
+        if not os.path.exists(path):
+            continue
+        if debug:
+            print(f"Loading {kind} from: {path}")
+        data = _read(path, load_creatures if kind == "creatures" else None)
+        files.append(path)
+        if debug:
+            print(f"Successfully loaded {kind} from: {path}")
+        if kind == "creatures":
+            creatures = _merge_entries(creatures, data) if creatures else data
+        elif kind == "themes":
+            themes = {**themes, **data} if themes else data
+        else:
+            tiles = _merge_entries(tiles, data) if tiles else data
+
+    creature_ops = manifest.get("creatures")
+    if creature_ops and creature_ops.get("add"):
+        creature_ops = {**creature_ops, "add": [compact_creature(c) for c in creature_ops["add"]]}
+    creatures = _apply_entry_ops(creatures, creature_ops, "creature", name)
+    themes = _apply_theme_ops(themes, manifest.get("themes"))
+    tiles = _apply_entry_ops(tiles, manifest.get("tiles"), "tile", name)
+
+    # Tile themes that themes.json doesn't map get their nearest creatures from the embedding index
+    inferred = {}
+    index_path = os.path.join(directory, theme_index.INDEX_FILE)
+    if os.path.exists(index_path):
+        try:
+            index = _read(index_path, theme_index.load)
+        except ImportError:
+            index = None  # No NumPy: those themes fall back to the whole catalog, as before
+            if debug:
+                print(f"NumPy not installed; ignoring {index_path}")
+        if index is not None:
+            files.append(index_path)
+            inferred = theme_index.fill_unmapped(index, themes, creatures, tiles)
+            themes = {**themes, **inferred}
+    if manifest:
+        files.insert(0, os.path.join(directory, "setting.json"))
+    return creatures, themes, tiles, files, inferred
+
+
+def load_setting(name, debug=False, _stack=()):
+    """Resolve a setting, reusing the LRU copy when there is one. Unknown settings fall back to ravenloft."""
+    # Only the setting asked for counts as a cache hit or miss, not the layers it's built from
+    top = not _stack
+    with _lock:
+        setting = _settings.get(name, count=False)
+        if setting is not None:
+            _settings.hits += top
+            return setting
+    if not setting_exists(name):
+        if debug:
+            print(f"Setting '{name}' not found, falling back to {DEFAULT_SETTING}")
+        name = DEFAULT_SETTING
+    with _lock:
+        setting = _settings.get(name, count=top)
+        if setting is None:
+            setting = _resolve(name, debug, _stack)
+            _settings.put(name, setting)
+        return setting
+
+
+def watched_files(setting):
+    """Files whose changes affect a setting: the ones it was built from plus its own files that may appear."""
+    directory = os.path.join(SETTINGS_DIR, setting.name)
+    own = [os.path.join(directory, f"{kind}.json") for kind in ("setting", "creatures", "themes", "tiles")]
+    own.append(os.path.join(directory, theme_index.INDEX_FILE))
+    return list(dict.fromkeys(setting.files + own))
+
+
+def changed_files(setting):
+    with _lock:
+        return [path for path in watched_files(setting) if _signature(path) != _signatures.get(path)]
+
+
+def reload_setting(name, debug=False):
+    """Re-resolve a loaded setting if any of its files changed on disk; returns the new Setting or None.
+
+    Only changed files are re-parsed. The new Setting is a copy of the old one with the entry diff
+    applied: unchanged creature and tile dicts are reused, and only the affected creature_ids and
+    tile_index entries and theme pools are updated. Other cached settings built from the changed files
+    (including ones that union this one) are dropped and resolved again on their next use.
+    """
+    with _lock:
+        old = _settings.peek(name)
+        if old is None:
+            return None
+        changed = changed_files(old)
+        if not changed:
+            return None
+        for path in changed:
+            _files.pop(path, None)
+            _signatures.pop(path, None)
+        stale = set(changed)
+        dropped = [(other, _settings.peek(other)) for other in _settings.names()]
+        dropped = [(other, setting) for other, setting in dropped
+                   if other == name or stale.intersection(setting.files)]
+        for other, _ in dropped:
+            _settings.drop(other)
+        try:
+            if not setting_exists(name):
+                raise FileNotFoundError(f"Setting '{name}' no longer exists in {SETTINGS_DIR}")
+            new = _reindex(old, *_resolve_entries(name, debug))
+        except Exception:
+            # e.g. a half-saved file: keep serving the old settings and retry on the next call
+            for other, setting in dropped:
+                if _settings.peek(other) is None:
+                    _settings.put(other, setting)
+            raise
+        _settings.put(name, new)
+        new.changes["files"] = changed
+        if debug:
+            print(f"Reloaded setting '{name}': {new.changes}")
+        return new
+
+
+def _reindex(old, creatures, themes, tiles, files, inferred):
+    """A new Setting from old and the re-resolved entries, updating only the index entries the diff touches.
+
+    old is left as it is, so a generation already working from it keeps a consistent snapshot.
+    """
+    creatures, added, changed_names, removed = _diff_entries(
+        old.creatures, {c["name"]: c for c in old.creatures}, creatures, lambda c: c["name"])
+    tiles, *tile_diff = _diff_entries(old.tiles, old.tile_index, tiles, lambda t: t["name"].lower())
+    changed_themes = {t for t in old.themes.keys() | themes.keys() if old.themes.get(t) != themes.get(t)}
+
+    creature_ids = old.creature_ids
+    if removed:
+        creature_ids = {n: i for n, i in creature_ids.items() if n not in removed}
+    for i, creature in enumerate(creatures):
+        if creature_ids.get(creature["name"]) != i:
+            if creature_ids is old.creature_ids:
+                creature_ids = dict(creature_ids)
+            creature_ids[creature["name"]] = i
+    _catalogs[id(creatures)] = (creatures, creature_ids)
+
+    tile_index = old.tile_index
+    if tile_diff[2]:
+        tile_index = {key: tile for key, tile in tile_index.items() if key not in tile_diff[2]}
+    for tile in tiles:
+        key = tile["name"].lower()
+        if tile_index.get(key) is not tile:
+            if tile_index is old.tile_index:
+                tile_index = dict(tile_index)
+            tile_index[key] = tile
+
+    new = Setting(old.name, creatures, themes, tiles, files, creature_ids=creature_ids, tile_index=tile_index)
+    new.inferred_themes = frozenset(inferred)
+    touched = added | changed_names | removed
+    kept = patched = 0
+    for key, pools in old.theme_pools.items():
+        if changed_themes.intersection(key):
+            new.theme_pools[key] = thematic_pools(creatures, key, themes)
+            continue
+        members = set()
+        for theme in key:
+            members.update(themes.get(theme, ()))
+        if not touched or not (touched & members or pools["all_creatures"]):
+            new.theme_pools[key] = pools
+            kept += 1
+        elif pools["all_creatures"] or added & members:
+            # New members have to go in at their catalog position
+            new.theme_pools[key] = thematic_pools(creatures, key, themes)
+        else:
+            thematic = [creatures[creature_ids[c["name"]]] if c["name"] in changed_names else c
+                        for c in pools["thematic"] if c["name"] not in removed]
+            new.theme_pools[key] = _split_pools(thematic, False) if thematic else thematic_pools(creatures, key, themes)
+            patched += 1
+    new.changes = {"creatures": len(touched), "themes": len(changed_themes), "tiles": sum(map(len, tile_diff)),
+                   "pools_kept": kept, "pools_patched": patched,
+                   "pools_rebuilt": len(old.theme_pools) - kept - patched}
+    return new
+
+
+def _diff_entries(old_entries, old_by_key, entries, key):
+    """Diff re-resolved entries against old ones: (entries, added, changed, removed), keys as sets.
+
+    Every unchanged entry is replaced by old's dict, so indices and pools that hold it stay valid. A
+    freshly parsed file list is swapped for the result too, so settings resolved from it later share it.
+    """
+    if entries is old_entries:
+        return old_entries, set(), set(), set()
+    merged, added, changed = [], set(), set()
+    for entry in entries:
+        k = key(entry)
+        previous = old_by_key.get(k)
+        if previous is None:
+            added.add(k)
+        elif previous != entry:
+            changed.add(k)
+        else:
+            entry = previous
+        merged.append(entry)
+    removed = old_by_key.keys() - {key(entry) for entry in merged}
+    if not (added or changed or removed) and all(a is b for a, b in zip(merged, old_entries)):
+        merged = old_entries
+    for path, data in _files.items():
+        if data is entries:
+            _files[path] = merged
+    return merged, added, changed, removed
+
+
+def thematic_pools(creatures, themes, theme_map):
+    """Candidate lists for a set of themes; they only depend on the tile, so callers can reuse them."""
+    thematic_names = set()
+    for theme in themes:
+        thematic_names.update(theme_map.get(theme, []))
+    thematic_creatures = [c for c in creatures if c["name"] in thematic_names]
+    if not thematic_creatures:
+        return _split_pools(creatures, True)
+    return _split_pools(thematic_creatures, False)
+
+
+def _split_pools(thematic_creatures, all_creatures):
+    return {
+        "thematic": thematic_creatures,
+        "big": [c for c in thematic_creatures if int(c['xp']) >= 200],  # Lowered threshold
+        "small": [c for c in thematic_creatures if int(c['xp']) <= 200],
+        "all_creatures": all_creatures,
+    }
+
+
+def creature_notes(setting):
+    """{creature name: (type, notes)} for the setting's creatures.
+
+    The catalog only keeps name, cr and xp, so the prompt-only fields are read again from the setting's
+    files the first time they're asked for, in the same layering order, and kept on the Setting.
+    """
+    if setting.notes is None:
+        found = {}
+        for path in setting.files:
+            base = os.path.basename(path)
+            if base == "creatures.json":
+                entries = load_creatures(path, fields=("name", "type", "notes"), errors=[])
+            elif base == "setting.json":
+                entries = ((_read(path) or {}).get("creatures") or {}).get("add") or []
+            else:
+                continue
+            for entry in entries:
+                if isinstance(entry, dict) and (entry.get("type") or entry.get("notes")):
+                    found[entry["name"]] = (entry.get("type") or "", entry.get("notes") or "")
+        setting.notes = {name: found[name] for name in setting.creature_ids if name in found}
+    return setting.notes
+
+
+def clear_cache():
+    with _lock:
+        _files.clear()
+        _signatures.clear()
+        _catalogs.clear()
+        _settings.clear()
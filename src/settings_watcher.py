@@ -0,0 +1,52 @@
+import threading
+
+from src import settings
+
+
+class SettingsWatcher:
+    """Polls the active setting's JSON files and hot-swaps a reloaded setting into the generator.
+
+    Uses plain os.stat polling, so it works everywhere without extra dependencies. The generator swaps the
+    new setting in as one unit; encounters already being built finish with the setting they started with.
+    """
+
+    def __init__(self, generator, interval=1.0, on_reload=None):
+        self.generator = generator
+        self.interval = interval
+        self.on_reload = on_reload  # called with the new Setting after it is in use
+        self.reloads = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="settings-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def check(self):
+        """Reload now if anything changed; returns the new Setting or None."""
+        generator = self.generator
+        setting = settings.reload_setting(generator.setting, debug=generator.debug)
+        if setting is None:
+            return None
+        generator.tiles.use_setting(setting)
+        generator.use_setting(setting)
+        self.reloads += 1
+        if self.on_reload is not None:
+            self.on_reload(setting)
+        return setting
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                # Usually a half-saved file; the next poll picks up the finished one
+                print(f"Settings reload failed: {e}")
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Coalesces identical in-flight calls: the first caller for a key does the work, later callers share its result.
+
+    Works from plain threads (do) and from asyncio tasks (ado); both kinds of caller can wait on the same key.
+    If the leading call raises, every waiter gets the same exception and the key is released so the next call retries.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> concurrent.futures.Future
+        self.calls = 0  # calls that actually ran fn
+        self.coalesced = 0  # calls served by another caller's in-flight result
+
+    def _claim(self, key):
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            future.set_running_or_notify_cancel()
+            self._inflight[key] = future
+            self.calls += 1
+            return future, True
+
+    def _run(self, key, future, fn, args, kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._release(key, future)
+            future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            self._release(key, future)
+            future.set_result(result)
+
+    def _release(self, key, future):
+        # Release before resolving so a caller woken by the result never re-joins a finished flight
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def do(self, key, fn, *args, **kwargs):
+        future, leader = self._claim(key)
+        if leader:
+            self._run(key, future, fn, args, kwargs)
+        return future.result()
+
+    async def ado(self, key, fn, *args, **kwargs):
+        """Async variant of do(); fn is a blocking callable and runs in the default executor."""
+        future, leader = self._claim(key)
+        if leader:
+            # The work runs in a thread and resolves the shared future on its own, so cancelling the
+            # leading task only stops that task from waiting; the other waiters still get the result.
+            loop = asyncio.get_running_loop()
+            loop.run_in_executor(None, self._run, key, future, fn, args, kwargs)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def forget(self, key):
+        """Stop coalescing onto the current flight for key; the next call starts a fresh one."""
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
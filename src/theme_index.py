@@ -0,0 +1,150 @@
+"""Embedding index that maps tile themes missing from themes.json to their nearest creatures.
+
+Built offline with a local Ollama embedding model and stored next to the setting as theme_index.npz
+(L2-normalised float16 vectors for the unmapped tile themes and for every creature's name/type/notes).
+When the setting is loaded, each unmapped theme gets the top-k creatures by cosine similarity; nothing is
+embedded at run time.
+
+    ollama pull nomic-embed-text
+    python -m src.theme_index --setting generic --k 12
+
+Needs NumPy at load time (the index is ignored without it) and the ollama package to build.
+"""
+import argparse
+import os
+
+INDEX_FILE = "theme_index.npz"
+DEFAULT_MODEL = "nomic-embed-text"
+DEFAULT_K = 12
+BATCH_SIZE = 64
+
+
+def theme_text(theme):
+    return f"Creatures encountered in a {theme} place"
+
+
+def creature_text(creature):
+    parts = [creature["name"]]
+    if creature.get("type"):
+        parts.append(f"({creature['type']})")
+    if creature.get("notes"):
+        parts.append(f"- {creature['notes']}")
+    return " ".join(parts)
+
+
+def unmapped_themes(setting):
+    """Themes used by the setting's tiles that themes.json doesn't list, in first-use order."""
+    used = {}
+    for tile in setting.tiles:
+        for theme in tile.get("themes", ["dark"]):
+            used.setdefault(theme, None)
+    return [theme for theme in used if theme not in setting.themes or theme in setting.inferred_themes]
+
+
+def _normalise(vectors):
+    import numpy as np
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def load(path):
+    """Read an index file into plain arrays (settings reads it through _read, so it is cached and watched)."""
+    import numpy as np
+    with np.load(path, allow_pickle=False) as data:
+        return {
+            "model": str(data["model"]),
+            "k": int(data["k"]),
+            "themes": [str(t) for t in data["themes"]],
+            "theme_vectors": data["theme_vectors"].astype(np.float32),
+            "creatures": [str(c) for c in data["creatures"]],
+            "creature_vectors": data["creature_vectors"].astype(np.float32),
+        }
+
+
+def nearest_creatures(index, themes, creature_names, k=None):
+    """{theme: [creature names, best first]} for the indexed themes among `themes`.
+
+    Only creatures in creature_names (the setting as loaded now) are candidates.
+    """
+    import numpy as np
+    k = k or index["k"]
+    rows = [i for i, theme in enumerate(index["themes"]) if theme in themes]
+    present = set(creature_names)
+    columns = np.array([i for i, name in enumerate(index["creatures"]) if name in present], dtype=np.intp)
+    if not rows or not len(columns):
+        return {}
+    scores = index["theme_vectors"][rows] @ index["creature_vectors"][columns].T
+    k = min(k, len(columns))
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+    top = np.take_along_axis(top, order, axis=1)
+    names = index["creatures"]
+    return {index["themes"][row]: [names[columns[j]] for j in top[n]] for n, row in enumerate(rows)}
+
+
+def fill_unmapped(index, themes, creatures, tiles):
+    """{theme: creature names} for tile themes that `themes` doesn't map but the index knows."""
+    missing = {theme for tile in tiles for theme in tile.get("themes", ["dark"])} - set(themes)
+    return nearest_creatures(index, missing, [c["name"] for c in creatures]) if missing else {}
+
+
+def embed(client, model, texts):
+    vectors = []
+    for start in range(0, len(texts), BATCH_SIZE):
+        response = client.embed(model=model, input=texts[start:start + BATCH_SIZE])
+        vectors.extend(response["embeddings"])
+    return vectors
+
+
+def build(setting_name, model=DEFAULT_MODEL, host="http://localhost:11434", k=DEFAULT_K, out=None):
+    """Embed the setting's unmapped tile themes and its creatures and write the index; returns its path."""
+    import numpy as np
+    from ollama import Client
+    from src import settings
+    from src.creature_loader import load_creatures
+
+    setting = settings.load_setting(setting_name)
+    themes = unmapped_themes(setting)
+    # The loaded catalog is compact; notes and types come straight from the files it was built from
+    details = {}
+    for path in setting.files:
+        if os.path.basename(path) == "creatures.json":
+            details.update((c["name"], c) for c in load_creatures(path, fields=("name", "type", "notes", "xp")))
+    creatures = [details.get(c["name"], c) for c in setting.creatures]
+
+    client = Client(host=host)
+    theme_vectors = _normalise(embed(client, model, [theme_text(t) for t in themes])) if themes else None
+    creature_vectors = _normalise(embed(client, model, [creature_text(c) for c in creatures]))
+    if theme_vectors is None:
+        theme_vectors = np.zeros((0, creature_vectors.shape[1]), dtype=np.float32)
+
+    out = out or os.path.join(settings.SETTINGS_DIR, setting.name, INDEX_FILE)
+    with open(out, "wb") as f:
+        np.savez(f, model=np.array(model), k=np.array(k),
+                 themes=np.array(themes, dtype=str), theme_vectors=theme_vectors.astype(np.float16),
+                 creatures=np.array([c["name"] for c in creatures], dtype=str),
+                 creature_vectors=creature_vectors.astype(np.float16))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the theme -> creature embedding index for a setting")
+    parser.add_argument("--setting", default="generic")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Ollama embedding model")
+    parser.add_argument("--host", default="http://localhost:11434")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="Creatures per unmapped theme")
+    parser.add_argument("--out", help=f"Output file (default: data/settings/<setting>/{INDEX_FILE})")
+    args = parser.parse_args()
+
+    path = build(args.setting, args.model, args.host, args.k, args.out)
+    index = load(path)
+    print(f"Wrote {path}: {len(index['themes'])} themes x {len(index['creatures'])} creatures "
+          f"({index['creature_vectors'].shape[1]} dims, {os.path.getsize(path) / 1024:.0f} KiB)")
+    found = nearest_creatures(index, index["themes"], index["creatures"])
+    for theme, names in found.items():
+        print(f"  {theme}: {', '.join(names)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,41 @@
-import json
-import os
+from src.settings import DEFAULT_SETTING, load_setting, setting_exists
 
 class TileManager:
     def __init__(self, setting="ravenloft", debug=False):
         self.tiles = []
+        self.tile_index = {}
         self.setting = setting
         self.debug = debug
         self.load_tiles()
 
     def load_tiles(self):
-        tile_file = f"data/settings/{self.setting}/tiles.json"
-        if self.debug:
-            print(f"Loading tiles from: {tile_file}")
-        if not os.path.exists(tile_file):
+        if not setting_exists(self.setting):
             if self.debug:
-                print(f"Setting '{self.setting}' not found, falling back to ravenloft")
-            self.setting = "ravenloft"  # Globally update setting
-            tile_file = "data/settings/ravenloft/tiles.json"
+                print(f"Setting '{self.setting}' not found, falling back to {DEFAULT_SETTING}")
+            self.setting = DEFAULT_SETTING  # Globally update setting
         try:
-            with open(tile_file, "r") as f:
-                self.tiles = json.load(f)
-            if self.debug:
-                print(f"Successfully loaded tiles from: {tile_file}")
-        except FileNotFoundError:
+            self.use_setting(load_setting(self.setting, debug=self.debug))
+        except Exception as e:
+            print(f"Failed to load tiles: {e}")
+        if not self.tiles:
             print("Tiles file not found, using defaults.")
             self.tiles = [
                 {"name": "Chapel", "type": "named", "themes": ["undead"], "event_chance": 0.8},
                 {"name": "Crypt", "type": "named", "themes": ["undead"], "event_chance": 0.8},
                 {"name": "Corridor", "type": "generic", "themes": ["dark"], "event_chance": 0.5}
             ]
+            self.tile_index = {tile["name"].lower(): tile for tile in self.tiles}
+
+    def use_setting(self, setting):
+        """Switch to a resolved Setting's tiles."""
+        self.setting = setting.name
+        self.tiles = setting.tiles
+        self.tile_index = setting.tile_index
 
     def get_tile(self, tile_name):
-        for tile in self.tiles:
-            if tile["name"].lower() == tile_name.lower():
-                return tile
+        tile = self.tile_index.get(tile_name.lower())
+        if tile is not None:
+            return tile
         return {"name": tile_name, "type": "generic", "themes": ["dark"], "event_chance": 0.5}
 
     def get_available_tiles(self):
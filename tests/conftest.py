@@ -0,0 +1,35 @@
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src import settings  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    # Data paths (data/settings, data/tiles) are relative to the repository root
+    monkeypatch.chdir(ROOT)
+    settings.clear_cache()
+    yield
+    settings.configure_cache(max_bytes=64 * 1024 * 1024, max_entries=8)
+    settings.clear_cache()
+
+
+@pytest.fixture
+def settings_dir(tmp_path, monkeypatch):
+    """An empty settings and catalogs tree; write(path, data) adds JSON files to it."""
+    monkeypatch.setattr(settings, "SETTINGS_DIR", str(tmp_path / "settings"))
+    monkeypatch.setattr(settings, "CATALOGS_DIR", str(tmp_path / "catalogs"))
+
+    def write(path, data):
+        target = tmp_path / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(json.dumps(data))
+        return str(target)
+
+    return write
@@ -0,0 +1,43 @@
+import pytest
+
+from src import autotune
+
+
+def result(model, size, latency, **extra):
+    return {"model": model, "size": size, "latency_ms": latency, "options": {}, **extra}
+
+
+def test_choose_fastest_or_largest_within_target():
+    results = [result("tiny", 1, 800), result("small", 2, 1500), result("big", 3, 4000),
+               result("huge", 4, 100, error="out of memory")]
+    assert autotune.choose(results)["model"] == "tiny"
+    assert autotune.choose(results, target_ms=2000)["model"] == "small"
+    assert autotune.choose(results, target_ms=10)["model"] == "tiny"  # nothing fits: fastest
+    assert autotune.choose([results[-1]]) is None
+
+
+def test_option_grid_drops_duplicates_and_unset_values():
+    grid = autotune.option_grid(num_ctx=(512,), num_thread=[None, 4], num_batch=(None, 128))
+    assert grid == [{"num_ctx": 512}, {"num_ctx": 512, "num_batch": 128}, {"num_ctx": 512, "num_thread": 4},
+                    {"num_ctx": 512, "num_thread": 4, "num_batch": 128}]
+
+
+def test_profiles_are_kept_per_host(tmp_path):
+    path = str(tmp_path / "autotune.json")
+    autotune.save_profile({"model": "a"}, host="http://one:11434", path=path)
+    autotune.save_profile({"model": "b"}, host="http://two:11434/", path=path)
+    assert autotune.load_profile("http://one:11434/", path=path) == {"model": "a"}
+    assert autotune.load_profile("http://two:11434", path=path) == {"model": "b"}
+    assert autotune.load_profile("http://three:11434", path=path) is None
+
+
+def test_autotune_measures_every_installed_model():
+    pytest.importorskip("ollama")
+    from bench.fake_ollama import FakeOllama
+
+    with FakeOllama(models=("gemma2:2b", "phi3:mini", "nomic-embed-text"), tokens=8) as server:
+        results, best = autotune.autotune(server.url, grid=[{}, {"num_ctx": 512}], runs=2, log=lambda line: None)
+    assert [(r["model"], r["options"]) for r in results] == [
+        ("gemma2:2b", {}), ("gemma2:2b", {"num_ctx": 512}), ("phi3:mini", {}), ("phi3:mini", {"num_ctx": 512})]
+    assert all("error" not in r and r["ttft_ms"] <= r["latency_ms"] for r in results)
+    assert best in results
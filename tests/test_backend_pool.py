@@ -0,0 +1,69 @@
+import socket
+import time
+
+import pytest
+
+from bench.fake_ollama import FakeOllama
+from src import backend_pool
+from src.description_backends import BackendError, make_backend
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_requests_spread_by_outstanding_count():
+    with FakeOllama(tokens=3, first_token_delay=0.2) as first, FakeOllama(tokens=3, first_token_delay=0.2) as second:
+        pool = make_backend("ollama-http", "gemma2:2b", f"{first.url},{second.url}")
+        pool.connect()
+        before = first.requests, second.requests
+        texts = pool.batch(["Crypt"] * 6, max_workers=6)
+        assert len(texts) == 6 and all(texts)
+        assert (first.requests - before[0], second.requests - before[1]) == (3, 3)
+        assert max(first.peak_active, second.peak_active) == 3
+        assert [s["outstanding"] for s in pool.stats()] == [0, 0]
+        pool.close()
+
+
+def test_warm_host_preferred():
+    with FakeOllama(tokens=3) as warm, FakeOllama(tokens=3) as cold:
+        pool = make_backend("ollama-http", "gemma2:2b", f"{cold.url},{warm.url}")
+        pool.connect()
+        cold.loaded.clear()  # as if Ollama had unloaded the model after the connect ping
+        for host in pool.hosts:
+            pool._refresh_loaded(host, force=True)
+        before = cold.requests
+        for _ in range(4):
+            pool.generate("Crypt")
+        assert cold.requests == before
+        assert [s["loaded"] for s in pool.stats()] == [[], ["gemma2:2b"]]
+        pool.close()
+
+
+def test_failover_and_recovery(monkeypatch, capsys):
+    monkeypatch.setattr(backend_pool, "BASE_BACKOFF", 0.1)
+    port = free_port()
+    with FakeOllama(tokens=3) as live:
+        pool = make_backend("ollama-http", "gemma2:2b", f"http://127.0.0.1:{port},{live.url}")
+        pool.connect()
+        assert f"127.0.0.1:{port} unavailable" in capsys.readouterr().out
+        assert pool.generate("Crypt") and pool.stream("Crypt")  # served by the live host
+        down, up = pool.stats()
+        assert not down["healthy"] and down["requests"] == 0 and up["healthy"]
+
+        with FakeOllama(port=port, tokens=3) as revived:
+            time.sleep(0.15)  # past the backoff: the next request probes the revived host
+            assert pool.generate("Crypt")
+            assert revived.requests >= 1 and pool.stats()[0]["healthy"]
+        pool.close()
+
+
+def test_every_host_down_raises():
+    pool = make_backend("ollama-http", "gemma2:2b", f"http://127.0.0.1:{free_port()},http://127.0.0.1:{free_port()}")
+    with pytest.raises(ConnectionError):
+        pool.connect()
+    with pytest.raises(BackendError, match="No host could serve the request"):
+        pool.generate("Crypt")
+    assert [s["failures"] for s in pool.stats()] == [1, 1]
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from bench import suite
+
+
+def report(**results):
+    return {"meta": {}, "results": {name: {"min_us": us, "median_us": us * 2} for name, us in results.items()}}
+
+
+def test_compare_flags_regressions_past_the_threshold():
+    baseline = report(select=10.0, load=100.0, cold_start=1000.0, gone=5.0)
+    current = report(select=11.5, load=80.0, cold_start=1200.0, added=1.0)
+    rows = suite.compare(baseline, current, threshold=10, thresholds={"cold_*": 25})
+    assert [(name, status) for name, *_, status in rows] == [
+        ("added", "new"), ("cold_start", "ok"), ("load", "faster"), ("select", "REGRESSION"), ("gone", "missing")]
+    assert rows[3][3] == pytest.approx(15.0)
+
+
+def test_compare_command_exits_nonzero_on_a_regression(tmp_path, capsys):
+    paths = []
+    for name, data in (("base", report(select=10.0)), ("slow", report(select=12.0))):
+        paths.append(tmp_path / f"{name}.json")
+        paths[-1].write_text(json.dumps(data))
+    with pytest.raises(SystemExit) as exit_info:
+        suite.main(["compare", str(paths[0]), str(paths[1])])
+    assert exit_info.value.code == 1 and "1 regression(s) beyond 10%" in capsys.readouterr().out
+    with pytest.raises(SystemExit) as exit_info:
+        suite.main(["compare", str(paths[0]), str(paths[1]), "--threshold", "25"])
+    assert exit_info.value.code == 0
+
+
+def test_run_selects_benchmarks_by_glob():
+    results = suite.run(only=["select*ravenloft*"], repeat=2, cold_repeat=1, quiet=True)["results"]
+    assert results and all("ravenloft" in name and name.startswith("select") for name in results)
+    assert all(r["min_us"] <= r["median_us"] for r in results.values())
@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.bulk_sampler import BulkSampler  # noqa: E402
+from src.encounter_generator import EncounterGenerator  # noqa: E402
+from src.tile_manager import TileManager  # noqa: E402
+
+
+def test_batch_rows_add_up():
+    tiles = TileManager(setting="ravenloft")
+    sampler = BulkSampler(EncounterGenerator(tile_manager=tiles, setting=tiles.setting))
+    batch = sampler.sample("Crypt", 4, 5, n=2000, seed=1, chunk=512)
+    assert len(batch) == 2000 and batch.offsets[-1] == len(batch.ids)
+    for i in range(0, 2000, 97):
+        pairs = batch.encounter(i)
+        assert batch.total_xp[i] == sum(int(sampler.generator.creatures[c]["xp"]) * n for c, n in pairs)
+        assert not (batch.empty[i] and pairs)
+    # Same seed, same batch, whatever the chunking
+    again = sampler.sample("Crypt", 4, 5, n=2000, seed=1, chunk=512)
+    assert np.array_equal(batch.total_xp, again.total_xp) and np.array_equal(batch.ids, again.ids)
+
+
+@pytest.mark.parametrize("tile", ["Crypt", "Arcane Circle"])
+def test_check_agrees_with_the_scalar_selector(tile):
+    result = subprocess.run([sys.executable, "-m", "src.bulk_sampler", "--tile", tile, "--level", "8", "--check",
+                             "-n", "5000"], capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert result.stdout.rstrip().endswith("OK")
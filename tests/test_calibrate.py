@@ -0,0 +1,24 @@
+import random
+
+from src import calibrate
+
+
+def test_cells_are_seeded_independently_of_scheduling():
+    cells = calibrate.build_cells(["ravenloft"], ["Crypt", "Arcane Circle"], [4], [1, 8], [False, True])
+    assert len(cells) == 8
+    timing = "us_per_encounter"
+    serial = [{k: v for k, v in row.items() if k != timing} for row in calibrate.run(cells, 200, seed=3, workers=1)]
+    pooled = [{k: v for k, v in row.items() if k != timing} for row in calibrate.run(cells, 200, seed=3, workers=2)]
+    assert serial == pooled
+    for row in serial:
+        assert abs(row["budget_hit_rate"] + row["under_rate"] + row["over_rate"] - 1) < 1e-3
+        assert row["empty_rate"] < 1
+
+
+def test_stats_leave_selection_unchanged():
+    generator = calibrate._generator("ravenloft")
+    tile = generator.tiles.get_tile("Crypt")
+    stats = {}
+    with_stats = generator._build(tile, 4, 5, False, random.Random(9), None, stats=stats)
+    without = generator._build(tile, 4, 5, False, random.Random(9), None)
+    assert with_stats == without and "attempts" in stats
@@ -0,0 +1,19 @@
+from src.campaign import Campaign, sequential
+from src.encounter_generator import EncounterGenerator
+from src.selection_trace import SelectionTrace
+from src.tile_manager import TileManager
+
+
+def test_compare_builds_the_paced_encounters():
+    tiles = TileManager(setting="ravenloft")
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, trace=SelectionTrace())
+    route = ["Arcane Circle", "Chapel", "Laboratory", "Workshop"]
+    campaign = Campaign(generator, route, pacing="climax", seed=11)
+    paced = campaign.select()
+
+    generator.trace.clear()
+    sequential(generator, campaign.route, campaign.players, campaign.level, campaign.seed, campaign.scales)
+    records = generator.trace.records()
+    assert [r["xp_budget"] for r in records] == [int(generator._get_xp_budget(4, 5, False) * scale)
+                                                 for scale in campaign.scales]
+    assert [r["total_xp"] for r in records] == [e.total_xp for e in paced]
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from bench.fake_ollama import FakeOllama
+from src.cassette import Cassette, CassetteBackend
+from src.description_backends import BackendError, make_backend
+
+
+def record(path, prompts, **fake):
+    with FakeOllama(**fake) as server:
+        backend = CassetteBackend(Cassette(path, "record"), make_backend("ollama-http", "gemma2:2b", server.url))
+        backend.connect()
+        streamed = []
+        for prompt in prompts:
+            start = time.perf_counter()
+            streamed.append([((time.perf_counter() - start) * 1000, piece) for piece in backend.stream(prompt)])
+        text = backend.generate("Sewer", {"num_predict": 4})
+        backend.close()
+    return streamed, text
+
+
+def test_replay_gives_back_the_recorded_stream_and_timing(tmp_path):
+    path = str(tmp_path / "run.cassette")
+    recorded, text = record(path, ["Crypt", "Tomb"], tokens=8, first_token_delay=0.1, token_delay=0.02)
+    assert Cassette(path).stats()["responses"] == 3
+
+    cassette = Cassette(path, speed=1.0)
+    backend = CassetteBackend(cassette, model="gemma2:2b")  # no server running now
+    backend.connect()
+    for prompt, chunks in zip(["Crypt", "Tomb"], recorded):
+        start = time.perf_counter()
+        replayed = [((time.perf_counter() - start) * 1000, piece) for piece in backend.stream(prompt)]
+        assert [piece for _, piece in replayed] == [piece for _, piece in chunks]
+        # Each chunk arrives no earlier than it did when recorded, and not much later
+        for (at, _), (was, _) in zip(replayed, chunks):
+            assert was - 5 <= at <= was + 50
+    assert backend.generate("Sewer", {"num_predict": 4}) == text
+    with pytest.raises(BackendError, match="No recording"):
+        backend.generate("Sewer")  # recorded with different options
+    assert cassette.stats() | {"path": None} == {"mode": "replay", "path": None, "responses": 3, "hits": 3,
+                                                 "misses": 1, "speed": 1.0}
+
+    fast = CassetteBackend(Cassette(path, speed=0), model="gemma2:2b")
+    start = time.perf_counter()
+    assert "".join(fast.stream("Crypt")) == "".join(piece for _, piece in recorded[0])
+    assert time.perf_counter() - start < 0.05
+
+
+def test_loose_replay_serves_unused_recordings_in_order(tmp_path):
+    path = str(tmp_path / "run.cassette")
+    recorded, text = record(path, ["Crypt", "Tomb"], tokens=5)
+    texts = ["".join(piece for _, piece in chunks) for chunks in recorded] + [text]
+
+    strict = CassetteBackend(Cassette(path, speed=0), model="gemma2:2b")
+    with pytest.raises(BackendError):
+        strict.generate("A reworded crypt prompt")
+
+    backend = CassetteBackend(Cassette(path, speed=0, loose=True), model="gemma2:2b")
+    assert backend.generate("Tomb") == texts[1]  # an exact match is still preferred
+    assert backend.generate("A reworded crypt prompt") == texts[0]
+    assert backend.generate("A reworded sewer prompt", {"num_predict": 9}) == texts[2]
+    assert backend.generate("Yet another prompt") == texts[0]  # every recording used: start over
+    assert backend.cassette.stats()["misses"] == 0
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from src.creature_loader import CREATURE_FIELDS, load_creatures
+
+ENTRY = {"name": "Goblin", "type": "humanoid", "cr": "1/4", "xp": 50, "notes": "Nimble Escape"}
+
+
+def write_entries(tmp_path, entries):
+    """One entry per line after the opening '[' (entry i starts on line i + 2)."""
+    path = tmp_path / "creatures.json"
+    path.write_text("[\n" + ",\n".join(json.dumps(entry) for entry in entries) + "\n]\n")
+    return str(path)
+
+
+def catalog(count):
+    return [dict(ENTRY, name=f"Goblin #{i}") for i in range(count)]
+
+
+@pytest.mark.parametrize("chunk_size", [16, 256, 1 << 16])
+def test_matches_json_load(tmp_path, chunk_size):
+    entries = catalog(500)
+    entries[7]["extra"] = True
+    path = write_entries(tmp_path, entries)
+    with open(path) as f:
+        expected = [{field: e[field] for field in CREATURE_FIELDS} for e in json.load(f)]
+    assert load_creatures(path, chunk_size=chunk_size) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [16, 256, 1 << 16])
+def test_malformed_entries_reported_with_line(tmp_path, chunk_size):
+    entries = catalog(300)
+    del entries[10]["xp"]
+    entries[150] = ["not", "an", "object"]
+    entries[299]["xp"] = "lots"
+    path = write_entries(tmp_path, entries)
+    errors = []
+    creatures = load_creatures(path, errors=errors, chunk_size=chunk_size)
+    assert len(creatures) == 297
+    assert errors == [
+        f"{path}:12: skipping creature entry: missing 'xp'",
+        f"{path}:152: skipping creature entry: expected an object, got list",
+        f"{path}:301: skipping creature entry: 'xp' is not a number: 'lots'",
+    ]
+
+
+def test_numeric_string_xp_kept(tmp_path):
+    path = write_entries(tmp_path, [dict(ENTRY, xp="50")])
+    assert load_creatures(path) == [{"name": "Goblin", "cr": "1/4", "xp": "50"}]
+
+
+@pytest.mark.parametrize("chunk_size", [16, 1 << 16])
+def test_syntax_error_stops_with_line_and_column(tmp_path, chunk_size):
+    path = tmp_path / "creatures.json"
+    lines = [json.dumps(entry) + "," for entry in catalog(200)]
+    lines[120] = '{"name": "Goblin", "xp": 50,, "cr": "1/4"},'
+    path.write_text("[\n" + "\n".join(lines)[:-1] + "\n]\n")
+    with pytest.raises(ValueError, match=rf"^{path}:122:29: "):
+        load_creatures(str(path), chunk_size=chunk_size)
+
+
+def test_truncated_file(tmp_path):
+    path = tmp_path / "creatures.json"
+    path.write_text('[\n{"name": "Goblin", "xp": 50},\n{"name": "Orc"')
+    with pytest.raises(ValueError, match=rf"^{path}:3:"):
+        load_creatures(str(path))
+
+
+@pytest.mark.parametrize("chunk_size", [16, 1 << 16])
+@pytest.mark.parametrize("entries", [[], [ENTRY], catalog(100)])
+def test_text_after_the_array_is_an_error(tmp_path, chunk_size, entries):
+    path = write_entries(tmp_path, entries)
+    with open(path, "r+") as f:
+        last_line = f.read().count("\n") + 1
+        f.write("  [1]\n")
+    with pytest.raises(ValueError, match=rf"^{path}:{last_line}:3: Extra data"):
+        load_creatures(path, chunk_size=chunk_size)
@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.deadliness import Party, estimate  # noqa: E402
+from src.encounter import Encounter  # noqa: E402
+
+CATALOG = [{"name": "Ghoul", "cr": "1", "xp": 200}, {"name": "Wight", "cr": "3", "xp": 700}]
+
+
+def encounter(counts, players=4, level=3):
+    return Encounter("Crypt", "named", ("undead",), players, level, False, tuple(counts), catalog=CATALOG)
+
+
+def test_seeded_and_bounded():
+    first = estimate(encounter([(0, 4)]), seed=5)
+    again = estimate(encounter([(0, 4)]), seed=5)
+    assert (first.rounds, first.pc_down, first.tpk) == (again.rounds, again.pc_down, again.tpk)
+    assert 0 <= first.tpk <= first.pc_down <= 1 and 0 <= first.party_wins <= 1 and 1 <= first.rounds <= 20
+
+
+def test_more_monsters_are_deadlier():
+    results = [estimate(encounter([(0, n)]), sims=4000, seed=1) for n in (1, 4, 10)]
+    assert [r.pc_down for r in results] == sorted(r.pc_down for r in results)
+    assert results[0].pc_down < results[-1].pc_down
+    assert results[0].tpk <= results[1].tpk < results[2].tpk
+    assert results[0].party_wins > results[-1].party_wins
+
+
+def test_stronger_parties_fare_better():
+    fight = [(1, 2), (0, 2)]
+    weak, strong = (estimate(encounter(fight, level=level), sims=4000, seed=2) for level in (2, 8))
+    assert strong.pc_down < weak.pc_down and strong.rounds < weak.rounds
+    tough = estimate(encounter(fight, level=2), party=Party.for_level(4, 2, hp=200), sims=4000, seed=2)
+    assert tough.tpk <= weak.tpk and tough.pc_down < weak.pc_down
+
+
+def test_empty_encounter_is_harmless():
+    result = estimate(Encounter("Crypt", "named", ("undead",), 4, 3, False, empty=True, catalog=CATALOG))
+    assert (result.pc_down, result.tpk, result.party_wins) == (0.0, 0.0, 1.0)
@@ -0,0 +1,15 @@
+import pytest
+
+from src.description_backends import DescriptionBackend
+
+
+def test_backend_must_implement_the_interface():
+    class Partial(DescriptionBackend):
+        def connect(self):
+            pass
+
+        def generate(self, prompt, options=None):
+            return prompt
+
+    with pytest.raises(TypeError, match="health"):
+        Partial("model", "http://localhost")
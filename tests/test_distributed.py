@@ -0,0 +1,60 @@
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from src.distributed import Coordinator, _resolve_tiles, job_grid, run_worker
+from src.encounter_generator import EncounterGenerator
+from src.tile_manager import TileManager
+
+
+def generator():
+    tiles = TileManager(setting="ravenloft")
+    return EncounterGenerator(tile_manager=tiles, setting=tiles.setting)
+
+
+def test_worker_without_ai_rejected_when_descriptions_wanted(tmp_path):
+    gen = generator()
+    address = f"unix:{tmp_path / 'coord.sock'}"
+    coordinator = Coordinator(gen, job_grid(["Crypt"], [5], [4]), address, describe=True).start()
+    try:
+        with pytest.raises(RuntimeError, match="--local-ai"):
+            run_worker(gen, address, name="plain", wait=5)
+    finally:
+        coordinator._server.shutdown()
+        coordinator._server.server_close()
+
+
+def test_tiles_resolved_like_a_campaign_route():
+    tiles = TileManager(setting="ravenloft")
+    assert _resolve_tiles(tiles, ["crypt", "arcane"]) == ["Crypt", "Arcane Circle"]
+    with pytest.raises(ValueError, match="Unknown or ambiguous tile 'Nowhere'"):
+        _resolve_tiles(tiles, ["Nowhere"])
+
+
+def test_workers_fill_the_bank(tmp_path):
+    gen = generator()
+    address = f"unix:{tmp_path / 'coord.sock'}"
+    coordinator = Coordinator(gen, job_grid(["Crypt", "Chapel"], [3, 5], [4]), address, chunk_size=1,
+                              idle_timeout=5).start()
+    worker = threading.Thread(target=run_worker, args=(gen, address), kwargs={"name": "w", "wait": 5})
+    worker.start()
+    assert coordinator.run(str(tmp_path / "bank.jsonl")) == 4
+    worker.join()
+    assert coordinator.workers["w"]["chunks"] == 4
+
+
+def test_coordinator_gives_up_without_workers(tmp_path):
+    coordinator = Coordinator(generator(), job_grid(["Crypt"], [5], [4]), f"unix:{tmp_path / 'coord.sock'}",
+                              idle_timeout=0.2)
+    with pytest.raises(RuntimeError, match="no worker connected for 0.2 s with 1 of 1 chunks unfinished"):
+        coordinator.run(str(tmp_path / "bank.jsonl"))
+
+
+def test_coordinator_notices_local_workers_exiting(tmp_path):
+    coordinator = Coordinator(generator(), job_grid(["Crypt"], [5], [4]), f"unix:{tmp_path / 'coord.sock'}",
+                              idle_timeout=None)
+    coordinator.processes = [subprocess.Popen([sys.executable, "-c", "raise SystemExit(3)"])]
+    with pytest.raises(RuntimeError, match=r"every local worker exited \(exit codes 3\)"):
+        coordinator.run(str(tmp_path / "bank.jsonl"))
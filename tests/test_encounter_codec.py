@@ -0,0 +1,64 @@
+import io
+
+import pytest
+
+from src.encounter_codec import BinaryWriter, dump_binary, dump_jsonl, load_binary, load_jsonl
+from src.encounter_generator import EncounterGenerator
+from src.tile_manager import TileManager
+
+
+def encounters(setting, count=40, seed=5):
+    tiles = TileManager(setting=setting)
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, seed=seed)
+    names = tiles.get_available_tiles()
+    found = [generator.generate(names[i % len(names)], 4, 5, skull=i % 7 == 0) for i in range(count)]
+    found[1].description = "Bones rattle in the dark. Ünïcode too."
+    return found
+
+
+def names(found):
+    return [(e.tile, e.creature_names) for e in found]
+
+
+def test_jsonl_round_trip():
+    written = encounters("ravenloft")
+    buffer = io.StringIO()
+    assert dump_jsonl(written, buffer) == len(written)
+    buffer.seek(0)
+    read = list(load_jsonl(buffer))
+    assert read == written and names(read) == names(written)
+
+
+def test_binary_round_trip():
+    written = encounters("ravenloft")
+    buffer = io.BytesIO()
+    assert dump_binary(written, buffer) == len(written)
+    buffer.seek(0)
+    read = list(load_binary(buffer))
+    # select/describe times are kept to the microsecond
+    assert read == written and names(read) == names(written)
+
+
+def test_empty_binary_file_has_a_header():
+    buffer = io.BytesIO()
+    assert dump_binary([], buffer) == 0
+    buffer.seek(0)
+    assert list(load_binary(buffer)) == []
+
+
+def test_jsonl_writes_a_header_per_catalog():
+    written = encounters("ravenloft", 10) + encounters("generic", 10)
+    buffer = io.StringIO()
+    dump_jsonl(written, buffer)
+    assert sum(line.startswith('{"catalog"') for line in buffer.getvalue().splitlines()) == 2
+    buffer.seek(0)
+    assert names(load_jsonl(buffer)) == names(written)
+
+
+def test_binary_rejects_a_second_catalog():
+    writer = BinaryWriter(io.BytesIO())
+    ravenloft, generic = encounters("ravenloft", 2), encounters("generic", 2)
+    for encounter in ravenloft:
+        writer.write(encounter)
+    with pytest.raises(ValueError, match="one creature catalog"):
+        writer.write(generic[0])
@@ -0,0 +1,84 @@
+import random
+import threading
+import time
+
+from bench.fake_ollama import FakeOllama
+from src.encounter_generator import EncounterGenerator
+from src.encounter_pool import EncounterPool
+from src.selection_trace import SelectionTrace
+from src.tile_manager import TileManager
+
+
+def filled_pool(seed):
+    tiles = TileManager(setting="ravenloft")
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, seed=seed)
+    pool = EncounterPool(generator, tiles, players=4, level=5, size=1, seed=seed)
+    pool.start()
+    names = tiles.get_available_tiles()
+    deadline = time.monotonic() + 30
+    while any(pool.ready_count(name) < 1 for name in names) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    pool.stop()
+    return generator, {name: pool.get(name).creature_names for name in names}
+
+
+def test_same_seed_pools_same_encounters():
+    first_generator, first = filled_pool(7)
+    second_generator, second = filled_pool(7)
+    assert first == second and any(first.values())
+    # The worker leaves the REPL's stream alone
+    assert first_generator.rng.random() == second_generator.rng.random() == random.Random(7).random()
+
+
+def test_background_builds_stay_out_of_the_trace():
+    tiles = TileManager(setting="ravenloft")
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, seed=1, trace=SelectionTrace())
+    pool = EncounterPool(generator, tiles, players=4, level=5, size=1, seed=1)
+    pool.start()
+    deadline = time.monotonic() + 30
+    while pool.ready_count("Crypt") < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    pool.stop()
+    assert pool.ready_count("Crypt") == 1 and len(generator.trace) == 0
+    pool.get("Chapel", skull=True)  # skull encounters are built in the foreground
+    assert len(generator.trace) == 1
+
+
+def test_background_describes_print_nothing(capsys):
+    tiles = TileManager(setting="ravenloft")
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, seed=1, local_ai=True,
+                                   ai_backend="ollama-http", ai_host="http://127.0.0.1:9")  # nothing listens there
+    pool = EncounterPool(generator, tiles, players=4, level=5, size=1, seed=1)
+    pool.start()
+    deadline = time.monotonic() + 30
+    while pool.ready_count("Arcane Circle") < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    pool.stop()
+    assert pool.ready_count("Arcane Circle") == 1
+    assert capsys.readouterr().out == ""
+    generator._get_ai()  # the first caller that may print reports the connection
+    assert capsys.readouterr().out.startswith("Failed to connect")
+
+
+def test_real_request_cancels_a_background_describe():
+    # One generation slot and 70 tokens at 50 ms: a background describe left to finish holds it for 3.5 s
+    with FakeOllama(tokens=70, token_delay=0.05, parallel=1) as server:
+        tiles = TileManager(setting="ravenloft")
+        generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, seed=1, local_ai=True,
+                                       model="gemma2:2b", ai_backend="ollama-http", ai_host=server.url)
+        generator._get_ai(quiet=True)
+        pool = EncounterPool(generator, tiles, players=4, level=5, size=1, seed=1)
+        pool.start()
+        deadline = time.monotonic() + 10
+        while server.active == 0 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert server.active == 1
+        requests, start = server.requests, time.monotonic()
+        foreground = threading.Thread(target=pool.get, args=("Chapel", True))
+        foreground.start()
+        while server.requests == requests and time.monotonic() < deadline:
+            time.sleep(0.005)
+        waited = time.monotonic() - start
+        foreground.join()
+        pool.stop()
+    assert waited < 1.5
@@ -0,0 +1,43 @@
+from src.encounter_generator import EncounterGenerator
+from src.tile_manager import TileManager
+
+
+def _setting(write, name, creatures):
+    write(f"settings/{name}/creatures.json", [{"name": c, "cr": "1", "xp": 200} for c in creatures])
+    write(f"settings/{name}/themes.json", {"undead": creatures})
+    write(f"settings/{name}/tiles.json", [{"name": "Crypt", "type": "named", "themes": ["undead"]}])
+
+
+def test_switch_mid_stream_uses_the_new_setting(settings_dir):
+    _setting(settings_dir, "old", ["Skeleton", "Zombie"])
+    _setting(settings_dir, "new", ["Wight", "Ghoul"])
+    tiles = TileManager(setting="old")
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, seed=3)
+    stream = iter(generator.stream(["Crypt"] * 10, players=4, level=5))
+    before = [next(stream) for _ in range(5)]
+    generator.switch_setting("new")
+    after = list(stream)
+
+    assert {name for e in before for name in e.creature_names} <= {"Skeleton", "Zombie"}
+    assert all(e.catalog is generator.creatures and not e.fallback and e.counts for e in after)
+    assert {name for e in after for name in e.creature_names} <= {"Wight", "Ghoul"}
+
+
+def test_fallback_uses_the_snapshot_it_was_built_from(settings_dir, monkeypatch):
+    _setting(settings_dir, "old", ["Skeleton", "Zombie"])
+    settings_dir("settings/new/creatures.json", [{"name": "Rat", "cr": "0", "xp": 10}])
+    settings_dir("settings/new/themes.json", {"vermin": ["Rat"]})
+    settings_dir("settings/new/tiles.json", [{"name": "Crypt", "type": "named", "themes": ["vermin"]}])
+    tiles = TileManager(setting="old")
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, seed=3)
+    active = generator._active
+    generator.switch_setting("new")
+
+    def fail(*args, **kwargs):
+        raise ValueError("no creatures fit")
+
+    monkeypatch.setattr(generator, "_select_monsters", fail)
+    encounter = generator._build(tiles.get_tile("Crypt"), 4, 5, False, generator.rng, None, active=active)
+    assert encounter.fallback and encounter.catalog is active[0]
+    assert len(encounter.counts) == 1
+    assert encounter.creature_names[0] in ("Skeleton", "Zombie") and encounter.total_xp == 200
@@ -0,0 +1,88 @@
+import random
+from collections import Counter
+
+from src.encounter import Encounter
+from src.encounter_generator import EncounterGenerator
+from src.history import EncounterHistory
+from src.tile_manager import TileManager
+
+CATALOG = [{"name": "Skeleton", "cr": "1/4", "xp": 50}, {"name": "Ghoul", "cr": "1", "xp": 200},
+           {"name": "Rat", "cr": "0", "xp": 10}]
+
+
+def encounter(*counts, tile="Crypt", empty=False):
+    total = sum(int(CATALOG[i]["xp"]) * n for i, n in counts)
+    return Encounter(tile, "named", ("undead",), 4, 5, False, tuple(counts), total, empty=empty, catalog=CATALOG)
+
+
+def test_reroll_replaces_the_encounter_it_came_from(tmp_path):
+    history = EncounterHistory(str(tmp_path / "history.sqlite"), session="s")
+    history.record(encounter((0, 2)))
+    history.record(encounter((1, 1)))
+    history.record(encounter((2, 4)), replaces_last=True)  # the Ghoul was rerolled into rats
+    history.record(encounter(empty=True))
+    history.record(encounter((0, 1)), replaces_last=True)  # nothing was recorded to replace
+    assert history.creature_frequency() == [("Skeleton", 2, 3), ("Rat", 1, 4)]
+    assert history.session_xp()[0][:3] == ("s", 3, 190)
+    assert set(history.penalty()) == {"Skeleton", "Rat"}
+    history.close()
+
+    # The in-memory counts match what a new session object loads from the database
+    again = EncounterHistory(str(tmp_path / "history.sqlite"), session="s")
+    assert again.penalty() == {"Skeleton": 1 / 3, "Rat": 0.5}
+    again.close()
+
+
+def test_penalty_covers_the_last_encounters_only(tmp_path):
+    history = EncounterHistory(str(tmp_path / "history.sqlite"), session="s", recent=2, strength=0.5)
+    assert history.penalty() is None
+    history.record(encounter((0, 3)))
+    history.record(encounter((0, 1), (1, 1)))
+    assert history.penalty() == {"Skeleton": 0.5, "Ghoul": 1 / 1.5}
+    history.record(encounter((2, 2)))  # the first encounter leaves the window
+    assert history.penalty() == {"Skeleton": 1 / 1.5, "Ghoul": 1 / 1.5, "Rat": 1 / 1.5}
+    history.close()
+
+
+def test_queries_across_sessions(tmp_path):
+    path = str(tmp_path / "history.sqlite")
+    first = EncounterHistory(path, session="night-1")
+    first.record(encounter((0, 2)), setting="ravenloft")
+    first.record(encounter((0, 1), (2, 3), tile="Sewer"), setting="ravenloft")
+    first.close()
+    second = EncounterHistory(path, session="night-2")
+    second.record(encounter((1, 1)))
+    second.record(encounter((2, 1), tile="Sewer"))
+    second.record(encounter((2, 2), tile="Sewer"))
+
+    assert second.creature_frequency() == [("Rat", 2, 3), ("Ghoul", 1, 1)]
+    assert second.creature_frequency(session="night-1", last=1) == [("Rat", 1, 3), ("Skeleton", 1, 1)]
+    assert second.creature_frequency(limit=1) == [("Rat", 2, 3)]
+    assert [row[:3] for row in second.session_xp()] == [("night-2", 3, 230), ("night-1", 2, 180)]
+    assert second.session_xp("night-1")[0][:3] == ("night-1", 2, 180)
+    assert second.tile_counts() == [("Sewer", 3), ("Crypt", 2)]
+    assert second.tile_counts("night-2") == [("Sewer", 2), ("Crypt", 1)]
+    assert second.creature_sessions("Rat") == [("night-2", 2), ("night-1", 1)]
+    second.close()
+
+
+def test_generator_picks_recent_creatures_less_often():
+    tiles = TileManager(setting="ravenloft")
+
+    def counts(history):
+        generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, history=history)
+        tile = tiles.get_tile("Crypt")
+        found = Counter()
+        for seed in range(300):
+            built = generator._build(tile, 4, 5, False, random.Random(seed), None)
+            found.update(c["name"] for c, _ in built.creatures)
+        return generator, found
+
+    generator, before = counts(None)
+    favourite = before.most_common(1)[0][0]
+    history = EncounterHistory(":memory:", strength=20)
+    history.record(Encounter("Crypt", "named", ("undead",), 4, 5, False,
+                             ((generator.creature_ids[favourite], 1),), catalog=generator.creatures))
+    _, after = counts(history)
+    history.close()
+    assert after[favourite] < before[favourite] / 2
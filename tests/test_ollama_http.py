@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from bench.fake_ollama import FakeOllama
+from src.ollama_http import OllamaHTTPClient, OllamaHTTPError
+
+
+def test_stream_yields_chunks_as_they_arrive():
+    with FakeOllama(tokens=20, token_delay=0.05) as server:
+        client = OllamaHTTPClient(server.url)
+        start = time.perf_counter()
+        stream = client.generate(model="gemma2:2b", prompt="Crypt", stream=True)
+        first = next(stream)
+        first_ms = (time.perf_counter() - start) * 1000
+        chunks = [first, *stream]
+        total_ms = (time.perf_counter() - start) * 1000
+    assert first_ms < total_ms / 3  # the first token didn't wait for the whole body
+    assert len(chunks) == 21 and chunks[-1]["done"] and not any(c["done"] for c in chunks[:-1])
+    assert "".join(c["response"] for c in chunks).split()[0] == "Cold"
+    assert len(client._idle) == 1  # a fully read stream leaves its connection for the next call
+
+
+def test_abandoned_stream_drops_its_connection():
+    with FakeOllama(tokens=50) as server:
+        client = OllamaHTTPClient(server.url)
+        stream = client.generate(model="gemma2:2b", prompt="Crypt", stream=True)
+        next(stream)
+        stream.close()
+        assert client._idle == []
+        assert client.generate(model="gemma2:2b", prompt="Crypt", options={"num_predict": 3})["eval_count"] == 3
+
+
+def test_errors_carry_the_status_and_message():
+    with FakeOllama() as server:
+        client = OllamaHTTPClient(server.url)
+        with pytest.raises(OllamaHTTPError, match="404: model 'missing' not found") as error:
+            client.generate(model="missing", prompt="Crypt")
+        assert error.value.status == 404
+        assert [m["model"] for m in client.list()["models"]] == ["gemma2:2b"]  # the connection is still usable
+
+
+class _OneRequestHandler(BaseHTTPRequestHandler):
+    """Answers as if keeping the connection alive, then closes it: what an idle-timeout does to a pooled one."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.connections += 1
+        data = json.dumps({"models": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        self.close_connection = True
+
+
+def test_stale_pooled_connection_is_retried_once():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OneRequestHandler)
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = OllamaHTTPClient(f"http://127.0.0.1:{server.server_address[1]}")
+        assert client.list() == {"models": []}
+        time.sleep(0.05)  # let the server close its end
+        assert client.list() == {"models": []}
+        assert server.connections == 2
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,68 @@
+from src.prompt_compiler import PromptCompiler, creature_groups, estimate_tokens, legacy_prompt, trim_note
+
+NAMES = ["Skeleton"] * 4 + ["Zombie"] * 2 + ["Ghoul"]
+
+
+def test_groups_keep_first_appearance_order():
+    assert creature_groups(NAMES) == [("Skeleton", 4), ("Zombie", 2), ("Ghoul", 1)]
+
+
+def test_compiled_prompt_counts_creatures():
+    compiled = PromptCompiler().compile("Crypt", ["undead"], NAMES)
+    assert "Include these monsters: Skeleton x4, Zombie x2, Ghoul." in compiled.text
+    assert compiled.tokens == estimate_tokens(compiled.text)
+    assert compiled.tokens < estimate_tokens(legacy_prompt("Crypt", ["undead"], NAMES))
+
+
+def test_trim_note_keeps_first_clause():
+    assert trim_note("Mindless undead. Vulnerable to bludgeoning.") == "Mindless undead"
+    assert trim_note(" ".join(["word"] * 30)) == " ".join(["word"] * 12)
+
+
+def test_notes_dropped_rarest_first_to_fit_budget():
+    notes = {"Skeleton": ("undead", "Rattling bones that obey their master."),
+             "Zombie": ("undead", "Slow, relentless and hungry."),
+             "Ghoul": ("undead", "Paralyzing claws and a taste for flesh.")}
+    full = PromptCompiler(token_budget=1000).compile("Crypt", ["undead"], NAMES, notes)
+    assert full.notes == ("Skeleton", "Zombie", "Ghoul")
+    without = PromptCompiler().compile("Crypt", ["undead"], NAMES)
+    budget = (full.tokens + without.tokens) // 2
+    tight = PromptCompiler(token_budget=budget).compile("Crypt", ["undead"], NAMES, notes)
+    assert tight.tokens <= budget
+    assert tight.notes and tight.notes == full.notes[:len(tight.notes)] and len(tight.notes) < 3
+
+
+def test_cache_hits_on_same_multiset():
+    compiler = PromptCompiler(cache_size=1)
+    first = compiler.compile("Crypt", ["undead"], NAMES)
+    assert compiler.compile("Crypt", ["undead"], list(NAMES)) is first
+    compiler.compile("Crypt", ["vermin"], ["Rat"])
+    assert compiler.compile("Crypt", ["undead"], NAMES) is not first  # evicted
+    assert compiler.stats() == {"entries": 1, "hits": 1, "misses": 3}
+
+
+def test_notes_never_push_the_prompt_over_budget():
+    notes = {"Skeleton": ("undead", "Rattling bones."), "Zombie": ("undead", "Slow."), "Ghoul": ("undead", None)}
+    without = PromptCompiler().compile("Crypt", ["undead"], NAMES)
+    for budget in range(without.tokens, without.tokens + 30):
+        compiled = PromptCompiler(token_budget=budget).compile("Crypt", ["undead"], NAMES, notes)
+        assert compiled.tokens <= budget or not compiled.notes
+        assert compiled.notes_text in compiled.text
+        assert compiled.notes_text.startswith("Notes: ") == bool(compiled.notes)
+    # Exactly the room for the first note's line, but not the "Notes: " in front of it
+    line = estimate_tokens("Skeleton: undead; Rattling bones. ")
+    assert PromptCompiler(token_budget=without.tokens + line).compile("Crypt", ["undead"], NAMES, notes).notes == ()
+
+
+def test_descriptions_keyed_by_the_notes_in_the_prompt(tmp_path):
+    from src.ai_description import AIDescription
+    from src.cassette import Cassette
+
+    path = tmp_path / "empty.cassette"
+    path.write_text("")
+    ai = AIDescription(backend="ollama-http", cassette=Cassette(str(path)), quiet=True)
+    key = lambda notes: ai._description_key("Crypt", ["undead"], NAMES, None, notes)
+    bones = {"Skeleton": ("undead", "Rattling bones.")}
+    assert key(bones) != key({"Skeleton": ("undead", "Brittle and loud.")})
+    assert key(bones) == key({"Skeleton": ("undead", "Rattling bones. Obeys its master.")})  # same once trimmed
+    assert key(None) == key({}) != key(bones)
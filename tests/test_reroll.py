@@ -0,0 +1,47 @@
+import pytest
+
+from bench.fake_ollama import FakeOllama
+from src import ai_description, reroll
+from src.encounter_generator import EncounterGenerator
+from src.tile_manager import TileManager
+
+
+@pytest.fixture
+def descriptions(monkeypatch):
+    """An empty description cache for the test."""
+    monkeypatch.setattr(ai_description, "_descriptions", type(ai_description._descriptions)())
+
+
+def _creature(name, xp=100):
+    return {"name": name, "cr": "1/2", "xp": xp}
+
+
+def test_only_rerolls_reuse_described_mixes(descriptions):
+    with FakeOllama(tokens=5) as server:
+        tiles = TileManager(setting="ravenloft")
+        generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, seed=1, local_ai=True,
+                                       model="gemma2:2b", ai_backend="ollama-http", ai_host=server.url)
+        encounter = generator.generate("Arcane Circle", 4, 5, quiet=True)
+        requests = server.requests
+        again = generator.describe(reroll._copy(encounter, description=None), quiet=True)
+        assert again.description and server.requests == requests + 1  # normal play asks the model every time
+        described, cached = reroll._describe(generator, reroll._copy(encounter, description=None))
+        assert (described, cached) == (False, True) and server.requests == requests + 1
+
+
+def test_swap_uses_the_encounters_setting_themes(settings_dir):
+    settings_dir("catalogs/shared/creatures.json",
+                 [_creature(name) for name in ("Skeleton", "Zombie", "Ghoul", "Rat", "Bat")])
+    settings_dir("catalogs/shared/tiles.json", [{"name": "Crypt", "type": "named", "themes": ["undead"]}])
+    for name, undead in (("dead", ["Skeleton", "Zombie", "Ghoul"]), ("vermin", ["Rat", "Bat"])):
+        settings_dir(f"settings/{name}/setting.json", {"base": "shared"})
+        settings_dir(f"settings/{name}/themes.json", {"undead": undead})
+    tiles = TileManager(setting="dead")
+    generator = EncounterGenerator(tile_manager=tiles, setting=tiles.setting, seed=2)
+    encounter = next(e for e in (generator.generate("Crypt", 2, 1) for _ in range(50)) if len(e.counts) == 1)
+    generator.switch_setting("vermin")
+    assert encounter.catalog is generator.creatures  # one shared catalog, different themes
+
+    swapped = reroll.swap_creature(generator, encounter).encounter
+    assert set(swapped.creature_names) <= {"Skeleton", "Zombie", "Ghoul"}
+    assert swapped.creature_names != encounter.creature_names
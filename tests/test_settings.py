@@ -0,0 +1,180 @@
+import os
+
+import pytest
+
+from src import settings
+
+
+def test_eviction_drops_unused_catalogs():
+    settings.configure_cache(max_entries=1)
+    names = settings.available_settings()
+    for _ in range(3):
+        for name in names:
+            settings.load_setting(name)
+    stats = settings.cache_stats()
+    assert stats["settings"] == [names[-1]]
+    current = settings.load_setting(names[-1])
+    assert list(settings._catalogs) == [id(current.creatures)]
+
+
+def test_misses_count_top_level_loads_only():
+    settings.configure_cache(max_entries=1)
+    names = settings.available_settings()
+    for _ in range(3):
+        for name in names:
+            settings.load_setting(name)
+    stats = settings.cache_stats()
+    assert stats["hits"] + stats["misses"] == 3 * len(names)
+
+
+def test_shared_catalogs_counted_once():
+    names = settings.available_settings()
+    loaded = [settings.load_setting(name) for name in names]
+    total = settings.cache_stats()["bytes"]
+    separate = sum(settings._deep_size((s.creatures, s.themes, s.tiles)) for s in loaded)
+    # 'all' reuses ravenloft's and generic's creature dicts, so the union costs less than the sum
+    assert max(settings._deep_size((s.creatures, s.themes, s.tiles)) for s in loaded) < total < separate
+
+
+def test_byte_bound_keeps_most_recent():
+    settings.configure_cache(max_bytes=1)
+    for name in settings.available_settings():
+        settings.load_setting(name)
+        stats = settings.cache_stats()
+        assert len(stats["settings"]) == 1  # over budget, but the most recent one always stays
+    settings.configure_cache(max_bytes=64 * 1024 * 1024)
+    for name in settings.available_settings():
+        settings.load_setting(name)
+    assert settings.cache_stats()["bytes"] <= 64 * 1024 * 1024
+
+
+def _creature(name, xp=100, cr="1/2"):
+    return {"name": name, "type": "Undead", "cr": cr, "xp": xp}
+
+
+def _crypt(settings_dir):
+    settings_dir("settings/crypt/creatures.json", [_creature("Skeleton"), _creature("Ghoul", 200), _creature("Rat", 25)])
+    settings_dir("settings/crypt/themes.json", {"undead": ["Skeleton", "Ghoul"], "vermin": ["Rat", "Bat"]})
+    settings_dir("settings/crypt/tiles.json", [{"name": "Crypt", "type": "generic", "themes": ["undead"]},
+                                               {"name": "Sewer", "type": "generic", "themes": ["vermin"]}])
+    setting = settings.load_setting("crypt")
+    for key in [("undead",), ("vermin",), ("dark",)]:
+        setting.theme_pools[key] = settings.thematic_pools(setting.creatures, key, setting.themes)
+    return setting
+
+
+def _rewrite(settings_dir, path, data):
+    path = settings_dir(path, data)
+    os.utime(path, ns=(1, 1))  # a different mtime even if the write landed in the same tick
+
+
+def test_reload_patches_only_affected_entries(settings_dir):
+    old = _crypt(settings_dir)
+    snapshot = {key: {field: list(v) if isinstance(v, list) else v for field, v in pools.items()}
+                for key, pools in old.theme_pools.items()}
+    _rewrite(settings_dir, "settings/crypt/creatures.json",
+             [_creature("Skeleton"), _creature("Ghoul", 200), _creature("Rat", 250, "1")])
+    new = settings.reload_setting("crypt")
+    assert new is not old and new.changes["creatures"] == 1
+    assert new.changes["pools_kept"] == 1 and new.changes["pools_patched"] == 1
+    assert all(n is o for n, o in zip(new.creatures[:2], old.creatures[:2]))
+    assert new.creature_ids is old.creature_ids and new.tile_index is old.tile_index
+    assert new.theme_pools[("undead",)] is old.theme_pools[("undead",)]
+    vermin = new.theme_pools[("vermin",)]
+    assert vermin["thematic"][0] is new.creatures[2] and vermin["big"] == [new.creatures[2]] and vermin["small"] == []
+    # The catalog pool holds every creature, so it's built again
+    assert new.theme_pools[("dark",)]["thematic"] is new.creatures
+    # The old setting is untouched for anything still generating from it
+    assert old.creatures[2]["xp"] == 25 and old.theme_pools == snapshot
+
+
+def test_reload_matches_a_fresh_load(settings_dir):
+    old = _crypt(settings_dir)
+    _rewrite(settings_dir, "settings/crypt/creatures.json",
+             [_creature("Bat", 10), _creature("Skeleton"), _creature("Rat", 300), _creature("Wight", 700)])
+    _rewrite(settings_dir, "settings/crypt/themes.json", {"undead": ["Skeleton", "Ghoul", "Wight"], "vermin": ["Rat", "Bat"]})
+    _rewrite(settings_dir, "settings/crypt/tiles.json", [{"name": "Sewer", "type": "generic", "themes": ["vermin"]},
+                                                         {"name": "Tomb", "type": "generic", "themes": ["undead"]}])
+    new = settings.reload_setting("crypt")
+    assert new.changes["creatures"] == 4 and new.changes["themes"] == 1 and new.changes["tiles"] == 2
+    assert new.tile_index["sewer"] is old.tile_index["sewer"]
+
+    settings.clear_cache()
+    fresh = settings.load_setting("crypt")
+    assert new.creatures == fresh.creatures and new.creature_ids == fresh.creature_ids
+    assert new.tile_index == fresh.tile_index
+    for key in old.theme_pools:
+        assert new.theme_pools[key] == settings.thematic_pools(fresh.creatures, key, fresh.themes)
+
+
+def test_layers_apply_in_order_and_share_unchanged_catalogs(settings_dir):
+    settings_dir("catalogs/base/creatures.json", [_creature("Skeleton"), _creature("Ghoul", 200), _creature("Rat", 25)])
+    settings_dir("catalogs/base/themes.json", {"undead": ["Skeleton", "Ghoul"], "vermin": ["Rat"]})
+    settings_dir("catalogs/base/tiles.json", [{"name": "Crypt", "type": "generic", "themes": ["undead"]}])
+    settings_dir("settings/plain/setting.json", {"base": "base"})
+    settings_dir("settings/also_plain/setting.json", {"base": "base"})
+    settings_dir("settings/crypt/setting.json", {
+        "base": "base",
+        "creatures": {"add": [_creature("Wight", 700, "3")], "override": [{"name": "Ghoul", "xp": 250}],
+                      "remove": ["Rat"]},
+        "themes": {"add": {"undead": ["Wight"]}, "remove": ["vermin"]},
+        "tiles": {"add": [{"name": "Barrow", "type": "generic", "themes": ["undead"]}]},
+    })
+    settings_dir("settings/crypt/creatures.json", [_creature("Skeleton", 60)])
+    settings_dir("settings/both/setting.json", {"union": ["crypt", "plain"]})
+
+    plain, also_plain = settings.load_setting("plain"), settings.load_setting("also_plain")
+    assert plain.creatures is also_plain.creatures  # the base catalog, parsed and indexed once
+
+    crypt = settings.load_setting("crypt")
+    assert [(c["name"], c["xp"]) for c in crypt.creatures] == [("Skeleton", 60), ("Ghoul", 250), ("Wight", 700)]
+    assert all(set(c) == {"name", "cr", "xp"} for c in crypt.creatures)
+    assert crypt.themes == {"undead": ["Skeleton", "Ghoul", "Wight"]}
+    assert [t["name"] for t in crypt.tiles] == ["Crypt", "Barrow"]
+    assert crypt.creature_ids == {"Skeleton": 0, "Ghoul": 1, "Wight": 2}
+
+    both = settings.load_setting("both")
+    # plain's entries replace crypt's where the names match, later union members winning
+    assert [(c["name"], c["xp"]) for c in both.creatures] == [("Skeleton", 100), ("Ghoul", 200), ("Wight", 700),
+                                                              ("Rat", 25)]
+    assert both.themes == {"undead": ["Skeleton", "Ghoul", "Wight"], "vermin": ["Rat"]}
+
+
+def test_setting_including_itself_is_rejected(settings_dir):
+    settings_dir("settings/loop/setting.json", {"union": ["loop"]})
+    with pytest.raises(ValueError, match="includes itself"):
+        settings.load_setting("loop")
+
+
+def test_shipped_settings_share_the_srd_catalog():
+    generic, old = settings.load_setting("generic"), settings.load_setting("generic-old")
+    assert generic.creatures is old.creatures and generic.creature_ids is old.creature_ids
+    everything = settings.load_setting("all")
+    names = set(everything.creature_ids)
+    assert set(generic.creature_ids) <= names and set(settings.load_setting("ravenloft").creature_ids) <= names
+
+
+def test_overlay_ops_on_themes_and_tiles(settings_dir, capsys):
+    settings_dir("catalogs/base/creatures.json", [_creature("Skeleton"), _creature("Rat", 25)])
+    settings_dir("catalogs/base/themes.json", {"undead": ["Skeleton"], "vermin": ["Rat"]})
+    settings_dir("catalogs/base/tiles.json", [{"name": "Crypt", "type": "generic", "themes": ["undead"]},
+                                              {"name": "Sewer", "type": "generic", "themes": ["vermin"]}])
+    settings_dir("settings/sewerless/setting.json", {
+        "base": "base",
+        "creatures": {"override": [{"name": "Lich", "xp": 1}]},
+        "themes": {"override": {"vermin": ["Skeleton"]}},
+        "tiles": {"override": [{"name": "Crypt", "event_chance": 1.0}], "remove": ["Sewer"]},
+    })
+    setting = settings.load_setting("sewerless")
+    assert "cannot override unknown creature 'Lich'" in capsys.readouterr().out
+    assert setting.themes == {"undead": ["Skeleton"], "vermin": ["Skeleton"]}
+    assert setting.tile_index == {"crypt": {"name": "Crypt", "type": "generic", "themes": ["undead"],
+                                            "event_chance": 1.0}}
+
+
+def test_missing_base_catalog_and_unknown_settings(settings_dir):
+    settings_dir("settings/broken/setting.json", {"base": "nowhere"})
+    with pytest.raises(FileNotFoundError, match="Base catalog 'nowhere'"):
+        settings.load_setting("broken")
+    settings_dir("settings/ravenloft/creatures.json", [_creature("Strahd", 10000)])
+    assert settings.load_setting("atlantis").name == "ravenloft"
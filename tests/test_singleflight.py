@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from bench.fake_ollama import FakeOllama
+from src.ai_description import AIDescription
+from src.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "done"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", work)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("key", work))) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    while flight.stats()["coalesced"] < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+    assert results == ["done"] * 5 and len(calls) == 1
+    assert flight.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_error_reaches_every_waiter_and_the_next_call_retries():
+    flight = SingleFlight()
+    with pytest.raises(RuntimeError, match="boom"):
+        flight.do("key", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+    assert flight.do("key", lambda: 42) == 42
+    assert flight.stats()["calls"] == 2
+
+
+def test_async_callers_coalesce():
+    flight = SingleFlight()
+    calls = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.05)
+        return len(calls)
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("key", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == [1] * 5
+    assert flight.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_forget_starts_a_fresh_flight():
+    flight = SingleFlight()
+    release = threading.Event()
+    first = []
+    thread = threading.Thread(target=lambda: first.append(flight.do("key", lambda: release.wait(5) and "old")))
+    thread.start()
+    while flight.stats()["in_flight"] == 0:
+        time.sleep(0.001)
+    flight.forget("key")
+    assert flight.do("key", lambda: "new") == "new"
+    release.set()
+    thread.join(5)
+    assert first == ["old"]
+
+
+def test_identical_descriptions_share_one_backend_call():
+    with FakeOllama(tokens=5, first_token_delay=0.3) as server:
+        ai = AIDescription(model="gemma2:2b", host=server.url, backend="ollama-http", quiet=True)
+        requests = server.requests
+        args = ("Crypt", ["undead"], ["Skeleton", "Skeleton", "Ghoul"])
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(ai.generate_description(*args, quiet=True)))
+                   for _ in range(4)]
+        threads.append(threading.Thread(target=lambda: results.append(ai.generate_description(*args, quiet=True,
+                                                                                              fresh=True))))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        # The four plain calls share one request; a reroll (fresh=True) makes its own
+        assert len(results) == 5 and len(set(results)) == 1
+        assert server.requests == requests + 2
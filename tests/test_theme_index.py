@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("ollama")
+
+from bench.fake_ollama import FakeOllama  # noqa: E402
+from src import settings, theme_index  # noqa: E402
+
+
+def test_unmapped_tile_themes_get_their_nearest_creatures(settings_dir):
+    settings_dir("settings/town/creatures.json", [
+        {"name": "Skeleton", "type": "undead", "cr": "1/4", "xp": 50, "notes": "Bones rattling through old crypts"},
+        {"name": "Rat", "type": "beast", "cr": "0", "xp": 10, "notes": "Sewer vermin"},
+        {"name": "Bandit", "type": "humanoid", "cr": "1/8", "xp": 25, "notes": "Road robber"},
+    ])
+    settings_dir("settings/town/themes.json", {"undead": ["Skeleton"]})
+    settings_dir("settings/town/tiles.json", [{"name": "Crypt", "type": "named", "themes": ["undead"]},
+                                              {"name": "Drain", "type": "named", "themes": ["sewer"]},
+                                              {"name": "Highway", "type": "named", "themes": ["road"]}])
+    assert theme_index.unmapped_themes(settings.load_setting("town")) == ["sewer", "road"]
+    with FakeOllama(models=(theme_index.DEFAULT_MODEL,)) as server:
+        path = theme_index.build("town", host=server.url, k=1)
+
+    index = theme_index.load(path)
+    assert index["themes"] == ["sewer", "road"] and index["creatures"] == ["Skeleton", "Rat", "Bandit"]
+    settings.clear_cache()
+    town = settings.load_setting("town")
+    assert town.themes == {"undead": ["Skeleton"], "sewer": ["Rat"], "road": ["Bandit"]}
+    assert town.inferred_themes == {"sewer", "road"} and path in town.files
+    # themes.json wins over the index, and creatures the setting dropped are never suggested
+    assert theme_index.fill_unmapped(index, {"sewer": ["Skeleton"]}, town.creatures[1:], town.tiles) == {"road": ["Bandit"]}
+    assert theme_index.nearest_creatures(index, ["sewer"], ["Skeleton", "Bandit"], k=2)["sewer"][0] != "Rat"